@@ -0,0 +1,23 @@
+"""
+ASGI config for Sistema de Gestión de Tareas
+
+Las vistas async (my_tasks, task_submissions, test_smtp, test_reminders) no
+ocupan un hilo mientras esperan a la base de datos o a Brevo; el resto de las
+vistas (síncronas) se ejecutan en hilos a través del adaptador de Django.
+
+Las respuestas en streaming de las vistas síncronas (listados, exportación CSV,
+descargas) se envían por bloques: ver config/async_views.AsyncStreamingMiddleware.
+
+Servidor (producción, railway.toml):
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 2
+Local:
+    uvicorn config.asgi:application --host 0.0.0.0 --port $PORT --workers 2
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_asgi_application()
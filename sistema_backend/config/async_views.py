@@ -0,0 +1,116 @@
+"""
+Soporte para vistas async y respuestas en streaming bajo ASGI.
+
+@api_view de DRF y los decoradores de Django 4.2 (require_GET, csrf_exempt)
+envuelven la vista en una función síncrona, así que una corrutina decorada con
+ellos deja de reconocerse como async. async_api_view cubre lo que esas vistas
+necesitan de @api_view: métodos permitidos, exención de CSRF y el manejador de
+excepciones de DRF.
+
+Bajo ASGI, Django 4.2 consume los iteradores síncronos de StreamingHttpResponse
+y FileResponse con sync_to_async(list): la respuesta completa queda en memoria
+antes de enviarse (stream_json, exportación CSV, descargas). AsyncStreamingMiddleware
+los cambia por un iterador async que avanza el generador por bloques en el hilo
+de la petición (el dueño de su conexión a la BD).
+"""
+import functools
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.settings import api_settings
+
+from .renderers import json_response
+
+# Bytes que se juntan en cada salto al hilo de la petición
+BLOQUE_STREAMING = 64 * 1024
+
+_FIN = object()
+
+
+def _respuesta_de_error(exc, request, args, kwargs):
+    """Respuesta JSON del manejador de excepciones de DRF, o None si no la maneja"""
+    contexto = {'request': request, 'view': None, 'args': args, 'kwargs': kwargs}
+    response = api_settings.EXCEPTION_HANDLER(exc, contexto)
+    if response is None:
+        return None
+    resultado = json_response(response.data, status=response.status_code)
+    # WWW-Authenticate, Retry-After (Throttled), etc.
+    for header, valor in response.items():
+        if header.lower() != 'content-type':
+            resultado[header] = valor
+    return resultado
+
+
+def async_api_view(metodos):
+    """Decorador para vistas `async def` con las mismas respuestas 405 y de error que DRF"""
+    def decorador(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in metodos:
+                return json_response({'detail': f'Método "{request.method}" no permitido.'}, status=405)
+            try:
+                return await view(request, *args, **kwargs)
+            except Exception as exc:
+                response = _respuesta_de_error(exc, request, args, kwargs)
+                if response is None:
+                    raise
+                return response
+
+        # Igual que @api_view: la API no usa sesiones, no aplica CSRF
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorador
+
+
+def _tomar_bloque(partes):
+    """Siguiente bloque de ~BLOQUE_STREAMING bytes del iterador síncrono, o _FIN"""
+    bloque = []
+    tamano = 0
+    for parte in partes:
+        bloque.append(parte)
+        tamano += len(parte)
+        if tamano >= BLOQUE_STREAMING:
+            break
+    return b''.join(bloque) if bloque else _FIN
+
+
+async def iterar_en_hilo(partes):
+    """
+    Iterador async sobre un iterador síncrono de bytes. thread_sensitive: cada
+    bloque se produce en el mismo hilo que ejecutó la vista.
+    """
+    partes = iter(partes)
+    tomar = sync_to_async(_tomar_bloque)
+    while True:
+        bloque = await tomar(partes)
+        if bloque is _FIN:
+            return
+        yield bloque
+
+
+def adaptar_streaming(request, response):
+    """Bajo ASGI, cambiar el contenido síncrono de una respuesta en streaming por uno async"""
+    if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+        # El generador original sigue registrado para cerrarse en response.close()
+        response.streaming_content = iterar_en_hilo(response.streaming_content)
+    return response
+
+
+class AsyncStreamingMiddleware:
+    """Aplica adaptar_streaming a cada respuesta (no hace nada bajo WSGI)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return adaptar_streaming(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return adaptar_streaming(request, await self.get_response(request))
@@ -0,0 +1,151 @@
+"""
+Métricas en formato Prometheus (GET /metrics).
+
+- sistema_http_request_duration_seconds{view, method, status}: latencia por ruta
+  (nombre de la URL; 'sin_ruta' para lo que no resuelve, así un escaneo de
+  rutas inexistentes no crea series nuevas)
+- sistema_db_query_duration_seconds{view} / sistema_db_queries_total{view}:
+  tiempo y número de consultas SQL por petición (QueryMetricsMiddleware)
+- sistema_emails_total{tipo, resultado}: envíos por EmailLog.TipoEmail y
+  resultado (enviado / fallido / omitido con EMAIL_ENABLED=False)
+- sistema_reminders_run_duration_seconds: duración de send_reminders
+- sistema_password_verify_seconds / sistema_password_verify_wait_seconds:
+  verificación bcrypt/PBKDF2 en hash_pool y espera en su cola
+
+Registrar una observación es un incremento en memoria (o en un archivo mmap en
+modo multiproceso): no hay consultas ni red en el camino de la petición.
+
+Con varios workers (gunicorn --workers 2) cada proceso tiene sus propios
+contadores. gunicorn.conf.py define PROMETHEUS_MULTIPROC_DIR: cada worker
+escribe sus valores en ese directorio y /metrics los suma, así cualquier worker
+que atienda el scrape responde por todos. Los comandos (send_reminders) solo
+aparecen si corren en la misma máquina con la misma variable.
+
+prometheus_client es opcional: sin él las funciones registrar_* no hacen nada y
+/metrics responde 501.
+
+Acceso: con METRICS_TOKEN se exige 'Authorization: Bearer <token>'. Sin token
+/metrics solo responde en desarrollo (DEBUG y fuera de producción); en
+producción sin METRICS_TOKEN responde 401 (las rutas y volúmenes no son públicos).
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+except ImportError:  # pragma: no cover - dependencia opcional
+    prometheus_client = None
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+# Buckets en segundos
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_BD = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+BUCKETS_HASH = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2.5)
+BUCKETS_RECORDATORIOS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+SIN_RUTA = 'sin_ruta'
+
+
+def disponible() -> bool:
+    """prometheus_client instalado y METRICS_ENABLED activo"""
+    return prometheus_client is not None and getattr(settings, 'METRICS_ENABLED', True)
+
+
+if prometheus_client is not None:
+    if MULTIPROC_DIR:
+        # Un comando lanzado a mano con la variable definida no debe fallar
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+    PETICIONES = Histogram(
+        'sistema_http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+        ['view', 'method', 'status'], buckets=BUCKETS_HTTP,
+    )
+    DURACION_BD = Histogram(
+        'sistema_db_query_duration_seconds', 'Tiempo en la base de datos por petición',
+        ['view'], buckets=BUCKETS_BD,
+    )
+    CONSULTAS_BD = Counter(
+        'sistema_db_queries', 'Consultas SQL ejecutadas', ['view'],
+    )
+    EMAILS = Counter(
+        'sistema_emails', 'Emails por tipo y resultado', ['tipo', 'resultado'],
+    )
+    RECORDATORIOS = Histogram(
+        'sistema_reminders_run_duration_seconds', 'Duración de cada corrida de send_reminders',
+        ['resultado'], buckets=BUCKETS_RECORDATORIOS,
+    )
+    VERIFICACION = Histogram(
+        'sistema_password_verify_seconds', 'Verificación de contraseña (bcrypt/PBKDF2) en hash_pool',
+        buckets=BUCKETS_HASH,
+    )
+    ESPERA_VERIFICACION = Histogram(
+        'sistema_password_verify_wait_seconds', 'Espera en la cola de hash_pool',
+        buckets=BUCKETS_HASH,
+    )
+
+
+def registrar_peticion(url_name, metodo, estado, duracion, duracion_bd, consultas):
+    if not disponible():
+        return
+    vista = url_name or SIN_RUTA
+    PETICIONES.labels(vista, metodo, str(estado)).observe(duracion)
+    DURACION_BD.labels(vista).observe(duracion_bd)
+    if consultas:
+        CONSULTAS_BD.labels(vista).inc(consultas)
+
+
+def registrar_email(tipo, resultado):
+    """resultado: EmailLog.Estado ('enviado' / 'fallido') u 'omitido'"""
+    if not disponible():
+        return
+    EMAILS.labels(tipo or 'recovery_code', resultado).inc()
+
+
+def registrar_recordatorios(duracion, resultado):
+    """resultado: 'ok', 'con_errores' o 'simulado' (--dry-run)"""
+    if not disponible():
+        return
+    RECORDATORIOS.labels(resultado).observe(duracion)
+
+
+def registrar_verificacion(duracion, espera):
+    if not disponible():
+        return
+    VERIFICACION.observe(duracion)
+    ESPERA_VERIFICACION.observe(espera)
+
+
+def _autorizado(request) -> bool:
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        # Sin token solo en desarrollo: DEBUG vale True por omisión, por eso
+        # también se revisa IS_PRODUCTION
+        return settings.DEBUG and not getattr(settings, 'IS_PRODUCTION', False)
+    return request.headers.get('Authorization', '') == f'Bearer {token}'
+
+
+def metrics_view(request):
+    """
+    GET /metrics
+    Formato de exposición de Prometheus. Requiere 'Authorization: Bearer
+    <METRICS_TOKEN>'; sin METRICS_TOKEN solo se permite en desarrollo.
+    """
+    if not disponible():
+        return JsonResponse({
+            'success': False,
+            'message': 'Métricas no disponibles (instala prometheus_client o activa METRICS_ENABLED)',
+        }, status=501)
+    if not _autorizado(request):
+        return JsonResponse({'success': False, 'message': 'No autorizado'}, status=401)
+
+    if MULTIPROC_DIR:
+        # Sumar los archivos de todos los workers, no solo los de este proceso
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
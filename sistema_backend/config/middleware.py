@@ -0,0 +1,156 @@
+"""
+Métricas de base de datos por petición.
+
+QueryMetricsMiddleware cuenta las consultas SQL y el tiempo total en la base de
+datos de cada petición (con un execute_wrapper instalado en cada conexión) y los
+agrega a la respuesta:
+
+    X-Query-Count: 4
+    Server-Timing: db;dur=3.2;desc="4 consultas", app;dur=11.8
+
+Server-Timing aparece en la pestaña Network de las DevTools del navegador. En
+las respuestas en streaming (exportaciones, /api/users, SSE) solo se cuentan
+las consultas hechas antes de empezar a enviar el cuerpo.
+
+Las consultas del limitador de users/ratelimit.py (corre dentro de este
+middleware) no se cuentan: van dentro de sin_medir() y no son de la vista.
+
+Con QUERY_BUDGET_WARNINGS=True además registra una advertencia cuando una ruta
+supera su presupuesto de config/query_budgets.py. Con METRICS_ENABLED la latencia
+y el tiempo en BD de cada petición también van a /metrics (config/metrics.py).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from . import metrics
+from .query_budgets import es_consulta, presupuesto
+
+logger = logging.getLogger(__name__)
+
+# Medidor de la petición en curso. Una ContextVar (y no connection.execute_wrapper
+# alrededor de la vista) porque bajo ASGI las consultas corren en el hilo de
+# sync_to_async, con otra conexión: el contexto sí se copia a ese hilo.
+_medidor_actual = ContextVar('medidor_consultas', default=None)
+
+
+class MedidorConsultas:
+    """execute_wrapper que acumula número de consultas y tiempo en la base de datos"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.duracion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if es_consulta(sql):
+                self.consultas += 1
+                self.duracion += time.perf_counter() - inicio
+
+
+@contextmanager
+def sin_medir():
+    """Las consultas dentro del bloque no cuentan para la petición en curso"""
+    token = _medidor_actual.set(None)
+    try:
+        yield
+    finally:
+        _medidor_actual.reset(token)
+
+
+def _medir(execute, sql, params, many, context):
+    medidor = _medidor_actual.get()
+    if medidor is None:
+        return execute(sql, params, many, context)
+    return medidor(execute, sql, params, many, context)
+
+
+def _instalar(connection, **kwargs):
+    """Agregar _medir a los execute_wrappers de la conexión (una sola vez)"""
+    if _medir not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir)
+
+
+class QueryMetricsMiddleware:
+    """
+    Agrega X-Query-Count y Server-Timing a cada respuesta.
+    Funciona en modo síncrono (WSGI) y async (ASGI) sin adaptador de por medio.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.headers = getattr(settings, 'QUERY_METRICS_ENABLED', True)
+        self.avisar = getattr(settings, 'QUERY_BUDGET_WARNINGS', False)
+        self.prometheus = metrics.disponible()
+        self.enabled = self.headers or self.prometheus
+        if self.enabled:
+            # Cada conexión nueva (de cualquier hilo) queda instrumentada
+            connection_created.connect(_instalar, dispatch_uid='query_metrics')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        # La conexión de este hilo pudo abrirse antes de cargar el middleware
+        _instalar(connection)
+        medidor = MedidorConsultas()
+        token = _medidor_actual.set(medidor)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medidor_actual.reset(token)
+        self._reportar(request, response, medidor, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        medidor = MedidorConsultas()
+        token = _medidor_actual.set(medidor)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medidor_actual.reset(token)
+        self._reportar(request, response, medidor, time.perf_counter() - inicio)
+        return response
+
+    def _reportar(self, request, response, medidor, duracion):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if self.prometheus:
+            metrics.registrar_peticion(
+                url_name, request.method, response.status_code, duracion, medidor.duracion, medidor.consultas
+            )
+        if not self.headers:
+            return
+
+        response['X-Query-Count'] = str(medidor.consultas)
+        response['Server-Timing'] = (
+            f'db;dur={medidor.duracion * 1000:.1f};desc="{medidor.consultas} consultas", '
+            f'app;dur={duracion * 1000:.1f}'
+        )
+
+        if not self.avisar or url_name is None:
+            return
+        limite = presupuesto(url_name)
+        if limite is not None and medidor.consultas > limite:
+            logger.warning(
+                f'[QUERIES] {request.method} {url_name}: {medidor.consultas} consultas '
+                f'(presupuesto {limite}, {medidor.duracion * 1000:.1f} ms en BD)'
+            )
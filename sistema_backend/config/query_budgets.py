@@ -0,0 +1,80 @@
+"""
+Presupuesto de consultas SQL por endpoint (nombre de la ruta → máximo).
+
+Un entero es un máximo fijo: la vista no debe crecer con los datos (si un
+listado empieza a hacer una consulta por fila, se pasa del presupuesto). Las
+vistas que sí escalan con la petición tienen una función de N, donde N es lo
+que procesa esa petición:
+
+- task-activate: estudiantes del roster (bulk_create por lotes de 1000)
+- submit-task: archivos subidos (un INSERT por archivo)
+- get-users: usuarios (iterator por bloques de 2000 + 2 prefetch por bloque)
+- bulk-update-materias: filas del roster (bloques de CHUNK_INSCRIPCIONES)
+
+Los máximos incluyen las consultas de los caches del proceso cuando están fríos
+(principal del usuario, catálogo de materias), pero no las del limitador de
+users/ratelimit.py en login/forgot-password/verify-recovery-code/reset-password:
+QueryMetricsMiddleware no las cuenta (sin_medir). tareas/tests.py los verifica
+con el dataset sintético; QueryMetricsMiddleware (config/middleware.py) los
+registra como advertencia en producción con QUERY_BUDGET_WARNINGS (solo los
+fijos: ahí N no se conoce).
+"""
+
+# Sentencias de control de transacción: no cuentan como consultas
+CONTROL_TRANSACCION = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def _lotes(n, tamano):
+    return max(1, -(-n // tamano))
+
+
+PRESUPUESTOS = {
+    # ── Docente ──
+    'task-list-create': 6,
+    'task-detail': 6,
+    'task-activate': lambda n: 10 + _lotes(n, 1000),
+    'task-close': 5,
+    'task-submissions': 3,
+    'grade-submission': 5,
+    'grades-report': 5,
+    'grades-stats': 3,
+    'grades-export': 5,
+    'gradebook-analytics': 0,
+    'students-list': 2,
+    # ── Estudiante ──
+    'my-tasks': 3,
+    'my-task-detail': 4,
+    'submit-task': lambda n: 4 + n,
+    'my-submissions': 2,
+    'events-stream': 1,
+    # ── Usuarios ──
+    'login': 2,
+    'register': 8,
+    'forgot-password': 4,
+    'verify-recovery-code': 1,
+    'reset-password': 3,
+    'get-users': lambda n: 3 * _lotes(n, 2000),
+    'update-materias': 6,
+    'bulk-update-materias': lambda n: 5 * _lotes(n, 1000),
+    'get-materias': 2,
+    'hash-pool-stats': 0,
+    'rate-limit-stats': 0,
+    'email-queue-stats': 0,
+    'test-reminders': 1,
+    'test-smtp': 0,
+    # ── Operación (config/urls.py) ──
+    'metrics': 0,
+}
+
+
+def es_consulta(sql):
+    """False para BEGIN/COMMIT/ROLLBACK/SAVEPOINT"""
+    return not sql.lstrip().upper().startswith(CONTROL_TRANSACCION)
+
+
+def presupuesto(url_name, n=None):
+    """Máximo de consultas de la ruta, o None si no tiene (o depende de N y no se indicó)"""
+    limite = PRESUPUESTOS.get(url_name)
+    if callable(limite):
+        return limite(n) if n is not None else None
+    return limite
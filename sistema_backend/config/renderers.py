@@ -0,0 +1,66 @@
+"""
+Renderer JSON rápido para DRF.
+
+Usa orjson cuando está instalado y, si no, cae al JSONRenderer estándar de DRF
+(json de la biblioteca estándar). La salida es la misma en ambos casos: fechas
+con el formato de DRF ('Z' para UTC), Decimals como número y cadenas lazy
+(gettext_lazy) como texto.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+_drf_encoder = JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+if orjson is not None:
+    # orjson formatea datetime/date/time igual que el encoder de DRF (isoformat,
+    # microsegundos solo si hay, 'Z' para desfase cero). Única diferencia: los
+    # desfases con segundos (LMT anteriores a 1900), que orjson redondea al minuto.
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Tipos que orjson no serializa nativamente (Decimal, lazy strings, timedelta, ...)"""
+    return _drf_encoder.default(obj)
+
+
+def dumps(data):
+    """Serializar a bytes JSON compactos (UTF-8), igual que JSONRenderer de DRF"""
+    if orjson is not None:
+        ret = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+    else:
+        ret = _drf_encoder.encode(data).encode('utf-8')
+    # Escapar separadores de línea/párrafo como lo hace DRF (compatibilidad con JS)
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que usa orjson si está disponible"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            # Salida con sangría (p.ej. ?format=json con indent) o sin orjson
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dumps(data)
+
+
+def json_response(data, status=200):
+    """
+    HttpResponse con el mismo JSON que produce la API. Para vistas que no pasan
+    por DRF (las vistas async: @api_view no soporta corrutinas).
+    """
+    from django.http import HttpResponse
+
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
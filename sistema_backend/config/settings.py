@@ -36,6 +36,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Bajo ASGI: streaming por bloques en lugar de leer la respuesta completa
+    'config.async_views.AsyncStreamingMiddleware',
+    'config.middleware.QueryMetricsMiddleware',
+    'users.ratelimit.RateLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -110,9 +114,70 @@ else:
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+# Caché en proceso de principales de usuario (users/cache.py)
+USER_PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('USER_PRINCIPAL_CACHE_MAX_ENTRIES', 2048))
+USER_PRINCIPAL_CACHE_TTL = int(os.environ.get('USER_PRINCIPAL_CACHE_TTL', 300))  # segundos
+
+# Catálogo de materias en memoria (users/catalog.py)
+MATERIA_CATALOG_TTL = int(os.environ.get('MATERIA_CATALOG_TTL', 300))  # segundos
+
+# Estadísticas de calificaciones por docente (tareas/stats.py)
+GRADE_STATS_CACHE_TTL = int(os.environ.get('GRADE_STATS_CACHE_TTL', 300))  # segundos
+
+# Snapshots columnares para analítica (tareas/snapshots.py, comando snapshot_gradebook)
+GRADEBOOK_SNAPSHOT_DIR = Path(os.environ.get('GRADEBOOK_SNAPSHOT_DIR', BASE_DIR / 'snapshots' / 'gradebook'))
+
+# Eventos en tiempo real para los dashboards (tareas/events.py, /api/events/; solo bajo ASGI)
+SSE_BUFFER_EVENTOS = int(os.environ.get('SSE_BUFFER_EVENTOS', 100))  # eventos pendientes por conexión
+SSE_MAX_CONEXIONES = int(os.environ.get('SSE_MAX_CONEXIONES', 500))  # por proceso
+SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))  # segundos entre comentarios keep-alive
+SSE_MAX_DURACION = int(os.environ.get('SSE_MAX_DURACION', 300))  # segundos; luego el navegador reconecta
+
+# Consultas SQL por petición: headers X-Query-Count / Server-Timing (config/middleware.py)
+QUERY_METRICS_ENABLED = os.environ.get('QUERY_METRICS_ENABLED', 'True') == 'True'
+# Advertir en el log cuando una ruta supera su presupuesto (config/query_budgets.py)
+QUERY_BUDGET_WARNINGS = os.environ.get('QUERY_BUDGET_WARNINGS', 'False') == 'True'
+
+# Métricas Prometheus en /metrics (config/metrics.py; requiere prometheus_client)
+# Con varios workers gunicorn.conf.py define PROMETHEUS_MULTIPROC_DIR
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+# /metrics exige 'Authorization: Bearer <token>'; sin token solo responde con DEBUG fuera de producción
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Rate limiting de login / recuperación de contraseña (users/ratelimit.py)
+# DatabaseBackend se comparte entre workers (tabla rate_limit_counters).
+# CacheBackend solo es compartido con Redis/Memcached en CACHES; MemoryBackend es por proceso.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'users.ratelimit.DatabaseBackend')
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# Proxies de confianza delante de la app (Railway: 1). X-Forwarded-For se lee desde la derecha.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 1 if IS_PRODUCTION else 0))
+RATE_LIMIT_RULES = {
+    '/api/login': {'capacidad': 10, 'por_minuto': 10, 'campo': 'id_usuario'},
+    '/api/forgot-password': {'capacidad': 3, 'por_minuto': 1, 'campo': 'correo'},
+    '/api/verify-recovery-code': {'capacidad': 10, 'por_minuto': 5, 'campo': 'correo'},
+    '/api/reset-password': {'capacidad': 5, 'por_minuto': 2, 'campo': 'correo'},
+}
+
+# Cola de emails en segundo plano (users/email_queue.py)
+EMAIL_QUEUE_WORKERS = int(os.environ.get('EMAIL_QUEUE_WORKERS', 2))
+EMAIL_QUEUE_PRIORITY_WORKERS = int(os.environ.get('EMAIL_QUEUE_PRIORITY_WORKERS', 1))  # códigos de recuperación
+EMAIL_QUEUE_MAX_SIZE = int(os.environ.get('EMAIL_QUEUE_MAX_SIZE', 1000))
+
+# Pool de verificación de contraseñas (users/hash_pool.py)
+HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', 2))
+HASH_POOL_QUEUE_LIMIT = int(os.environ.get('HASH_POOL_QUEUE_LIMIT', 32))  # logins en espera antes de responder 503
+HASH_POOL_TIMEOUT = int(os.environ.get('HASH_POOL_TIMEOUT', 10))  # segundos
+
+# Costo de los hashers (calibrar con: python manage.py calibrate_hashers)
+# Los hashes con otro costo se re-generan de forma transparente en el siguiente login
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600000))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
 # Password hashers - incluir bcrypt para contraseñas migradas de Node.js
+# El primero es el que se usa para contraseñas nuevas y al re-hashear en el login
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'users.hashers.TunedPBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
     'django.contrib.auth.hashers.Argon2PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
@@ -157,6 +222,16 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # JSON con orjson si está instalado (config/renderers.py); respaldo a json estándar
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # CORS - Permitir conexiones desde el frontend Angular
@@ -186,10 +261,19 @@ CORS_ALLOW_HEADERS = [
     'x-user-id',
 ]
 
+# Para que el frontend lea el nombre del archivo en las exportaciones
+CORS_EXPOSE_HEADERS = [
+    'content-disposition',
+    'server-timing',
+    'x-query-count',
+]
+
 # Configuración de Email - Brevo HTTP API
 # Railway bloquea SMTP. Brevo envía por HTTPS (puerto 443).
 # Tier gratuito: 300 emails/día.
 # La config real está en users/email_service.py (BREVO_API_KEY)
+# Apagar todos los envíos (benchmarks, entornos de prueba sin Brevo)
+EMAIL_ENABLED = os.environ.get('EMAIL_ENABLED', 'True') == 'True'
 
 # Logging para diagnosticar problemas de email en producción
 LOGGING = {
@@ -218,5 +302,15 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'config.middleware': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'users.views': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
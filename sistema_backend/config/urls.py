@@ -9,6 +9,8 @@ from django.views.static import serve
 from django.http import FileResponse
 import os
 
+from .metrics import metrics_view
+
 # Ruta base del proyecto practica_scrum (padre de sistema_backend)
 BASE_PROJECT_DIR = os.path.dirname(settings.BASE_DIR)
 
@@ -24,6 +26,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('api/', include('tareas.urls')),
+    path('metrics', metrics_view, name='metrics'),
     
     # Servir archivos estáticos desde /src (compatibilidad con frontend)
     re_path(r'^src/(?P<path>.*)$', serve_src_file),
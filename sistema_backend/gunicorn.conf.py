@@ -0,0 +1,27 @@
+"""
+Configuración de gunicorn (se carga sola desde ./gunicorn.conf.py).
+
+Prepara el modo multiproceso de prometheus_client para /metrics
+(config/metrics.py): cada worker escribe sus métricas en PROMETHEUS_MULTIPROC_DIR
+y el worker que atiende el scrape suma las de todos.
+"""
+import os
+import shutil
+
+# Se define aquí (en el master, antes de crear los workers) para que la hereden
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_sistema')
+
+
+def on_starting(server):
+    """Borrar los valores de la corrida anterior"""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Descartar los archivos 'live' del worker que terminó"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
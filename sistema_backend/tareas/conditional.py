@@ -0,0 +1,99 @@
+"""
+Validadores HTTP (ETag / Last-Modified) para las vistas de tareas.
+
+Cada función hace a lo más una consulta agregada y nunca construye la
+respuesta; ver users/conditional.py para el decorador que los usa.
+"""
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from users.catalog import materia_catalog
+from users.conditional import build_etag
+from users.models import User
+from .models import Task, Submission
+
+
+def _ultima_fecha(*fechas):
+    fechas = [f for f in fechas if f is not None]
+    return max(fechas) if fechas else None
+
+
+def task_detail_validators(request, task_id):
+    """Tarea + agregados de sus entregas (conteos y últimos timestamps) + catálogo de materias"""
+    docente_id = request.headers.get('X-User-Id') or request.GET.get('docente_id')
+    
+    tarea = Task.objects.filter(id=task_id).values(
+        'docente_id', 'materia_id', 'fecha_modificacion', 'fecha_entrega', 'docente__fecha_modificacion'
+    ).first()
+    if tarea is None or (docente_id and tarea['docente_id'] != docente_id):
+        # Que la vista responda 404/403 normalmente
+        return None
+    
+    entregas = Submission.objects.filter(task_id=task_id).aggregate(
+        total=Count('id', distinct=True),
+        total_archivos=Count('archivos'),
+        ultima_subida=Max('archivos__fecha_subida'),
+        ultima_calificacion=Max('fecha_calificacion'),
+        ultimo_estudiante=Max('student__fecha_modificacion'),
+    )
+    
+    etag = build_etag(
+        'task-detail', task_id, docente_id,
+        tarea['fecha_modificacion'].isoformat(),
+        # materia_nombre sale del catálogo: renombrar la materia no toca la tarea
+        materia_catalog.firma if tarea['materia_id'] is not None else None,
+        tarea['docente__fecha_modificacion'].isoformat(),
+        # esta_vencida / puede_recibir_entregas dependen de la hora actual
+        timezone.now() > tarea['fecha_entrega'],
+        entregas['total'], entregas['total_archivos'],
+        entregas['ultima_subida'], entregas['ultima_calificacion'], entregas['ultimo_estudiante'],
+    )
+    last_modified = _ultima_fecha(
+        tarea['fecha_modificacion'], entregas['ultima_subida'], entregas['ultima_calificacion']
+    )
+    return etag, last_modified
+
+
+def my_task_detail_validators(request, task_id):
+    """Entrega del estudiante + su tarea en una sola consulta"""
+    student_id = request.headers.get('X-User-Id') or request.GET.get('student_id')
+    if not student_id:
+        return None
+    
+    entrega = Submission.objects.filter(
+        task_id=task_id,
+        student_id=student_id
+    ).values(
+        'id', 'estado', 'calificacion', 'fecha_calificacion',
+        'task__fecha_modificacion', 'task__fecha_entrega', 'task__docente__fecha_modificacion',
+    ).annotate(
+        total_archivos=Count('archivos'),
+        ultima_subida=Max('archivos__fecha_subida'),
+    ).first()
+    if entrega is None:
+        return None
+    
+    etag = build_etag(
+        'my-task-detail', task_id, student_id,
+        # Las URLs de archivos son absolutas: dependen del host
+        request.get_host(),
+        entrega['id'], entrega['estado'], entrega['calificacion'], entrega['fecha_calificacion'],
+        entrega['task__fecha_modificacion'].isoformat(),
+        entrega['task__docente__fecha_modificacion'].isoformat(),
+        timezone.now() > entrega['task__fecha_entrega'],
+        entrega['total_archivos'], entrega['ultima_subida'],
+    )
+    last_modified = _ultima_fecha(
+        entrega['task__fecha_modificacion'], entrega['fecha_calificacion'], entrega['ultima_subida']
+    )
+    return etag, last_modified
+
+
+def students_list_validators(request):
+    """Conteo y última modificación de los estudiantes activos"""
+    estudiantes = User.objects.filter(rol='estudiante', is_active=True).aggregate(
+        total=Count('id_usuario'),
+        ultima_modificacion=Max('fecha_modificacion'),
+    )
+    etag = build_etag('students', estudiantes['total'], estudiantes['ultima_modificacion'])
+    return etag, estudiantes['ultima_modificacion']
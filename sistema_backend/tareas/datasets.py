@@ -0,0 +1,222 @@
+"""
+Dataset sintético y determinista para benchmarks y pruebas de rendimiento.
+
+Con la misma semilla y la misma escala se generan exactamente las mismas filas
+(ids, inscripciones, estados y calificaciones), así los resultados de
+benchmark_endpoints son comparables entre corridas y contra la línea base.
+
+Estructura:
+- materias propias (BENCH_###) de la carrera ICC, TAREAS_POR_MATERIA tareas cada una
+- un docente por materia
+- estudiantes de ICC inscritos en 1 a MATERIAS_POR_ESTUDIANTE materias
+- tareas activas con entregas para los inscritos (pendiente / entregado /
+  calificado), una cerrada y una en borrador (para task_activate)
+
+Todo se inserta con bulk_create por bloques: no se disparan las señales
+(activación, eventos SSE, invalidación de caches), por eso al final se limpian
+los caches en memoria a mano.
+"""
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from users.cache import user_principals
+from users.catalog import materia_catalog
+from users.models import Materia, MateriaCarrera, User
+from .models import Task, Submission, SubmissionFile
+from .stats import grade_stats
+
+SEMILLA = 2026
+PASSWORD = 'Benchmark123!'
+CARRERA = 'ICC'
+TAREAS_POR_MATERIA = 5
+MATERIAS_POR_ESTUDIANTE = 3
+LOTE = 2000
+
+# Fecha fija: las filas no dependen del día en que se corre el benchmark
+FECHA_BASE = datetime(2026, 1, 12, 23, 59)
+
+
+def id_estudiante(n):
+    return f'B{n:07d}'
+
+
+def id_docente(n):
+    return f'BD{n:04d}'
+
+
+def _lotes(filas, modelo):
+    for inicio in range(0, len(filas), LOTE):
+        modelo.objects.bulk_create(filas[inicio:inicio + LOTE])
+
+
+def crear_dataset(estudiantes, tareas, semilla=SEMILLA):
+    """
+    Crea el dataset en la base de datos actual.
+
+    Returns:
+        dict con los conteos y los ids útiles para armar peticiones:
+        docente_id, materia_id y tarea_id (tarea activa con más entregas),
+        estudiante_id (con una entrega pendiente en esa tarea),
+        tarea_borrador_id, docente_borrador_id, tarea_cerrada_id,
+        entrega_entregada_id, entrega_pendiente_id, materia_ids
+    """
+    rnd = random.Random(semilla)
+    n_materias = max(1, -(-tareas // TAREAS_POR_MATERIA))
+    # Un solo hash para todos: hashear miles de contraseñas dominaría la carga
+    password = make_password(PASSWORD)
+    fecha_base = timezone.make_aware(FECHA_BASE)
+
+    with transaction.atomic():
+        materias = [
+            Materia(
+                codigo=f'BENCH_{i:03d}',
+                nombre=f'Materia de benchmark {i}',
+                nrc=f'9{i:04d}',
+                carreras_permitidas=[CARRERA],
+            )
+            for i in range(n_materias)
+        ]
+        _lotes(materias, Materia)
+        # MySQL no devuelve los ids de bulk_create: releerlos
+        materia_ids = list(
+            Materia.objects.filter(codigo__startswith='BENCH_').order_by('codigo').values_list('id', flat=True)
+        )
+        _lotes([MateriaCarrera(materia_id=m, carrera=CARRERA) for m in materia_ids], MateriaCarrera)
+
+        docentes = [
+            User(
+                id_usuario=id_docente(i),
+                password=password,
+                nombre_completo=f'Docente Benchmark {i}',
+                correo=f'docente{i}@bench.buap.mx',
+                correo_normalizado=f'docente{i}@bench.buap.mx',
+                sexo=User.Sexo.OTRO,
+                carrera=CARRERA,
+                rol=User.Rol.DOCENTE,
+            )
+            for i in range(n_materias)
+        ]
+        _lotes(docentes, User)
+        _lotes([
+            User.materias_docente.through(user_id=id_docente(i), materia_id=materia_id)
+            for i, materia_id in enumerate(materia_ids)
+        ], User.materias_docente.through)
+
+        inscritos = {materia_id: [] for materia_id in materia_ids}
+        alumnos, inscripciones = [], []
+        for n in range(estudiantes):
+            id_usuario = id_estudiante(n)
+            alumnos.append(User(
+                id_usuario=id_usuario,
+                password=password,
+                nombre_completo=f'Estudiante Benchmark {n}',
+                correo=f'e{n}@bench.buap.mx',
+                correo_normalizado=f'e{n}@bench.buap.mx',
+                sexo=rnd.choice(User.Sexo.values),
+                carrera=CARRERA,
+                rol=User.Rol.ESTUDIANTE,
+            ))
+            cuantas = rnd.randint(1, min(MATERIAS_POR_ESTUDIANTE, n_materias))
+            for materia_id in sorted(rnd.sample(materia_ids, cuantas)):
+                inscritos[materia_id].append(id_usuario)
+                inscripciones.append(User.materias_estudiante.through(user_id=id_usuario, materia_id=materia_id))
+            if len(alumnos) >= LOTE:
+                _lotes(alumnos, User)
+                alumnos = []
+        _lotes(alumnos, User)
+        _lotes(inscripciones, User.materias_estudiante.through)
+
+        tareas_creadas = []
+        for t in range(tareas):
+            indice = t % n_materias
+            if t == tareas - 1:
+                estado = 'borrador'
+            elif t == 1:
+                estado = 'cerrada'
+            else:
+                estado = 'activa'
+            tareas_creadas.append(Task(
+                titulo=f'Tarea de benchmark {t}',
+                descripcion=f'Descripción de la tarea {t}',
+                fecha_entrega=fecha_base + timedelta(days=t),
+                docente_id=id_docente(indice),
+                materia_id=materia_ids[indice],
+                estado=estado,
+            ))
+        _lotes(tareas_creadas, Task)
+        tareas_db = list(
+            Task.objects.filter(materia_id__in=materia_ids).order_by('id').values_list('id', 'materia_id', 'estado')
+        )
+
+    total_entregas = total_archivos = 0
+    for task_id, materia_id, estado in tareas_db:
+        if estado == 'borrador':
+            continue
+        with transaction.atomic():
+            entregas = []
+            for student_id in inscritos[materia_id]:
+                sorteo = rnd.random()
+                if sorteo < 0.3:
+                    entregas.append(Submission(task_id=task_id, student_id=student_id))
+                elif sorteo < 0.6:
+                    entregas.append(Submission(task_id=task_id, student_id=student_id, estado='entregado'))
+                else:
+                    entregas.append(Submission(
+                        task_id=task_id, student_id=student_id, estado='calificado',
+                        calificacion=rnd.randint(5, 10), fecha_calificacion=fecha_base,
+                    ))
+            _lotes(entregas, Submission)
+
+            archivos = [
+                SubmissionFile(
+                    submission_id=submission_id,
+                    archivo=f'entregas/benchmark/{submission_id}.pdf',
+                    nombre_original=f'entrega_{submission_id}.pdf',
+                    es_entrega_tardia=submission_id % 7 == 0,
+                )
+                for submission_id in Submission.objects.filter(
+                    task_id=task_id
+                ).exclude(estado='pendiente').order_by('id').values_list('id', flat=True)
+            ]
+            _lotes(archivos, SubmissionFile)
+        total_entregas += len(entregas)
+        total_archivos += len(archivos)
+
+    # bulk_create no dispara las señales que invalidan los caches del proceso
+    materia_catalog.invalidate()
+    user_principals.clear()
+    grade_stats.clear()
+
+    tarea_principal = max(
+        (t for t in tareas_db if t[2] == 'activa'),
+        key=lambda t: len(inscritos[t[1]]),
+        default=tareas_db[0],
+    )
+    entregas_principal = Submission.objects.filter(task_id=tarea_principal[0]).order_by('id')
+    entregada = entregas_principal.filter(estado='entregado').first()
+    pendiente = entregas_principal.filter(estado='pendiente').first()
+    borrador = next(t for t in tareas_db if t[2] == 'borrador')
+    cerrada = next((t for t in tareas_db if t[2] == 'cerrada'), None)
+
+    return {
+        'estudiantes': estudiantes,
+        'docentes': n_materias,
+        'materias': n_materias,
+        'tareas': tareas,
+        'entregas': total_entregas,
+        'archivos': total_archivos,
+        'materia_ids': materia_ids,
+        'docente_id': id_docente(materia_ids.index(tarea_principal[1])),
+        'materia_id': tarea_principal[1],
+        'tarea_id': tarea_principal[0],
+        'tarea_borrador_id': borrador[0],
+        'docente_borrador_id': id_docente(materia_ids.index(borrador[1])),
+        'tarea_cerrada_id': cerrada[0] if cerrada else None,
+        'estudiante_id': pendiente.student_id if pendiente else id_estudiante(0),
+        'entrega_entregada_id': entregada.id if entregada else None,
+        'entrega_pendiente_id': pendiente.id if pendiente else None,
+    }
@@ -0,0 +1,145 @@
+"""
+Eventos en tiempo real (Server-Sent Events) para los dashboards.
+
+Los dashboards recargaban task_submissions/my_tasks completos para enterarse de
+entregas y calificaciones nuevas. Aquí las señales de los modelos publican
+eventos compactos en un broker en memoria y cada cliente conectado a
+/api/events/ los recibe al instante; el frontend solo recarga la sección
+afectada.
+
+Eventos (campo "tipo"):
+- entrega_recibida   → docente de la tarea   {task_id, submission_id, student_id}
+- entrega_calificada → estudiante            {task_id, submission_id, calificacion}
+- tarea_activada     → estudiantes asignados y docente {task_id}
+- tarea_cerrada      → estudiantes asignados y docente {task_id}
+- resync             → se perdieron eventos (buffer lleno): recargar todo
+
+Cada suscripción tiene un buffer acotado (SSE_BUFFER_EVENTOS): si el cliente no
+consume a tiempo se descartan los más viejos y recibe un "resync".
+
+El broker vive en memoria del proceso: un cliente solo recibe los eventos
+generados en el worker que atiende su conexión. Con los 2 workers de
+railway.toml se pierden los eventos de las peticiones que atiende el otro
+worker (en promedio la mitad); el dashboard se pone al día en su siguiente
+recarga. Compartirlos entre procesos requiere un pub/sub externo (p.ej. Redis).
+Bajo WSGI /api/events/ responde 204 y no hay eventos.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+RESYNC = 'resync'
+
+
+class Suscripcion:
+    """Buffer acotado de eventos de un cliente SSE (consumido desde un event loop)"""
+
+    def __init__(self, usuario_id, max_eventos, loop):
+        self.usuario_id = usuario_id
+        self._eventos = deque(maxlen=max_eventos)
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._hay_eventos = asyncio.Event()
+        self._desbordado = False
+
+    def entregar(self, evento):
+        """Agregar un evento (desde cualquier hilo)"""
+        with self._lock:
+            if len(self._eventos) == self._eventos.maxlen:
+                self._desbordado = True
+            self._eventos.append(evento)
+        try:
+            self._loop.call_soon_threadsafe(self._hay_eventos.set)
+        except RuntimeError:
+            # El event loop ya se cerró: la conexión terminó
+            pass
+
+    def tomar(self):
+        """(eventos pendientes, hubo_desborde) y vacía el buffer"""
+        self._hay_eventos.clear()
+        with self._lock:
+            eventos = list(self._eventos)
+            self._eventos.clear()
+            desbordado, self._desbordado = self._desbordado, False
+        return eventos, desbordado
+
+    async def esperar(self, timeout):
+        """Esperar hasta que haya eventos o pase `timeout` segundos"""
+        try:
+            await asyncio.wait_for(self._hay_eventos.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class EventBroker:
+    """Pub/sub en proceso: usuario → suscripciones abiertas"""
+
+    def __init__(self, max_eventos=100, max_conexiones=500):
+        self.max_eventos = max_eventos
+        self.max_conexiones = max_conexiones
+        self._lock = threading.Lock()
+        self._suscripciones = {}
+        self._total = 0
+        self._ids = itertools.count(1)
+        self._metricas = {'publicados': 0, 'entregados': 0, 'rechazadas': 0}
+
+    def suscribir(self, usuario_id):
+        """Nueva suscripción para el event loop actual, o None si se alcanzó el límite"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._total >= self.max_conexiones:
+                self._metricas['rechazadas'] += 1
+                return None
+            suscripcion = Suscripcion(usuario_id, self.max_eventos, loop)
+            self._suscripciones.setdefault(usuario_id, set()).add(suscripcion)
+            self._total += 1
+            return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            abiertas = self._suscripciones.get(suscripcion.usuario_id)
+            if abiertas and suscripcion in abiertas:
+                abiertas.discard(suscripcion)
+                self._total -= 1
+                if not abiertas:
+                    del self._suscripciones[suscripcion.usuario_id]
+
+    def conectados(self):
+        """Usuarios con al menos una conexión abierta"""
+        with self._lock:
+            return set(self._suscripciones)
+
+    def publicar(self, usuario_ids, tipo, **datos):
+        """Enviar un evento a las conexiones abiertas de `usuario_ids`"""
+        evento = {'id': next(self._ids), 'tipo': tipo, **datos, 'ts': int(time.time())}
+        with self._lock:
+            destinos = [
+                suscripcion
+                for usuario_id in set(usuario_ids)
+                for suscripcion in self._suscripciones.get(usuario_id, ())
+            ]
+            self._metricas['publicados'] += 1
+            self._metricas['entregados'] += len(destinos)
+        for suscripcion in destinos:
+            suscripcion.entregar(evento)
+        return len(destinos)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'conexiones': self._total,
+                'usuarios': len(self._suscripciones),
+                'max_conexiones': self.max_conexiones,
+                'buffer_eventos': self.max_eventos,
+                **self._metricas,
+            }
+
+
+event_broker = EventBroker(
+    max_eventos=getattr(settings, 'SSE_BUFFER_EVENTOS', 100),
+    max_conexiones=getattr(settings, 'SSE_MAX_CONEXIONES', 500),
+)
@@ -0,0 +1,92 @@
+"""
+Exportación del reporte de calificaciones a CSV y XLSX.
+
+Ambos formatos se alimentan de la matriz por conjuntos (tareas/reports.py) y
+escriben las filas conforme se generan: el CSV se envía en streaming y el XLSX
+se arma con openpyxl en modo write-only (las filas van a un archivo temporal,
+no a memoria) y se envía por bloques con FileResponse.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+from .reports import iter_grade_matrix
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: retorna la línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def _filas_exportacion(tareas):
+    """Encabezado, una fila por estudiante y fila final con promedios por tarea"""
+    encabezado = ['Matrícula', 'Nombre', 'Correo', 'Carrera']
+    for tarea in tareas:
+        encabezado += [tarea['titulo'], f"{tarea['titulo']} (tardía)"]
+    encabezado.append('Promedio')
+    yield encabezado
+
+    sumas = [0] * len(tareas)
+    conteos = [0] * len(tareas)
+    tardias = [0] * len(tareas)
+
+    for estudiante, celdas, promedio in iter_grade_matrix(tareas):
+        fila = [
+            estudiante['id_usuario'],
+            estudiante['nombre_completo'],
+            estudiante['correo'],
+            estudiante['carrera'],
+        ]
+        for i, (estado, calificacion, es_tardia) in enumerate(celdas):
+            fila += [calificacion if calificacion else '', 'Sí' if es_tardia else '']
+            if calificacion:
+                sumas[i] += calificacion
+                conteos[i] += 1
+            if es_tardia:
+                tardias[i] += 1
+        fila.append(promedio if promedio is not None else '')
+        yield fila
+
+    pie = ['', 'Promedio por tarea', '', '']
+    for suma, conteo, tardia in zip(sumas, conteos, tardias):
+        pie += [round(suma / conteo, 2) if conteo else '', tardia]
+    pie.append('')
+    yield pie
+
+
+def csv_response(tareas, nombre_archivo):
+    """CSV en streaming (UTF-8 con BOM para que Excel respete los acentos)"""
+    writer = csv.writer(_Echo())
+
+    def generar():
+        yield '\ufeff'  # BOM
+        for fila in _filas_exportacion(tareas):
+            yield writer.writerow(fila)
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    return response
+
+
+def xlsx_response(tareas, nombre_archivo):
+    """XLSX escrito en modo write-only y enviado por bloques desde un archivo temporal"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    hoja = workbook.create_sheet('Calificaciones')
+    for fila in _filas_exportacion(tareas):
+        hoja.append(fila)
+
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
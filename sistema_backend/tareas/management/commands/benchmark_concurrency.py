@@ -0,0 +1,233 @@
+"""
+Comando para comparar el rendimiento con peticiones concurrentes bajo WSGI
+(gunicorn con hilos) y ASGI (uvicorn) en el mismo equipo y con la misma base.
+
+Levanta cada servidor como subproceso en un puerto local, lanza N peticiones
+con C conexiones simultáneas contra los endpoints async (my_tasks y
+task_submissions por defecto) y reporta peticiones/s y latencias p50/p95/p99.
+
+Uso:
+    python manage.py benchmark_concurrency
+    python manage.py benchmark_concurrency --concurrencia 100 --peticiones 2000
+    python manage.py benchmark_concurrency --servidor asgi --ruta /api/my-tasks/ --usuario 202612345
+    python manage.py benchmark_concurrency --salida resultados.json
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from tareas.models import Task, Submission
+
+SERVIDORES = {
+    'wsgi': ('gunicorn', 'gunicorn config.wsgi:application'),
+    'asgi': ('uvicorn', 'uvicorn config.asgi:application'),
+}
+
+# Segundos máximos para que el servidor empiece a aceptar conexiones
+ESPERA_ARRANQUE = 30
+
+
+def _comando_servidor(servidor, puerto, workers, threads):
+    if servidor == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+            '--bind', f'127.0.0.1:{puerto}', '--workers', str(workers), '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+        '--host', '127.0.0.1', '--port', str(puerto), '--workers', str(workers),
+        '--log-level', 'warning', '--no-access-log',
+    ]
+
+
+def _esperar_puerto(puerto, proceso):
+    limite = time.monotonic() + ESPERA_ARRANQUE
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+async def _get(puerto, ruta, cabeceras):
+    """GET HTTP/1.1 mínimo (una conexión por petición). Retorna el código de estado."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+    try:
+        lineas = [f'GET {ruta} HTTP/1.1', f'Host: 127.0.0.1:{puerto}', 'Connection: close']
+        lineas += [f'{nombre}: {valor}' for nombre, valor in cabeceras.items()]
+        writer.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        estado = await reader.readline()
+        while await reader.read(65536):
+            pass
+        return int(estado.split()[1])
+    finally:
+        writer.close()
+
+
+async def _carga(puerto, ruta, cabeceras, peticiones, concurrencia):
+    """Latencias (segundos) de las peticiones exitosas, errores y duración total"""
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    errores = 0
+
+    async def _una():
+        nonlocal errores
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                codigo = await _get(puerto, ruta, cabeceras)
+            except OSError:
+                codigo = None
+            if codigo == 200:
+                latencias.append(time.perf_counter() - inicio)
+            else:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_una() for _ in range(peticiones)))
+    return latencias, errores, time.perf_counter() - inicio
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Compara peticiones/s y latencia con concurrencia bajo WSGI (gunicorn) y ASGI (uvicorn)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servidor',
+            choices=['ambos', 'wsgi', 'asgi'],
+            default='ambos',
+        )
+        parser.add_argument(
+            '--ruta',
+            action='append',
+            help='Endpoint GET a medir (repetible). Por defecto my-tasks y task_submissions',
+        )
+        parser.add_argument(
+            '--usuario',
+            help='X-User-Id para las peticiones (por defecto el estudiante con más entregas)',
+        )
+        parser.add_argument('--concurrencia', type=int, default=50, help='Conexiones simultáneas')
+        parser.add_argument('--peticiones', type=int, default=1000, help='Peticiones por endpoint')
+        parser.add_argument('--workers', type=int, default=2, help='Procesos del servidor (igual en ambos)')
+        parser.add_argument('--threads', type=int, default=4, help='Hilos por worker de gunicorn (WSGI)')
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        rutas, usuario = self._rutas(options)
+        cabeceras = {'X-User-Id': usuario} if usuario else {}
+        servidores = ['wsgi', 'asgi'] if options['servidor'] == 'ambos' else [options['servidor']]
+
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('⏱️  BENCHMARK DE CONCURRENCIA (WSGI vs ASGI)'))
+        self.stdout.write(self.style.NOTICE(
+            f"   {options['peticiones']} peticiones por endpoint | concurrencia {options['concurrencia']} | "
+            f"{options['workers']} workers"
+        ))
+        self.stdout.write(self.style.NOTICE('='*60))
+
+        resultados = {}
+        for i, servidor in enumerate(servidores):
+            modulo, descripcion = SERVIDORES[servidor]
+            if importlib.util.find_spec(modulo) is None:
+                self.stdout.write(self.style.WARNING(f'\n⚠️  {modulo} no está instalado: se omite {servidor.upper()}'))
+                continue
+
+            puerto = options['puerto'] + i
+            self.stdout.write(f'\n🚀 {servidor.upper()}: {descripcion} (puerto {puerto})')
+            resultados[servidor] = self._medir_servidor(servidor, puerto, rutas, cabeceras, options)
+
+        if not resultados:
+            raise CommandError('No hay servidores disponibles (instala gunicorn y/o uvicorn)')
+
+        if len(resultados) == 2:
+            self.stdout.write(self.style.NOTICE('\n' + '='*60))
+            for ruta in rutas:
+                wsgi, asgi = resultados['wsgi'].get(ruta), resultados['asgi'].get(ruta)
+                if wsgi and asgi and wsgi['peticiones_por_segundo']:
+                    self.stdout.write(
+                        f"📊 {ruta}: ASGI {asgi['peticiones_por_segundo'] / wsgi['peticiones_por_segundo']:.2f}x "
+                        f"el throughput de WSGI"
+                    )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump({'opciones': {k: options[k] for k in ('concurrencia', 'peticiones', 'workers', 'threads')},
+                           'resultados': resultados}, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Resultados guardados en {options['salida']}"))
+
+    def _rutas(self, options):
+        usuario = options['usuario']
+        if options['ruta']:
+            return options['ruta'], usuario
+
+        estudiante = (
+            Submission.objects.values('student_id').annotate(n=Count('id')).order_by('-n').first()
+        )
+        tarea = Task.objects.annotate(n=Count('submissions')).order_by('-n').first()
+        if estudiante is None or tarea is None:
+            raise CommandError('No hay entregas en la base de datos: indica --ruta (y --usuario)')
+        return ['/api/my-tasks/', f'/api/tasks/{tarea.id}/submissions/'], usuario or estudiante['student_id']
+
+    def _medir_servidor(self, servidor, puerto, rutas, cabeceras, options):
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        proceso = subprocess.Popen(
+            _comando_servidor(servidor, puerto, options['workers'], options['threads']),
+            cwd=settings.BASE_DIR, env=entorno,
+        )
+        try:
+            if not _esperar_puerto(puerto, proceso):
+                raise CommandError(f'{servidor.upper()} no arrancó en el puerto {puerto}')
+
+            resultados = {}
+            for ruta in rutas:
+                # Calentamiento: conexiones a la BD, caché de principales, catálogo
+                asyncio.run(_carga(puerto, ruta, cabeceras, options['workers'] * 10, options['workers']))
+                latencias, errores, duracion = asyncio.run(
+                    _carga(puerto, ruta, cabeceras, options['peticiones'], options['concurrencia'])
+                )
+                resultado = {
+                    'peticiones_por_segundo': round(len(latencias) / duracion, 1) if duracion else 0,
+                    'p50_ms': self._ms(_percentil(latencias, 50)),
+                    'p95_ms': self._ms(_percentil(latencias, 95)),
+                    'p99_ms': self._ms(_percentil(latencias, 99)),
+                    'errores': errores,
+                }
+                resultados[ruta] = resultado
+                self.stdout.write(
+                    f"   {ruta}: {resultado['peticiones_por_segundo']} req/s | p50 {resultado['p50_ms']} ms | "
+                    f"p95 {resultado['p95_ms']} ms | p99 {resultado['p99_ms']} ms | errores {errores}"
+                )
+            return resultados
+        finally:
+            proceso.terminate()
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+    @staticmethod
+    def _ms(segundos):
+        return round(segundos * 1000, 2) if segundos is not None else None
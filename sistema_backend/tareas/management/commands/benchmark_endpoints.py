@@ -0,0 +1,426 @@
+"""
+Comando para medir todos los endpoints de tareas/urls.py y users/urls.py con
+un dataset sintético y determinista (tareas/datasets.py) a varias escalas.
+
+Por cada escala crea una base de datos de prueba desde la configurada en
+settings (SQLite en memoria o test_<nombre> en MySQL; la base real no se toca),
+genera el dataset y pasa cada endpoint por el cliente de pruebas de Django:
+
+- tiempo: mejor y mediana de --repeticiones corridas (después de un
+  calentamiento, con los caches del proceso ya llenos); las regresiones se
+  evalúan con el mejor tiempo, que es el menos ruidoso
+- consultas SQL y pico de memoria (tracemalloc) en una corrida aparte, para
+  que la instrumentación no infle los tiempos
+
+Las peticiones que escriben se ejecutan dentro de una transacción que se
+revierte, así todas las corridas ven el mismo dataset. Los emails se apagan
+(EMAIL_ENABLED=False) y los endpoints que solo prueban servicios externos
+(test-smtp, test-reminders) se omiten salvo con --incluir-externos.
+
+Con --baseline compara contra resultados guardados y termina con error si algún
+endpoint supera los umbrales (tiempo, consultas o memoria).
+
+Uso:
+    python manage.py benchmark_endpoints
+    python manage.py benchmark_endpoints --escala 100x10 --escala 10000x200 --salida resultados.json
+    python manage.py benchmark_endpoints --baseline benchmarks/baseline.json
+    python manage.py benchmark_endpoints --escala 50000x200 --baseline benchmarks/baseline.json --actualizar-baseline
+"""
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from config.query_budgets import es_consulta
+from tareas import urls as tareas_urls
+from tareas.datasets import PASSWORD, SEMILLA, crear_dataset, id_estudiante
+from tareas.snapshots import escribir_snapshot
+from users import urls as users_urls
+from users.models import RecoveryCode, User
+
+ESCALA_DEFAULT = '100x10'
+
+# Endpoints que solo llaman a servicios externos (Brevo)
+EXTERNOS = {'test-reminders', 'test-smtp'}
+
+# Código del RecoveryCode que se crea para verify/reset
+CODIGO_RECUPERACION = '424242'
+
+# Inscripciones enviadas a bulk-update-materias
+INSCRIPCIONES_BULK = 100
+
+# Diferencias absolutas por debajo de las cuales no se reporta regresión (ruido)
+MARGEN_MS = 5.0
+MARGEN_KB = 64
+
+
+def parse_escala(texto):
+    """'10000x200' → (10000, 200)"""
+    try:
+        estudiantes, tareas = (int(parte) for parte in texto.lower().split('x'))
+    except ValueError:
+        raise CommandError(f'Escala inválida: {texto} (formato ESTUDIANTESxTAREAS, p. ej. 10000x200)')
+    if estudiantes < 1 or tareas < 2:
+        raise CommandError(f'Escala inválida: {texto} (mínimo 1 estudiante y 2 tareas)')
+    return estudiantes, tareas
+
+
+def rutas_nombradas():
+    """Nombres de las rutas de tareas/urls.py y users/urls.py"""
+    return {
+        patron.name
+        for patron in tareas_urls.urlpatterns + users_urls.urlpatterns
+        if patron.name
+    }
+
+
+def _json(client, metodo, ruta, datos, usuario=None):
+    return getattr(client, metodo)(
+        ruta, data=json.dumps(datos), content_type='application/json',
+        headers={'X-User-Id': usuario} if usuario else None,
+    )
+
+
+def casos_endpoints(d):
+    """
+    Peticiones a medir con el dataset `d` (ver crear_dataset).
+
+    Returns:
+        [(nombre, url_name, estado_esperado, peticion(client) → response), ...]
+    """
+    docente, estudiante = d['docente_id'], d['estudiante_id']
+    docente_h, estudiante_h = {'X-User-Id': docente}, {'X-User-Id': estudiante}
+    tarea, borrador = d['tarea_id'], d['tarea_borrador_id']
+    correo = User.objects.values_list('correo', flat=True).get(id_usuario=estudiante)
+
+    def url(nombre, **kwargs):
+        return reverse(nombre, kwargs=kwargs or None)
+
+    def _archivo():
+        return SimpleUploadedFile('entrega.pdf', b'%PDF-1.4 benchmark\n' * 64, content_type='application/pdf')
+
+    inscripciones = [
+        {'id_usuario': id_estudiante(n), 'materias': d['materia_ids'][:1]}
+        for n in range(min(INSCRIPCIONES_BULK, d['estudiantes']))
+    ]
+
+    return [
+        # ── Docente ──
+        ('task-list GET', 'task-list-create', 200,
+         lambda c: c.get(url('task-list-create'), headers=docente_h)),
+        ('task-list POST', 'task-list-create', 201,
+         lambda c: _json(c, 'post', url('task-list-create'), {
+             'titulo': 'Tarea nueva de benchmark',
+             'descripcion': 'Creada por benchmark_endpoints',
+             'fecha_entrega': '2026-12-01T23:59:00Z',
+             'materia': d['materia_id'],
+         }, docente)),
+        ('task-detail GET', 'task-detail', 200,
+         lambda c: c.get(url('task-detail', task_id=tarea), headers=docente_h)),
+        ('task-detail PUT', 'task-detail', 200,
+         lambda c: _json(c, 'put', url('task-detail', task_id=tarea), {'descripcion': 'Editada'}, docente)),
+        ('task-detail DELETE', 'task-detail', 200,
+         lambda c: c.delete(url('task-detail', task_id=borrador), headers={'X-User-Id': d['docente_borrador_id']})),
+        ('task-activate', 'task-activate', 200,
+         lambda c: c.post(url('task-activate', task_id=borrador), headers={'X-User-Id': d['docente_borrador_id']})),
+        ('task-close', 'task-close', 200,
+         lambda c: c.post(url('task-close', task_id=tarea), headers=docente_h)),
+        ('task-submissions', 'task-submissions', 200,
+         lambda c: c.get(url('task-submissions', task_id=tarea), headers=docente_h)),
+        ('grade-submission', 'grade-submission', 200,
+         lambda c: _json(c, 'post', url('grade-submission', submission_id=d['entrega_entregada_id']),
+                         {'calificacion': 9, 'comentario_docente': 'Buen trabajo'}, docente)),
+        ('grades-report', 'grades-report', 200,
+         lambda c: c.get(url('grades-report'), headers=docente_h)),
+        ('grades-stats', 'grades-stats', 200,
+         lambda c: c.get(url('grades-stats'), headers=docente_h)),
+        ('grades-export csv', 'grades-export', 200,
+         lambda c: c.get(url('grades-export'), {'format': 'csv'}, headers=docente_h)),
+        ('gradebook-analytics', 'gradebook-analytics', 200,
+         lambda c: c.get(url('gradebook-analytics'), {'agrupar': 'docente'})),
+        ('students-list', 'students-list', 200,
+         lambda c: c.get(url('students-list'), headers=docente_h)),
+        # ── Estudiante ──
+        ('my-tasks', 'my-tasks', 200,
+         lambda c: c.get(url('my-tasks'), headers=estudiante_h)),
+        ('my-task-detail', 'my-task-detail', 200,
+         lambda c: c.get(url('my-task-detail', task_id=tarea), headers=estudiante_h)),
+        ('submit-task', 'submit-task', 200,
+         lambda c: c.post(url('submit-task', task_id=tarea), {'archivos': [_archivo()]}, headers=estudiante_h)),
+        ('my-submissions', 'my-submissions', 200,
+         lambda c: c.get(url('my-submissions'), headers=estudiante_h)),
+        ('events-stream', 'events-stream', 204,
+         lambda c: c.get(url('events-stream'), {'user_id': estudiante, 'rol': 'estudiante'})),
+        # ── Usuarios ──
+        ('login', 'login', 200,
+         lambda c: _json(c, 'post', url('login'), {'id_usuario': estudiante, 'password': PASSWORD})),
+        ('register', 'register', 201,
+         lambda c: _json(c, 'post', url('register'), {
+             'id_usuario': 'BNUEVO01',
+             'password': PASSWORD,
+             'nombre_completo': 'Alumno Nuevo',
+             'correo': 'nuevo@bench.buap.mx',
+             'sexo': User.Sexo.OTRO,
+             'carrera': 'ICC',
+             'rol': User.Rol.ESTUDIANTE,
+             'materias': d['materia_ids'][:1],
+         })),
+        ('forgot-password', 'forgot-password', 200,
+         lambda c: _json(c, 'post', url('forgot-password'), {'correo': correo})),
+        ('verify-recovery-code', 'verify-recovery-code', 200,
+         lambda c: _json(c, 'post', url('verify-recovery-code'), {'correo': correo, 'code': CODIGO_RECUPERACION})),
+        ('reset-password', 'reset-password', 200,
+         lambda c: _json(c, 'post', url('reset-password'), {
+             'correo': correo, 'code': CODIGO_RECUPERACION, 'new_password': 'Nueva123!'
+         })),
+        ('get-users', 'get-users', 200,
+         lambda c: c.get(url('get-users'))),
+        ('update-materias', 'update-materias', 200,
+         lambda c: _json(c, 'patch', url('update-materias'), {
+             'id_usuario': estudiante, 'materias': d['materia_ids'][:2]
+         })),
+        ('bulk-update-materias', 'bulk-update-materias', 200,
+         lambda c: _json(c, 'post', url('bulk-update-materias'), {'inscripciones': inscripciones})),
+        ('get-materias', 'get-materias', 200,
+         lambda c: c.get(url('get-materias'), {'carrera': 'ICC'})),
+        ('hash-pool-stats', 'hash-pool-stats', 200,
+         lambda c: c.get(url('hash-pool-stats'))),
+        ('rate-limit-stats', 'rate-limit-stats', 200,
+         lambda c: c.get(url('rate-limit-stats'))),
+        ('email-queue-stats', 'email-queue-stats', 200,
+         lambda c: c.get(url('email-queue-stats'))),
+        # ── Servicios externos (--incluir-externos) ──
+        ('test-smtp', 'test-smtp', 200,
+         lambda c: c.get(url('test-smtp'))),
+        ('test-reminders', 'test-reminders', 200,
+         lambda c: _json(c, 'post', url('test-reminders'), {'correo': correo})),
+    ]
+
+
+def _consumir(response):
+    """Leer el cuerpo completo (también de las respuestas en streaming)"""
+    if response.streaming:
+        return sum(len(parte) for parte in response.streaming_content)
+    return len(response.content)
+
+
+def comparar(resultados, baseline, umbral_tiempo, umbral_memoria, umbral_consultas):
+    """Regresiones de `resultados` contra `baseline` (mismo formato JSON)"""
+    regresiones = []
+    for escala, actual in resultados['escalas'].items():
+        base = baseline.get('escalas', {}).get(escala)
+        if not base:
+            continue
+        for nombre, r in actual['casos'].items():
+            b = base['casos'].get(nombre)
+            if not b:
+                continue
+            if r['consultas'] > b['consultas'] + umbral_consultas:
+                regresiones.append(f"{escala} {nombre}: consultas {b['consultas']} → {r['consultas']}")
+            # El mejor tiempo es el más estable entre corridas (como benchmark_projections)
+            if r['min_ms'] > b['min_ms'] * (1 + umbral_tiempo) and r['min_ms'] - b['min_ms'] > MARGEN_MS:
+                regresiones.append(f"{escala} {nombre}: tiempo {b['min_ms']} ms → {r['min_ms']} ms")
+            if (r['memoria_pico_kb'] > b['memoria_pico_kb'] * (1 + umbral_memoria)
+                    and r['memoria_pico_kb'] - b['memoria_pico_kb'] > MARGEN_KB):
+                regresiones.append(
+                    f"{escala} {nombre}: memoria {b['memoria_pico_kb']} KB → {r['memoria_pico_kb']} KB"
+                )
+    return regresiones
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo, consultas y memoria de todos los endpoints con un dataset sintético a varias escalas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala',
+            action='append',
+            help=f'ESTUDIANTESxTAREAS (repetible). Por defecto {ESCALA_DEFAULT}',
+        )
+        parser.add_argument('--repeticiones', type=int, default=10, help='Corridas medidas por endpoint')
+        parser.add_argument('--semilla', type=int, default=SEMILLA, help='Semilla del dataset')
+        parser.add_argument('--solo', action='append', help='Medir solo estos casos (nombre, repetible)')
+        parser.add_argument(
+            '--incluir-externos',
+            action='store_true',
+            help='Medir también test-smtp y test-reminders (llaman a Brevo)',
+        )
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--baseline', help='Resultados JSON de referencia para detectar regresiones')
+        parser.add_argument(
+            '--actualizar-baseline',
+            action='store_true',
+            help='Guardar los resultados como nueva línea base (en la ruta de --baseline)',
+        )
+        parser.add_argument('--umbral-tiempo', type=float, default=0.5, help='Aumento relativo permitido (0.5 = 50%%)')
+        parser.add_argument('--umbral-memoria', type=float, default=0.25, help='Aumento relativo permitido del pico')
+        parser.add_argument('--umbral-consultas', type=int, default=0, help='Consultas extra permitidas')
+
+    def handle(self, *args, **options):
+        if options['actualizar_baseline'] and not options['baseline']:
+            raise CommandError('--actualizar-baseline requiere --baseline')
+        escalas = [parse_escala(e) for e in options['escala'] or [ESCALA_DEFAULT]]
+
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('⏱️  BENCHMARK DE ENDPOINTS'))
+        self.stdout.write(self.style.NOTICE(
+            f"   Escalas: {', '.join(f'{e}x{t}' for e, t in escalas)} | {options['repeticiones']} repeticiones | "
+            f"base {connection.vendor}"
+        ))
+        self.stdout.write(self.style.NOTICE('='*60))
+
+        resultados = {
+            'generado': timezone.now().isoformat(),
+            'entorno': {
+                'base': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'opciones': {k: options[k] for k in ('repeticiones', 'semilla')},
+            'escalas': {},
+        }
+
+        setup_test_environment()
+        try:
+            for estudiantes, tareas in escalas:
+                escala = f'{estudiantes}x{tareas}'
+                resultados['escalas'][escala] = self._medir_escala(estudiantes, tareas, options)
+        finally:
+            teardown_test_environment()
+
+        if options['salida']:
+            self._guardar(options['salida'], resultados)
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Resultados guardados en {options['salida']}"))
+
+        if options['baseline']:
+            if options['actualizar_baseline']:
+                self._guardar(options['baseline'], resultados)
+                self.stdout.write(self.style.SUCCESS(f"✅ Línea base actualizada: {options['baseline']}"))
+            else:
+                self._comparar(options, resultados)
+
+    def _medir_escala(self, estudiantes, tareas, options):
+        escala = f'{estudiantes}x{tareas}'
+        self.stdout.write(f'\n📦 Escala {escala}: creando base de prueba y dataset...')
+        bases = setup_databases(verbosity=0, interactive=False)
+        try:
+            with tempfile.TemporaryDirectory() as media, tempfile.TemporaryDirectory() as snapshots, \
+                    override_settings(EMAIL_ENABLED=False, RATE_LIMIT_ENABLED=False,
+                                      MEDIA_ROOT=media, GRADEBOOK_SNAPSHOT_DIR=snapshots):
+                inicio = time.perf_counter()
+                d = crear_dataset(estudiantes, tareas, semilla=options['semilla'])
+                escribir_snapshot()
+                RecoveryCode.objects.create(
+                    user_id=d['estudiante_id'],
+                    code=CODIGO_RECUPERACION,
+                    expires_at=timezone.now() + timedelta(days=1),
+                )
+                self.stdout.write(
+                    f"   {d['estudiantes']} estudiantes | {d['tareas']} tareas | {d['entregas']} entregas | "
+                    f"{d['archivos']} archivos ({time.perf_counter() - inicio:.1f}s)"
+                )
+
+                casos = casos_endpoints(d)
+                faltantes = sorted(rutas_nombradas() - {url_name for _, url_name, _, _ in casos})
+                if faltantes:
+                    self.stdout.write(self.style.WARNING(f"   ⚠️  Rutas sin caso de benchmark: {', '.join(faltantes)}"))
+
+                client = Client()
+                medidos = {}
+                for nombre, url_name, esperado, peticion in casos:
+                    if url_name in EXTERNOS and not options['incluir_externos']:
+                        continue
+                    if options['solo'] and nombre not in options['solo']:
+                        continue
+                    medidos[nombre] = resultado = self._medir_caso(client, peticion, options['repeticiones'])
+                    linea = (
+                        f"   {nombre:<24} {resultado['estado']} | {resultado['min_ms']:>9.2f} ms | "
+                        f"{resultado['consultas']:>4} consultas | {resultado['memoria_pico_kb']:>9.1f} KB"
+                    )
+                    if resultado['estado'] != esperado:
+                        self.stdout.write(self.style.WARNING(f'{linea}  ⚠️  se esperaba {esperado}'))
+                    else:
+                        self.stdout.write(linea)
+
+                dataset = {k: d[k] for k in ('estudiantes', 'docentes', 'materias', 'tareas', 'entregas', 'archivos')}
+                return {'dataset': dataset, 'rutas_sin_caso': faltantes, 'casos': medidos}
+        finally:
+            teardown_databases(bases, verbosity=0)
+
+    @staticmethod
+    def _ejecutar(client, peticion):
+        """Una petición dentro de una transacción que se revierte: el dataset no cambia"""
+        with transaction.atomic():
+            response = peticion(client)
+            tamano = _consumir(response)
+            transaction.set_rollback(True)
+        return response.status_code, tamano
+
+    def _medir_caso(self, client, peticion, repeticiones):
+        # Calentamiento: conexiones, caches del proceso, imports perezosos
+        self._ejecutar(client, peticion)
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            self._ejecutar(client, peticion)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        # Corrida instrumentada (consultas + memoria) aparte de las medidas
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as consultas:
+                estado, tamano = self._ejecutar(client, peticion)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'estado': estado,
+            'mediana_ms': round(statistics.median(tiempos), 2),
+            'min_ms': round(min(tiempos), 2),
+            'consultas': sum(1 for q in consultas.captured_queries if es_consulta(q['sql'])),
+            'memoria_pico_kb': round(pico / 1024, 1),
+            'bytes': tamano,
+        }
+
+    def _comparar(self, options, resultados):
+        try:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            raise CommandError(f"No se encontró la línea base {options['baseline']} (usa --actualizar-baseline)")
+
+        regresiones = comparar(
+            resultados, baseline, options['umbral_tiempo'], options['umbral_memoria'], options['umbral_consultas']
+        )
+        self.stdout.write(self.style.NOTICE('\n' + '='*60))
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f'❌ {regresion}'))
+            raise CommandError(f'{len(regresiones)} regresiones contra {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f"✅ Sin regresiones contra {options['baseline']}"))
+
+    @staticmethod
+    def _guardar(ruta, resultados):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,102 @@
+"""
+Comando para comparar el renderer JSON estándar de DRF contra el renderer
+rápido del proyecto (config/renderers.py) usando payloads reales de la base.
+
+Uso:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --task-id 12 --docente-id D001 --repeticiones 50
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer, orjson
+from tareas.models import Task
+from tareas.reports import tareas_reporte, iter_report_rows
+from tareas.serializers import SubmissionListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compara el tiempo de renderizado JSON (stdlib vs rápido) con payloads reales'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--task-id',
+            type=int,
+            help='Tarea para el payload de task_submissions (por defecto la de más entregas)',
+        )
+        parser.add_argument(
+            '--docente-id',
+            help='Docente para el payload de grades_report (por defecto el de la tarea elegida)',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=20,
+            help='Número de veces que se renderiza cada payload',
+        )
+    
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        
+        if options['task_id']:
+            tarea = Task.objects.filter(id=options['task_id']).first()
+        else:
+            tarea = Task.objects.annotate(n=Count('submissions')).order_by('-n').first()
+        if tarea is None:
+            raise CommandError('No hay tareas en la base de datos para construir los payloads')
+        
+        docente_id = options['docente_id'] or tarea.docente_id
+        
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('⏱️  BENCHMARK DE RENDERIZADO JSON'))
+        self.stdout.write(self.style.NOTICE(f'   Encoder rápido: {"orjson " + orjson.__version__ if orjson else "no instalado (usa json estándar)"}'))
+        self.stdout.write(self.style.NOTICE('='*60))
+        
+        submissions = tarea.submissions.all().select_related('student').prefetch_related('archivos')
+        tareas = tareas_reporte(docente_id)
+        payloads = {
+            f'task_submissions (tarea {tarea.id})': {
+                'success': True,
+                'tarea': tarea.titulo,
+                'submissions': SubmissionListSerializer(submissions, many=True).data,
+            },
+            f'grades_report (docente {docente_id})': {
+                'success': True,
+                'tareas_headers': [{'id': t['id'], 'titulo': t['titulo']} for t in tareas],
+                'reporte': list(iter_report_rows(tareas)),
+            },
+        }
+        
+        estandar = JSONRenderer()
+        rapido = FastJSONRenderer()
+        
+        for nombre, payload in payloads.items():
+            salida_estandar = estandar.render(payload)
+            salida_rapida = rapido.render(payload)
+            
+            t_estandar = self._medir(estandar, payload, repeticiones)
+            t_rapido = self._medir(rapido, payload, repeticiones)
+            
+            self.stdout.write(f'\n📦 {nombre}: {len(salida_estandar) / 1024:.1f} KB')
+            self.stdout.write(f'   json estándar: {t_estandar * 1000:.2f} ms')
+            self.stdout.write(f'   renderer rápido: {t_rapido * 1000:.2f} ms')
+            self.stdout.write(f'   Aceleración: {t_estandar / t_rapido:.1f}x' if t_rapido else '   Aceleración: n/a')
+            
+            if salida_estandar == salida_rapida:
+                self.stdout.write(self.style.SUCCESS('   ✅ Salida idéntica'))
+            else:
+                self.stdout.write(self.style.WARNING('   ⚠️  Las salidas difieren'))
+    
+    @staticmethod
+    def _medir(renderer, payload, repeticiones):
+        """Mejor tiempo (segundos) de `repeticiones` renderizados"""
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            renderer.render(payload)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None or duracion < mejor else mejor
+        return mejor
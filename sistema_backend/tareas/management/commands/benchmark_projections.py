@@ -0,0 +1,89 @@
+"""
+Comando para medir el costo por fila de los serializers de DRF contra la ruta
+de lectura por proyecciones (tareas/projections.py).
+
+Uso:
+    python manage.py benchmark_projections
+    python manage.py benchmark_projections --task-id 12 --repeticiones 10
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from users.models import User
+from tareas.models import Task
+from tareas.projections import task_submissions_rows, students_rows
+from tareas.serializers import SubmissionListSerializer, StudentBasicSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo por fila de serializers vs proyecciones en task_submissions y students_list'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--task-id',
+            type=int,
+            help='Tarea a medir (por defecto la de más entregas)',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=5,
+            help='Número de corridas por variante (se reporta la mejor)',
+        )
+    
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        
+        if options['task_id']:
+            tarea = Task.objects.filter(id=options['task_id']).first()
+        else:
+            tarea = Task.objects.annotate(n=Count('submissions')).order_by('-n').first()
+        if tarea is None:
+            raise CommandError('No hay tareas en la base de datos')
+        
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('⏱️  BENCHMARK SERIALIZERS vs PROYECCIONES'))
+        self.stdout.write(self.style.NOTICE('='*60))
+        
+        casos = {
+            f'task_submissions (tarea {tarea.id})': (
+                lambda: SubmissionListSerializer(
+                    tarea.submissions.all().select_related('student').prefetch_related('archivos'),
+                    many=True
+                ).data,
+                lambda: task_submissions_rows(tarea.id),
+            ),
+            'students_list': (
+                lambda: StudentBasicSerializer(
+                    User.objects.filter(rol='estudiante', is_active=True), many=True
+                ).data,
+                lambda: list(students_rows()),
+            ),
+        }
+        
+        for nombre, (serializer, proyeccion) in casos.items():
+            filas = len(proyeccion())
+            if not filas:
+                self.stdout.write(self.style.WARNING(f'\n📦 {nombre}: sin filas, se omite'))
+                continue
+            
+            t_serializer = self._medir(serializer, repeticiones)
+            t_proyeccion = self._medir(proyeccion, repeticiones)
+            
+            self.stdout.write(f'\n📦 {nombre}: {filas} filas')
+            self.stdout.write(f'   Serializer: {t_serializer * 1000:.1f} ms ({t_serializer / filas * 1e6:.1f} µs/fila)')
+            self.stdout.write(f'   Proyección: {t_proyeccion * 1000:.1f} ms ({t_proyeccion / filas * 1e6:.1f} µs/fila)')
+            self.stdout.write(self.style.SUCCESS(f'   Aceleración: {t_serializer / t_proyeccion:.1f}x'))
+    
+    @staticmethod
+    def _medir(funcion, repeticiones):
+        """Mejor tiempo (segundos) de `repeticiones` corridas, incluyendo las consultas"""
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None or duracion < mejor else mejor
+        return mejor
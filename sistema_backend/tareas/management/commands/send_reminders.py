@@ -16,12 +16,18 @@ Para programar en Windows Task Scheduler:
        - Programa: C:\\Users\\jovas\\Music\\practica_scrum\\sistema_backend\\venv\\Scripts\\python.exe
        - Argumentos: manage.py send_reminders
        - Iniciar en: C:\\Users\\jovas\\Music\\practica_scrum\\sistema_backend
+
+La duración de cada corrida se registra en sistema_reminders_run_duration_seconds
+(config/metrics.py).
 """
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from tareas.models import Task, Submission
 from users.email_service import send_task_reminder_email
+from config.metrics import registrar_recordatorios
 
 
 class Command(BaseCommand):
@@ -40,9 +46,19 @@ class Command(BaseCommand):
         )
     
     def handle(self, *args, **options):
-        dry_run = options['dry_run']
-        force = options['force']
-        
+        inicio = time.perf_counter()
+        resultado = 'error'
+        try:
+            fallidos = self._enviar_recordatorios(options['dry_run'], options['force'])
+            if options['dry_run']:
+                resultado = 'simulado'
+            else:
+                resultado = 'con_errores' if fallidos else 'ok'
+        finally:
+            registrar_recordatorios(time.perf_counter() - inicio, resultado)
+    
+    def _enviar_recordatorios(self, dry_run, force):
+        """Envía los recordatorios y devuelve cuántos envíos fallaron"""
         self.stdout.write(self.style.NOTICE('='*60))
         self.stdout.write(self.style.NOTICE('📧 SISTEMA DE RECORDATORIOS DE TAREAS'))
         self.stdout.write(self.style.NOTICE(f'   Fecha/Hora: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}'))
@@ -67,7 +83,7 @@ class Command(BaseCommand):
         
         if not tareas_proximas.exists():
             self.stdout.write(self.style.SUCCESS('\n✅ No hay tareas próximas a vencer.'))
-            return
+            return 0
         
         emails_enviados = 0
         emails_omitidos = 0
@@ -145,3 +161,5 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS('✅ Proceso completado exitosamente.')
             )
+        
+        return emails_fallidos
@@ -0,0 +1,49 @@
+"""
+Comando para generar el snapshot columnar del libro de calificaciones
+(tareas/snapshots.py) que consume la API de analítica.
+
+Debe ejecutarse fuera de horario de clases (p.ej. cron diario a las 2:00):
+    0 2 * * * cd /app && python manage.py snapshot_gradebook
+
+Uso manual:
+    python manage.py snapshot_gradebook
+    python manage.py snapshot_gradebook --conservar 7
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tareas.snapshots import escribir_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = 'Escribe un snapshot columnar (.npy) de las entregas para la API de analítica'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--destino',
+            help='Directorio de snapshots (por defecto GRADEBOOK_SNAPSHOT_DIR)',
+        )
+        parser.add_argument(
+            '--conservar',
+            type=int,
+            default=3,
+            help='Número de snapshots a conservar (los más viejos se eliminan)',
+        )
+    
+    def handle(self, *args, **options):
+        destino = options['destino'] or snapshot_dir()
+        
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('📦 SNAPSHOT DEL LIBRO DE CALIFICACIONES'))
+        self.stdout.write(self.style.NOTICE(f'   Destino: {destino}'))
+        self.stdout.write(self.style.NOTICE('='*60))
+        
+        inicio = time.perf_counter()
+        manifest = escribir_snapshot(destino, conservar=options['conservar'])
+        duracion = time.perf_counter() - inicio
+        
+        self.stdout.write(f"   Snapshot: {manifest['nombre']}")
+        self.stdout.write(f"   Entregas: {manifest['filas']}")
+        self.stdout.write(f"   Estudiantes: {manifest['estudiantes']} | Tareas: {manifest['tareas']} | Docentes: {manifest['docentes']}")
+        self.stdout.write(self.style.SUCCESS(f'✅ Snapshot publicado en {duracion:.2f}s'))
@@ -1,7 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.utils import timezone
-from users.models import User
+from users.models import User, Materia
 
 
 def task_attachment_path(instance, filename):
@@ -48,6 +48,15 @@ class Task(models.Model):
         related_name='tareas_creadas',
         limit_choices_to={'rol': 'docente'}
     )
+    # Materia a la que se asigna la tarea: al activarla solo se crean entregas
+    # para los estudiantes inscritos. Sin materia se asigna a todos (comportamiento anterior).
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='tareas'
+    )
     
     estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='borrador')
     puntos_maximos = models.IntegerField(
@@ -0,0 +1,192 @@
+"""
+Ruta de lectura ligera para los endpoints más consultados.
+
+En lugar de instanciar modelos y pasar cada fila por los campos de DRF
+(SubmissionListSerializer, StudentBasicSerializer, SubmissionStudentSerializer),
+se consultan solo las columnas necesarias con .values()/.values_list() y cada
+fila se convierte a dict con un mapper fijo. La salida es idéntica byte a byte
+a la de esos serializers (ver ProjectionParityTests en tareas/tests.py).
+"""
+import os
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from users.cache import get_principal
+from users.models import User
+from .models import Task, Submission, SubmissionFile
+
+# Conversión de fechas idéntica a la de los serializers (zona horaria local, 'Z' para UTC)
+_fecha = serializers.DateTimeField().to_representation
+
+_task_file_storage = Task._meta.get_field('archivo_adjunto').storage
+_submission_file_storage = SubmissionFile._meta.get_field('archivo').storage
+
+# Tamaño máximo de las listas IN al traer archivos
+CHUNK_IDS = 1000
+
+ESTUDIANTE_FIELDS = ('id_usuario', 'nombre_completo', 'correo', 'carrera')
+
+
+def _fecha_o_none(value):
+    return _fecha(value) if value is not None else None
+
+
+def _url_archivo(storage, name, request=None):
+    """Equivalente a FileField.to_representation (URL absoluta si hay request)"""
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+# ==================== ARCHIVOS ====================
+
+ARCHIVO_COLUMNS = ('submission_id', 'id', 'archivo', 'nombre_original', 'fecha_subida', 'es_entrega_tardia')
+
+
+def _agregar_archivo(archivos, row, request=None):
+    submission_id, archivo_id, archivo, nombre, fecha_subida, tardia = row
+    archivos.setdefault(submission_id, []).append({
+        'id': archivo_id,
+        'archivo': _url_archivo(_submission_file_storage, archivo, request),
+        'nombre_original': nombre,
+        'fecha_subida': _fecha(fecha_subida),
+        'es_entrega_tardia': tardia,
+    })
+
+
+def archivos_por_entrega(submission_ids, request=None):
+    """{submission_id: [archivo, ...]} con el formato de SubmissionFileSerializer"""
+    archivos = {}
+    submission_ids = list(submission_ids)
+    for i in range(0, len(submission_ids), CHUNK_IDS):
+        filas = SubmissionFile.objects.filter(
+            submission_id__in=submission_ids[i:i + CHUNK_IDS]
+        ).values_list(*ARCHIVO_COLUMNS)
+
+        for row in filas:
+            _agregar_archivo(archivos, row, request)
+    return archivos
+
+
+async def aarchivos_por_entrega(submission_ids, request=None):
+    """Versión asíncrona de archivos_por_entrega"""
+    archivos = {}
+    submission_ids = list(submission_ids)
+    for i in range(0, len(submission_ids), CHUNK_IDS):
+        filas = SubmissionFile.objects.filter(
+            submission_id__in=submission_ids[i:i + CHUNK_IDS]
+        ).values_list(*ARCHIVO_COLUMNS)
+
+        async for row in filas:
+            _agregar_archivo(archivos, row, request)
+    return archivos
+
+
+# ==================== task_submissions ====================
+
+SUBMISSION_LIST_COLUMNS = (
+    'id', 'student__id_usuario', 'student__nombre_completo', 'student__correo', 'student__carrera',
+    'estado', 'fecha_creacion', 'calificacion', 'comentario_docente', 'fecha_calificacion',
+)
+
+
+def map_submission_list_row(row, archivos):
+    """Fila de SUBMISSION_LIST_COLUMNS → dict de SubmissionListSerializer"""
+    (submission_id, id_usuario, nombre, correo, carrera,
+     estado, fecha_creacion, calificacion, comentario, fecha_calificacion) = row
+    archivos_entrega = archivos.get(submission_id, [])
+    return {
+        'id': submission_id,
+        'student': {
+            'id_usuario': id_usuario,
+            'nombre_completo': nombre,
+            'correo': correo,
+            'carrera': carrera,
+        },
+        'estado': estado,
+        'fecha_creacion': _fecha(fecha_creacion),
+        'calificacion': calificacion,
+        'comentario_docente': comentario,
+        'fecha_calificacion': _fecha_o_none(fecha_calificacion),
+        'archivos': archivos_entrega,
+        'tiene_entregas': bool(archivos_entrega),
+    }
+
+
+def task_submissions_rows(task_id):
+    """Entregas de una tarea (2 queries: entregas con estudiante + archivos)"""
+    filas = list(Submission.objects.filter(task_id=task_id).values_list(*SUBMISSION_LIST_COLUMNS))
+    archivos = archivos_por_entrega(row[0] for row in filas)
+    return [map_submission_list_row(row, archivos) for row in filas]
+
+
+async def atask_submissions_rows(task_id):
+    """Versión asíncrona de task_submissions_rows (mismas 2 queries)"""
+    filas = [row async for row in Submission.objects.filter(task_id=task_id).values_list(*SUBMISSION_LIST_COLUMNS)]
+    archivos = await aarchivos_por_entrega(row[0] for row in filas)
+    return [map_submission_list_row(row, archivos) for row in filas]
+
+
+# ==================== students_list ====================
+
+def students_rows():
+    """Estudiantes activos con el formato de StudentBasicSerializer (iterador)"""
+    return User.objects.filter(
+        rol='estudiante', is_active=True
+    ).values(*ESTUDIANTE_FIELDS).iterator(chunk_size=2000)
+
+
+# ==================== my_task_detail ====================
+
+MY_TASK_COLUMNS = (
+    'id', 'task_id', 'estado', 'fecha_creacion', 'calificacion', 'comentario_docente', 'fecha_calificacion',
+    'task__titulo', 'task__descripcion', 'task__fecha_entrega', 'task__puntos_maximos',
+    'task__archivo_adjunto', 'task__docente_id', 'task__url_recurso',
+    'task__estado', 'task__permite_tardias',
+)
+
+
+def my_task_detail_row(task_id, student_id, request=None):
+    """
+    Entrega del estudiante con los datos de la tarea, con el formato de
+    SubmissionStudentSerializer. Retorna None si la tarea no está asignada.
+    """
+    row = Submission.objects.filter(
+        task_id=task_id,
+        student__id_usuario=student_id
+    ).values_list(*MY_TASK_COLUMNS).first()
+    if row is None:
+        return None
+
+    (submission_id, task_id, estado, fecha_creacion, calificacion, comentario, fecha_calificacion,
+     titulo, descripcion, fecha_entrega, puntos_maximos,
+     archivo_adjunto, docente_id, url_recurso, task_estado, permite_tardias) = row
+
+    # Mismas reglas que Task.esta_vencida / Task.puede_recibir_entregas
+    esta_vencida = timezone.now() > fecha_entrega
+    puede_entregar = task_estado == 'activa' and not (esta_vencida and not permite_tardias)
+
+    principal = get_principal(docente_id)
+
+    return {
+        'id': submission_id,
+        'task_id': task_id,
+        'estado': estado,
+        'fecha_creacion': _fecha(fecha_creacion),
+        'calificacion': calificacion,
+        'comentario_docente': comentario,
+        'fecha_calificacion': _fecha_o_none(fecha_calificacion),
+        'archivos': archivos_por_entrega([submission_id], request).get(submission_id, []),
+        'tarea_titulo': titulo,
+        'tarea_descripcion': descripcion,
+        'tarea_fecha_entrega': _fecha(fecha_entrega),
+        'tarea_puntos_maximos': puntos_maximos,
+        'tarea_archivo_adjunto': _url_archivo(_task_file_storage, archivo_adjunto, request),
+        'tarea_archivo_nombre': os.path.basename(archivo_adjunto) if archivo_adjunto else None,
+        'docente_nombre': principal.nombre_completo if principal else None,
+        'tarea_url_recurso': url_recurso,
+        'tarea_esta_vencida': esta_vencida,
+        'puede_entregar': puede_entregar,
+    }
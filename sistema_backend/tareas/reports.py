@@ -0,0 +1,125 @@
+"""
+Matriz de calificaciones (estudiantes × tareas) calculada por conjuntos.
+
+En lugar de una consulta por cada par (estudiante, tarea), los estudiantes se
+recorren por bloques (paginación por llave) y para cada bloque se traen todas
+sus entregas de las tareas del docente en una sola consulta. La memoria queda
+acotada por el tamaño del bloque, sin importar cuántos estudiantes haya.
+
+Cuando todas las tareas tienen materia, solo se recorre el roster de esas
+materias (más quien ya tenga una entrega en ellas) en lugar de todo el alumnado.
+"""
+from django.db.models import Exists, OuterRef
+
+from users.models import User
+from .models import Task, Submission, SubmissionFile
+
+# Estudiantes por bloque
+CHUNK_ESTUDIANTES = 1000
+
+ESTUDIANTE_FIELDS = ('id_usuario', 'nombre_completo', 'correo', 'carrera')
+
+
+def tareas_reporte(docente_id):
+    """Tareas activas o cerradas del docente, en el orden de las columnas del reporte"""
+    return list(
+        Task.objects.filter(
+            docente__id_usuario=docente_id,
+            estado__in=['activa', 'cerrada']
+        ).order_by('fecha_creacion').values('id', 'titulo', 'materia_id')
+    )
+
+
+def estudiantes_roster(materia_ids=None):
+    """
+    Estudiantes activos; si se indican materias, solo los inscritos en alguna.
+    EXISTS sobre la tabla intermedia (índice único user_id, materia_id) en lugar
+    de un JOIN + DISTINCT.
+    """
+    qs = User.objects.filter(rol='estudiante', is_active=True)
+    if materia_ids is not None:
+        inscritos = User.materias_estudiante.through.objects.filter(
+            user_id=OuterRef('pk'), materia_id__in=materia_ids
+        )
+        qs = qs.filter(Exists(inscritos))
+    return qs
+
+
+def _roster_reporte(tareas):
+    """
+    Estudiantes del reporte: el roster de las materias de las tareas más quien ya
+    tenga entrega en ellas (p.ej. se dio de baja después de activar). Si alguna
+    tarea no tiene materia se asignó a todos, así que se recorre todo el alumnado.
+    """
+    materia_ids = {t['materia_id'] for t in tareas}
+    if not tareas or None in materia_ids:
+        return estudiantes_roster()
+    inscritos = User.materias_estudiante.through.objects.filter(
+        user_id=OuterRef('pk'), materia_id__in=materia_ids
+    )
+    con_entrega = Submission.objects.filter(student_id=OuterRef('pk'), task_id__in=[t['id'] for t in tareas])
+    return User.objects.filter(rol='estudiante', is_active=True).filter(Exists(inscritos) | Exists(con_entrega))
+
+
+def _iter_estudiantes(qs):
+    """Estudiantes por bloques, paginando por id_usuario"""
+    qs = qs.order_by('id_usuario')
+    ultimo = None
+    while True:
+        bloque_qs = qs if ultimo is None else qs.filter(id_usuario__gt=ultimo)
+        bloque = list(bloque_qs.values(*ESTUDIANTE_FIELDS)[:CHUNK_ESTUDIANTES])
+        if not bloque:
+            return
+        yield bloque
+        ultimo = bloque[-1]['id_usuario']
+
+
+def _entregas_bloque(task_ids, student_ids):
+    """{(student_id, task_id): (estado, calificacion, es_tardia)} para un bloque"""
+    if not task_ids:
+        return {}
+    tardias = SubmissionFile.objects.filter(submission=OuterRef('pk'), es_entrega_tardia=True)
+    filas = Submission.objects.filter(
+        task_id__in=task_ids,
+        student_id__in=student_ids
+    ).order_by().annotate(
+        es_tardia=Exists(tardias)
+    ).values_list('student_id', 'task_id', 'estado', 'calificacion', 'es_tardia')
+    return {(sid, tid): (estado, cal, tardia) for sid, tid, estado, cal, tardia in filas}
+
+
+def iter_grade_matrix(tareas):
+    """
+    Genera, por estudiante, (estudiante, celdas, promedio) donde cada celda es
+    (estado_entrega, calificacion, es_tardia) en el orden de `tareas`.
+    Las tareas sin entrega para el estudiante vienen como ('no_asignado', None, False).
+    """
+    task_ids = [t['id'] for t in tareas]
+    no_asignado = ('no_asignado', None, False)
+
+    for bloque in _iter_estudiantes(_roster_reporte(tareas)):
+        entregas = _entregas_bloque(task_ids, [e['id_usuario'] for e in bloque])
+        for estudiante in bloque:
+            celdas = [entregas.get((estudiante['id_usuario'], tid), no_asignado) for tid in task_ids]
+            calificaciones = [c[1] for c in celdas if c[1]]
+            promedio = round(sum(calificaciones) / len(calificaciones), 2) if calificaciones else None
+            yield estudiante, celdas, promedio
+
+
+def iter_report_rows(tareas):
+    """Filas del reporte de calificaciones con el formato de la API"""
+    for estudiante, celdas, promedio in iter_grade_matrix(tareas):
+        yield {
+            'estudiante': estudiante,
+            'tareas': [
+                {
+                    'id': tarea['id'],
+                    'titulo': tarea['titulo'],
+                    'estado_entrega': estado,
+                    'calificacion': calificacion,
+                    'es_tardia': es_tardia,
+                }
+                for tarea, (estado, calificacion, es_tardia) in zip(tareas, celdas)
+            ],
+            'promedio': promedio,
+        }
@@ -1,7 +1,32 @@
 from rest_framework import serializers
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
 from django.utils import timezone
 from .models import Task, Submission, SubmissionFile
 from users.models import User
+from users.cache import get_principal
+from users.catalog import materia_catalog
+
+
+def _docente_nombre(task):
+    """Nombre del docente desde la caché de principales (sin query por fila)"""
+    principal = get_principal(task.docente_id)
+    return principal.nombre_completo if principal else task.docente.nombre_completo
+
+
+# Conteos de entregas por tarea en una sola consulta (anotación o aggregate)
+CONTEOS_ENTREGAS = {
+    'total_estudiantes': Count('submissions'),
+    'total_entregados': Count('submissions', filter=Q(submissions__estado__in=['entregado', 'calificado'])),
+    'total_calificados': Count('submissions', filter=Q(submissions__estado='calificado')),
+}
+
+
+def _materia_nombre(task):
+    """Nombre de la materia desde el catálogo en memoria (sin query por fila)"""
+    if task.materia_id is None:
+        return None
+    materia = materia_catalog.materia(task.materia_id)
+    return materia['nombre'] if materia else None
 
 
 class SubmissionFileSerializer(serializers.ModelSerializer):
@@ -48,7 +73,7 @@ class SubmissionStudentSerializer(serializers.ModelSerializer):
     tarea_puntos_maximos = serializers.IntegerField(source='task.puntos_maximos', read_only=True)
     tarea_archivo_adjunto = serializers.SerializerMethodField()
     tarea_archivo_nombre = serializers.SerializerMethodField()
-    docente_nombre = serializers.CharField(source='task.docente.nombre_completo', read_only=True)
+    docente_nombre = serializers.SerializerMethodField()
     tarea_url_recurso = serializers.URLField(source='task.url_recurso', read_only=True)
     tarea_esta_vencida = serializers.BooleanField(source='task.esta_vencida', read_only=True)
     puede_entregar = serializers.SerializerMethodField()
@@ -66,6 +91,9 @@ class SubmissionStudentSerializer(serializers.ModelSerializer):
     def get_puede_entregar(self, obj):
         return obj.task.puede_recibir_entregas
     
+    def get_docente_nombre(self, obj):
+        return _docente_nombre(obj.task)
+    
     def get_tarea_archivo_nombre(self, obj):
         if obj.task.archivo_adjunto:
             # Retorna solo el nombre del archivo, eliminando la ruta de carpetas
@@ -85,7 +113,8 @@ class SubmissionStudentSerializer(serializers.ModelSerializer):
 class TaskListSerializer(serializers.ModelSerializer):
     """Serializer para listar tareas (vista docente)"""
     
-    docente_nombre = serializers.CharField(source='docente.nombre_completo', read_only=True)
+    docente_nombre = serializers.SerializerMethodField()
+    materia_nombre = serializers.SerializerMethodField()
     total_estudiantes = serializers.SerializerMethodField()
     total_entregados = serializers.SerializerMethodField()
     total_calificados = serializers.SerializerMethodField()
@@ -96,18 +125,38 @@ class TaskListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'titulo', 'descripcion', 'archivo_adjunto', 'url_recurso',
             'fecha_creacion', 'fecha_modificacion', 'fecha_entrega',
-            'docente_nombre', 'estado', 'puntos_maximos', 'permite_tardias',
+            'docente_nombre', 'materia', 'materia_nombre', 'estado', 'puntos_maximos', 'permite_tardias',
             'esta_vencida', 'total_estudiantes', 'total_entregados', 'total_calificados'
         ]
     
+    def get_docente_nombre(self, obj):
+        return _docente_nombre(obj)
+    
+    def get_materia_nombre(self, obj):
+        return _materia_nombre(obj)
+    
+    @staticmethod
+    def annotate_queryset(queryset):
+        """Conteos de entregas como anotaciones (1 query para todo el listado)"""
+        return queryset.annotate(**CONTEOS_ENTREGAS)
+    
+    @staticmethod
+    def _conteos(obj):
+        """Conteos anotados; para una tarea suelta, una sola consulta agregada"""
+        if not hasattr(obj, 'total_estudiantes'):
+            conteos = Task.objects.filter(pk=obj.pk).aggregate(**CONTEOS_ENTREGAS)
+            for campo, valor in conteos.items():
+                setattr(obj, campo, valor)
+        return obj
+    
     def get_total_estudiantes(self, obj):
-        return obj.submissions.count()
+        return self._conteos(obj).total_estudiantes
     
     def get_total_entregados(self, obj):
-        return obj.submissions.filter(estado__in=['entregado', 'calificado']).count()
+        return self._conteos(obj).total_entregados
     
     def get_total_calificados(self, obj):
-        return obj.submissions.filter(estado='calificado').count()
+        return self._conteos(obj).total_calificados
 
 
 class TaskCreateSerializer(serializers.ModelSerializer):
@@ -117,9 +166,16 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         model = Task
         fields = [
             'titulo', 'descripcion', 'archivo_adjunto', 'url_recurso',
-            'fecha_entrega', 'puntos_maximos', 'permite_tardias'
+            'fecha_entrega', 'puntos_maximos', 'permite_tardias', 'materia'
         ]
     
+    def validate_materia(self, value):
+        """La materia (opcional) debe ser una que imparte el docente"""
+        docente_id = self.context.get('docente_id')
+        if value is not None and docente_id and not value.docentes.filter(id_usuario=docente_id).exists():
+            raise serializers.ValidationError('Solo puedes asignar tareas a materias que impartes')
+        return value
+    
     def validate_fecha_entrega(self, value):
         """La fecha de entrega debe ser futura"""
         if value <= timezone.now():
@@ -136,7 +192,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
 class TaskDetailSerializer(serializers.ModelSerializer):
     """Serializer detallado de tarea con submissions"""
     
-    docente_nombre = serializers.CharField(source='docente.nombre_completo', read_only=True)
+    docente_nombre = serializers.SerializerMethodField()
+    materia_nombre = serializers.SerializerMethodField()
     submissions = SubmissionListSerializer(many=True, read_only=True)
     esta_vencida = serializers.BooleanField(read_only=True)
     puede_recibir_entregas = serializers.BooleanField(read_only=True)
@@ -146,9 +203,24 @@ class TaskDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'titulo', 'descripcion', 'archivo_adjunto', 'url_recurso',
             'fecha_creacion', 'fecha_modificacion', 'fecha_entrega',
-            'docente_nombre', 'estado', 'puntos_maximos', 'permite_tardias',
+            'docente_nombre', 'materia', 'materia_nombre', 'estado', 'puntos_maximos', 'permite_tardias',
             'esta_vencida', 'puede_recibir_entregas', 'submissions'
         ]
+    
+    @staticmethod
+    def prefetch(tarea):
+        """Precarga entregas con estudiante y archivos (2 queries sin importar cuántas entregas)"""
+        prefetch_related_objects([tarea], Prefetch(
+            'submissions',
+            queryset=Submission.objects.select_related('student').prefetch_related('archivos'),
+        ))
+        return tarea
+    
+    def get_docente_nombre(self, obj):
+        return _docente_nombre(obj)
+    
+    def get_materia_nombre(self, obj):
+        return _materia_nombre(obj)
 
 
 class GradeSubmissionSerializer(serializers.Serializer):
@@ -1,7 +1,10 @@
-from django.db.models.signals import pre_save, post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Task, Submission
-from users.models import User
+from .events import event_broker
+from .models import Task, Submission, SubmissionFile
+from .reports import estudiantes_roster
+from .stats import grade_stats
 
 
 @receiver(pre_save, sender=Task)
@@ -24,6 +27,7 @@ def task_state_change(sender, instance, **kwargs):
 def create_submissions_on_activate(sender, instance, created, **kwargs):
     """
     Cuando una tarea se activa, crear una Submission para cada estudiante
+    inscrito en su materia (o para todos si la tarea no tiene materia)
     """
     old_estado = getattr(instance, '_old_estado', None)
     
@@ -38,17 +42,107 @@ def create_submissions_on_activate(sender, instance, created, **kwargs):
         should_create = True
     
     if should_create:
-        # Obtener todos los estudiantes activos
-        estudiantes = User.objects.filter(rol='estudiante', is_active=True)
+        # Roster de la materia (todos los estudiantes activos si no tiene)
+        materia_ids = None if instance.materia_id is None else [instance.materia_id]
+        estudiantes = estudiantes_roster(materia_ids).values_list('id_usuario', flat=True)
         
-        # Crear submission para cada estudiante que no tenga una
-        submissions_to_create = []
-        for estudiante in estudiantes:
-            if not Submission.objects.filter(task=instance, student=estudiante).exists():
-                submissions_to_create.append(
-                    Submission(task=instance, student=estudiante)
-                )
+        # Entregas existentes en una sola consulta (p.ej. tarea reactivada)
+        existentes = set(Submission.objects.filter(task=instance).values_list('student_id', flat=True))
+        submissions_to_create = [
+            Submission(task=instance, student_id=student_id)
+            for student_id in estudiantes.iterator(chunk_size=2000)
+            if student_id not in existentes
+        ]
         
         if submissions_to_create:
-            Submission.objects.bulk_create(submissions_to_create)
+            Submission.objects.bulk_create(submissions_to_create, batch_size=1000)
             print(f"✅ Creadas {len(submissions_to_create)} entregas para la tarea '{instance.titulo}'")
+
+
+@receiver(post_save, sender=Submission)
+def invalidate_grade_stats_submission(sender, instance, **kwargs):
+    """
+    Recalcular las estadísticas del docente en el siguiente acceso
+    cuando se califica (o se entrega) una entrega de sus tareas
+    """
+    if Submission.task.is_cached(instance):
+        docente_id = instance.task.docente_id
+    else:
+        # Solo el docente_id, sin cargar la tarea completa en cada guardado
+        docente_id = Task.objects.filter(pk=instance.task_id).values_list('docente_id', flat=True).first()
+    if docente_id:
+        grade_stats.invalidate(docente_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_grade_stats_task(sender, instance, **kwargs):
+    """
+    Recalcular las estadísticas cuando una tarea del docente cambia o se elimina
+    """
+    grade_stats.invalidate(instance.docente_id)
+
+
+# ==================== EVENTOS EN TIEMPO REAL (tareas/events.py) ====================
+
+@receiver(pre_save, sender=Submission)
+def remember_submission_grade(sender, instance, update_fields=None, **kwargs):
+    """
+    Leer estado y calificación anteriores antes de guardar una entrega
+    calificada, para publicar 'entrega_calificada' solo cuando cambian.
+    Las demás entregas (pendientes, entregadas, o guardados que no tocan
+    estado/calificación) no consultan la BD.
+    """
+    instance._calificacion_anterior = None
+    if instance.estado != 'calificado' or instance._state.adding:
+        return
+    if update_fields is not None and not {'estado', 'calificacion'} & set(update_fields):
+        instance._calificacion_anterior = (instance.estado, instance.calificacion)
+        return
+    instance._calificacion_anterior = Submission.objects.filter(
+        pk=instance.pk
+    ).values_list('estado', 'calificacion').first()
+
+
+@receiver(post_save, sender=Submission)
+def publish_submission_graded(sender, instance, **kwargs):
+    if instance.estado != 'calificado':
+        return
+    if getattr(instance, '_calificacion_anterior', None) == (instance.estado, instance.calificacion):
+        return
+    transaction.on_commit(lambda: event_broker.publicar(
+        [instance.student_id], 'entrega_calificada',
+        task_id=instance.task_id, submission_id=instance.id, calificacion=instance.calificacion,
+    ))
+
+
+@receiver(post_save, sender=SubmissionFile)
+def publish_submission_received(sender, instance, created, **kwargs):
+    if not created:
+        return
+    submission = instance.submission
+    transaction.on_commit(lambda: event_broker.publicar(
+        [submission.task.docente_id], 'entrega_recibida',
+        task_id=submission.task_id, submission_id=submission.id, student_id=submission.student_id,
+    ))
+
+
+@receiver(post_save, sender=Task)
+def publish_task_state(sender, instance, **kwargs):
+    old_estado = getattr(instance, '_old_estado', None)
+    if instance.estado == old_estado or instance.estado not in ('activa', 'cerrada'):
+        return
+    tipo = 'tarea_activada' if instance.estado == 'activa' else 'tarea_cerrada'
+
+    def _publicar():
+        conectados = event_broker.conectados()
+        if not conectados:
+            return
+        # Solo se consulta el roster de quienes están conectados
+        destinos = set(Submission.objects.filter(
+            task_id=instance.id, student_id__in=conectados
+        ).values_list('student_id', flat=True))
+        destinos.add(instance.docente_id)
+        event_broker.publicar(destinos, tipo, task_id=instance.id)
+
+    transaction.on_commit(_publicar)
@@ -0,0 +1,334 @@
+"""
+Snapshots columnares del libro de calificaciones para analítica.
+
+El comando `snapshot_gradebook` recorre la tabla de entregas una sola vez (fuera
+de horario) y escribe cada columna como un arreglo NumPy `.npy` compacto, más un
+manifest.json con el esquema y los diccionarios de códigos. La API de analítica
+lee el snapshot con np.load(mmap_mode='r'): el sistema operativo pagina solo lo
+que se usa y las consultas pesadas nunca tocan la base de datos OLTP.
+
+Estructura en GRADEBOOK_SNAPSHOT_DIR:
+
+    ACTUAL                     nombre del snapshot vigente (se reemplaza atómicamente)
+    20261019T020000/
+        manifest.json
+        estudiante.npy         int32, índice en estudiantes.npy
+        tarea.npy              int32, índice en tarea_id.npy
+        docente.npy            int32, índice en docentes.npy
+        materia.npy            int32, id de la materia (-1 si la tarea no tiene)
+        calificacion.npy       int8, 0 = sin calificar
+        estado.npy             int8, índice en ESTADOS
+        tardia.npy             bool
+        fecha_creacion.npy     int64, epoch en segundos
+        fecha_calificacion.npy int64, epoch en segundos (-1 = sin calificar)
+        estudiantes.npy, docentes.npy, tarea_id.npy, tarea_titulo.npy,
+        tarea_fecha_entrega.npy (diccionarios)
+"""
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Task, Submission, SubmissionFile
+
+FORMATO_VERSION = 1
+
+# Códigos de Submission.estado en la columna `estado`
+ESTADOS = [clave for clave, _ in Submission.ESTADO_CHOICES]
+
+# Filas leídas de la base de datos por bloque
+CHUNK_FILAS = 5000
+
+COLUMNAS = {
+    'estudiante': 'int32',
+    'tarea': 'int32',
+    'docente': 'int32',
+    'materia': 'int32',
+    'calificacion': 'int8',
+    'estado': 'int8',
+    'tardia': 'bool',
+    'fecha_creacion': 'int64',
+    'fecha_calificacion': 'int64',
+}
+
+ARCHIVO_ACTUAL = 'ACTUAL'
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'GRADEBOOK_SNAPSHOT_DIR', Path(settings.BASE_DIR) / 'snapshots' / 'gradebook'))
+
+
+def _epoch(fecha):
+    return int(fecha.timestamp()) if fecha is not None else -1
+
+
+# ==================== ESCRITURA ====================
+
+def _tareas():
+    """Tabla de tareas: [(id, titulo, docente_id, fecha_entrega, materia_id)]"""
+    return list(
+        Task.objects.order_by('id').values_list('id', 'titulo', 'docente_id', 'fecha_entrega', 'materia_id')
+    )
+
+
+def _iter_entregas():
+    """Entregas por bloques, en orden de id"""
+    tardias = SubmissionFile.objects.filter(submission=OuterRef('pk'), es_entrega_tardia=True)
+    return Submission.objects.order_by('id').annotate(
+        es_tardia=Exists(tardias)
+    ).values_list(
+        'student_id', 'task_id', 'calificacion', 'estado', 'es_tardia', 'fecha_creacion', 'fecha_calificacion'
+    ).iterator(chunk_size=CHUNK_FILAS)
+
+
+def escribir_snapshot(destino=None, conservar=3):
+    """
+    Escribe un snapshot nuevo y lo publica como vigente.
+
+    Las columnas se escriben en un directorio temporal; cuando todo está en
+    disco se renombra y se reemplaza el archivo ACTUAL (os.replace es atómico),
+    así un lector nunca ve un snapshot a medias. Retorna el manifest.
+    """
+    import numpy as np
+
+    base = Path(destino) if destino else snapshot_dir()
+    base.mkdir(parents=True, exist_ok=True)
+
+    generado = timezone.now()
+    nombre = generado.strftime('%Y%m%dT%H%M%S')
+    temporal = base / f'.{nombre}.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    temporal.mkdir()
+
+    # Diccionarios de tareas y docentes
+    tareas = _tareas()
+    indice_tarea = {task_id: i for i, (task_id, *_resto) in enumerate(tareas)}
+    docentes = sorted({t[2] for t in tareas})
+    indice_docente = {docente_id: i for i, docente_id in enumerate(docentes)}
+    docente_por_tarea = np.array([indice_docente[t[2]] for t in tareas], dtype=np.int32)
+    # -1 para tareas sin materia (asignadas a todos los estudiantes)
+    materia_por_tarea = np.array([-1 if t[4] is None else t[4] for t in tareas], dtype=np.int32)
+
+    indice_estudiante = {}
+    indice_estado = {estado: i for i, estado in enumerate(ESTADOS)}
+
+    # Columnas acumuladas por bloques (arreglos tipados, no listas de objetos)
+    bloques = {columna: [] for columna in COLUMNAS}
+    buffer = {columna: [] for columna in ('estudiante', 'tarea', 'calificacion', 'estado', 'tardia',
+                                          'fecha_creacion', 'fecha_calificacion')}
+
+    def _vaciar():
+        if not buffer['tarea']:
+            return
+        tarea = np.array(buffer['tarea'], dtype=np.int32)
+        bloques['tarea'].append(tarea)
+        bloques['docente'].append(docente_por_tarea[tarea])
+        bloques['materia'].append(materia_por_tarea[tarea])
+        for columna, valores in buffer.items():
+            if columna != 'tarea':
+                bloques[columna].append(np.array(valores, dtype=COLUMNAS[columna]))
+            valores.clear()
+
+    for student_id, task_id, calificacion, estado, tardia, fecha_creacion, fecha_calificacion in _iter_entregas():
+        if task_id not in indice_tarea:
+            # Tarea creada después de leer la tabla de tareas: entra en el siguiente snapshot
+            continue
+        buffer['estudiante'].append(indice_estudiante.setdefault(student_id, len(indice_estudiante)))
+        buffer['tarea'].append(indice_tarea[task_id])
+        buffer['calificacion'].append(calificacion or 0)
+        buffer['estado'].append(indice_estado[estado])
+        buffer['tardia'].append(tardia)
+        buffer['fecha_creacion'].append(_epoch(fecha_creacion))
+        buffer['fecha_calificacion'].append(_epoch(fecha_calificacion))
+        if len(buffer['tarea']) >= CHUNK_FILAS:
+            _vaciar()
+    _vaciar()
+
+    filas = 0
+    for columna, tipo in COLUMNAS.items():
+        arreglo = np.concatenate(bloques[columna]) if bloques[columna] else np.empty(0, dtype=tipo)
+        np.save(temporal / f'{columna}.npy', arreglo)
+        filas = len(arreglo)
+
+    np.save(temporal / 'estudiantes.npy', np.array(list(indice_estudiante), dtype=str))
+    np.save(temporal / 'docentes.npy', np.array(docentes, dtype=str))
+    np.save(temporal / 'tarea_id.npy', np.array([t[0] for t in tareas], dtype=np.int64))
+    np.save(temporal / 'tarea_titulo.npy', np.array([t[1] for t in tareas], dtype=str))
+    np.save(temporal / 'tarea_fecha_entrega.npy', np.array([_epoch(t[3]) for t in tareas], dtype=np.int64))
+
+    manifest = {
+        'version': FORMATO_VERSION,
+        'nombre': nombre,
+        'generado': generado.isoformat(),
+        'filas': filas,
+        'estudiantes': len(indice_estudiante),
+        'tareas': len(tareas),
+        'docentes': len(docentes),
+        'columnas': COLUMNAS,
+        'estados': ESTADOS,
+    }
+    with open(temporal / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # Publicar: renombrar el directorio y apuntar ACTUAL al snapshot nuevo
+    final = base / nombre
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(temporal, final)
+    puntero = base / f'.{ARCHIVO_ACTUAL}.tmp'
+    puntero.write_text(nombre, encoding='utf-8')
+    os.replace(puntero, base / ARCHIVO_ACTUAL)
+
+    _podar(base, conservar)
+    return manifest
+
+
+def _podar(base, conservar):
+    """Elimina snapshots viejos (los lectores con mmap abierto conservan sus archivos en POSIX)"""
+    snapshots = sorted(p for p in base.iterdir() if p.is_dir() and not p.name.startswith('.'))
+    for viejo in snapshots[:-conservar] if conservar > 0 else []:
+        shutil.rmtree(viejo, ignore_errors=True)
+
+
+# ==================== LECTURA ====================
+
+class GradebookSnapshot:
+    """Snapshot abierto en modo memory-map (solo lectura)"""
+
+    def __init__(self, ruta):
+        import numpy as np
+
+        self.ruta = Path(ruta)
+        with open(self.ruta / 'manifest.json', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != FORMATO_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {self.manifest.get('version')}")
+
+        self.columnas = {
+            columna: np.load(self.ruta / f'{columna}.npy', mmap_mode='r')
+            for columna in self.manifest['columnas']
+        }
+        # Diccionarios (pequeños): se cargan completos
+        self.estudiantes = np.load(self.ruta / 'estudiantes.npy')
+        self.docentes = np.load(self.ruta / 'docentes.npy')
+        self.tarea_id = np.load(self.ruta / 'tarea_id.npy')
+        self.tarea_titulo = np.load(self.ruta / 'tarea_titulo.npy')
+
+    def __getitem__(self, columna):
+        return self.columnas[columna]
+
+
+_abierto = None
+_lock = threading.Lock()
+
+
+def snapshot_actual():
+    """
+    Snapshot vigente (None si todavía no se ha generado ninguno).
+    Se reabre solo cuando ACTUAL apunta a otro snapshot.
+    """
+    global _abierto
+
+    base = snapshot_dir()
+    try:
+        nombre = (base / ARCHIVO_ACTUAL).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        if _abierto is None or _abierto.ruta.name != nombre:
+            _abierto = GradebookSnapshot(base / nombre)
+        return _abierto
+
+
+# ==================== ANALÍTICA ====================
+
+AGRUPACIONES = ('docente', 'tarea', 'materia', 'estudiante')
+
+# Filas por rebanada en la analítica (~1M filas ≈ 8 MB por columna convertida)
+FILAS_POR_REBANADA = 1_000_000
+
+
+def _etiquetas(snapshot, agrupar, n_grupos):
+    if agrupar == 'docente':
+        return [{'docente_id': str(d)} for d in snapshot.docentes[:n_grupos]]
+    if agrupar == 'tarea':
+        return [
+            {'tarea_id': int(i), 'titulo': str(t)}
+            for i, t in zip(snapshot.tarea_id[:n_grupos], snapshot.tarea_titulo[:n_grupos])
+        ]
+    if agrupar == 'estudiante':
+        return [{'estudiante_id': str(e)} for e in snapshot.estudiantes[:n_grupos]]
+    return [{'materia_id': i - 1 if i > 0 else None} for i in range(n_grupos)]
+
+
+def resumen_por_grupo(snapshot, agrupar='docente'):
+    """
+    Entregas, calificadas, promedio, tasa de entrega y tasa de tardías por grupo,
+    con bincount sobre las columnas mapeadas en memoria.
+
+    Las columnas se recorren en rebanadas de FILAS_POR_REBANADA: bincount convierte
+    sus entradas a intp/float64, y hacerlo sobre la columna completa copiaría el
+    memmap entero a RAM. Así la memoria extra queda acotada por la rebanada.
+    """
+    import numpy as np
+
+    columna = snapshot[agrupar]
+    # -1 (sin materia) pasa a ser el grupo 0
+    desplazamiento = 1 if agrupar == 'materia' else 0
+
+    if agrupar == 'docente':
+        n_grupos = len(snapshot.docentes)
+    elif agrupar == 'tarea':
+        n_grupos = len(snapshot.tarea_id)
+    elif agrupar == 'estudiante':
+        n_grupos = len(snapshot.estudiantes)
+    else:
+        n_grupos = int(columna.max()) + 1 + desplazamiento if len(columna) else 0
+
+    pendiente = ESTADOS.index('pendiente')
+    entregas = np.zeros(n_grupos, dtype=np.int64)
+    entregadas = np.zeros(n_grupos)
+    tardias = np.zeros(n_grupos)
+    calificadas = np.zeros(n_grupos)
+    suma = np.zeros(n_grupos)
+
+    for inicio in range(0, len(columna), FILAS_POR_REBANADA):
+        rebanada = slice(inicio, inicio + FILAS_POR_REBANADA)
+        grupos = columna[rebanada]
+        if desplazamiento:
+            grupos = grupos + desplazamiento
+        calificacion = snapshot['calificacion'][rebanada]
+
+        entregas += np.bincount(grupos, minlength=n_grupos)
+        entregadas += np.bincount(grupos, weights=snapshot['estado'][rebanada] != pendiente, minlength=n_grupos)
+        tardias += np.bincount(grupos, weights=snapshot['tardia'][rebanada], minlength=n_grupos)
+        calificadas += np.bincount(grupos, weights=calificacion > 0, minlength=n_grupos)
+        suma += np.bincount(grupos, weights=calificacion, minlength=n_grupos)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        promedio = suma / calificadas
+        tasa_entrega = entregadas / entregas
+        tasa_tardia = tardias / entregadas
+
+    def _numero(valor):
+        valor = float(valor)
+        return None if valor != valor else round(valor, 2)
+
+    return [
+        {
+            **etiqueta,
+            'entregas': int(entregas[i]),
+            'entregadas': int(entregadas[i]),
+            'calificadas': int(calificadas[i]),
+            'promedio': _numero(promedio[i]),
+            'tasa_entrega': _numero(tasa_entrega[i]),
+            'tasa_tardia': _numero(tasa_tardia[i]),
+        }
+        for i, etiqueta in enumerate(_etiquetas(snapshot, agrupar, n_grupos))
+        if entregas[i]
+    ]
@@ -0,0 +1,202 @@
+"""
+Estadísticas de calificaciones por tarea y por estudiante (vectorizadas con NumPy).
+
+Las entregas de todas las tareas del docente se traen en una sola consulta y se
+cargan en arreglos; los agregados por grupo se calculan con bincount y los
+percentiles ordenando una sola vez por (grupo, calificación), sin ciclos de
+Python por entrega.
+
+El resultado se guarda por docente en una caché en proceso que se invalida al
+guardar una entrega o una tarea del docente (ver tareas/signals.py). El TTL
+acota la desactualización entre workers.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from .models import Submission, SubmissionFile
+from .reports import tareas_reporte
+
+# Escala de calificaciones (Submission.calificacion)
+CALIFICACION_MIN = 1
+CALIFICACION_MAX = 10
+
+PERCENTILES = (25, 50, 75, 90)
+
+
+class GradeStatsCache:
+    """Estadísticas calculadas por docente, con TTL y segura entre hilos"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._data = {}
+        self._versiones = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, docente_id):
+        docente_id = str(docente_id)
+        with self._lock:
+            entry = self._data.get(docente_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            version = self._versiones.get(docente_id, 0)
+
+        estadisticas = calcular_estadisticas(docente_id)
+        with self._lock:
+            # Si se calificó algo mientras se calculaba, no guardar un resultado viejo
+            if self._versiones.get(docente_id, 0) == version:
+                self._data[docente_id] = (estadisticas, time.monotonic() + self.ttl)
+        return estadisticas
+
+    def invalidate(self, docente_id):
+        docente_id = str(docente_id)
+        with self._lock:
+            self._data.pop(docente_id, None)
+            self._versiones[docente_id] = self._versiones.get(docente_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def _entregas_tareas(task_ids):
+    """Una sola consulta: (task_id, student_id, nombre, estado, calificacion, es_tardia)"""
+    if not task_ids:
+        return []
+    tardias = SubmissionFile.objects.filter(submission=OuterRef('pk'), es_entrega_tardia=True)
+    return list(
+        Submission.objects.filter(
+            task_id__in=task_ids
+        ).order_by().annotate(
+            es_tardia=Exists(tardias)
+        ).values_list('task_id', 'student_id', 'student__nombre_completo', 'estado', 'calificacion', 'es_tardia')
+    )
+
+
+def _numero(valor):
+    """float de NumPy → número JSON (None si no hay datos)"""
+    valor = float(valor)
+    return None if valor != valor else round(valor, 2)
+
+
+def _agregados(np, grupos, n_grupos, calificaciones, entregadas, tardias):
+    """
+    Estadísticas de cada grupo (tarea o estudiante) a partir de arreglos planos.
+    `grupos` es el índice de grupo de cada entrega; `calificaciones` es NaN si no está calificada.
+    """
+    entregadas_por_grupo = np.bincount(grupos, weights=entregadas, minlength=n_grupos)
+    tardias_por_grupo = np.bincount(grupos, weights=tardias, minlength=n_grupos)
+    total_por_grupo = np.bincount(grupos, minlength=n_grupos)
+
+    calificadas = ~np.isnan(calificaciones)
+    g = grupos[calificadas]
+    x = calificaciones[calificadas]
+
+    n = np.bincount(g, minlength=n_grupos)
+    suma = np.bincount(g, weights=x, minlength=n_grupos)
+    suma_cuadrados = np.bincount(g, weights=x * x, minlength=n_grupos)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = suma / n
+        desviacion = np.sqrt(np.maximum(suma_cuadrados / n - media * media, 0))
+        tasa_tardia = tardias_por_grupo / entregadas_por_grupo
+
+    # Calificaciones ordenadas por (grupo, valor): cada grupo queda en un tramo contiguo
+    ordenadas = np.append(x[np.lexsort((x, g))], np.nan)
+    inicio = np.concatenate(([0], np.cumsum(n)[:-1]))
+    vacio = n == 0
+
+    def _en_posicion(posicion):
+        abajo = np.floor(posicion).astype(np.int64)
+        arriba = np.ceil(posicion).astype(np.int64)
+        valor = ordenadas[abajo] + (ordenadas[arriba] - ordenadas[abajo]) * (posicion - abajo)
+        return np.where(vacio, np.nan, valor)
+
+    ultimo = np.maximum(n - 1, 0)
+    percentiles = {q: _en_posicion(inicio + ultimo * (q / 100)) for q in PERCENTILES}
+    minimo = _en_posicion(inicio.astype(np.float64))
+    maximo = _en_posicion((inicio + ultimo).astype(np.float64))
+
+    escala = CALIFICACION_MAX - CALIFICACION_MIN + 1
+    columna = np.clip(x, CALIFICACION_MIN, CALIFICACION_MAX).astype(np.int64) - CALIFICACION_MIN
+    histograma = np.bincount(g * escala + columna, minlength=n_grupos * escala).reshape(n_grupos, escala)
+
+    return [
+        {
+            'entregas': int(total_por_grupo[i]),
+            'entregadas': int(entregadas_por_grupo[i]),
+            'calificadas': int(n[i]),
+            'promedio': _numero(media[i]),
+            'mediana': _numero(percentiles[50][i]),
+            'desviacion_estandar': _numero(desviacion[i]),
+            'minimo': _numero(minimo[i]),
+            'maximo': _numero(maximo[i]),
+            'percentiles': {f'p{q}': _numero(percentiles[q][i]) for q in PERCENTILES},
+            'histograma': {
+                str(CALIFICACION_MIN + j): int(cuenta) for j, cuenta in enumerate(histograma[i])
+            },
+            'tasa_tardia': _numero(tasa_tardia[i]),
+        }
+        for i in range(n_grupos)
+    ]
+
+
+def calcular_estadisticas(docente_id):
+    """Estadísticas generales, por tarea y por estudiante de las tareas del docente"""
+    import numpy as np
+
+    tareas = tareas_reporte(docente_id)
+    filas = _entregas_tareas([t['id'] for t in tareas])
+
+    if filas:
+        task_ids, student_ids, nombres, estados, calificaciones, tardias = zip(*filas)
+    else:
+        task_ids = student_ids = nombres = estados = calificaciones = tardias = ()
+
+    # Índice de grupo por tarea (en el orden del reporte) y por estudiante
+    indice_tarea = {t['id']: i for i, t in enumerate(tareas)}
+    por_tarea = np.fromiter((indice_tarea[t] for t in task_ids), dtype=np.int64, count=len(filas))
+    estudiantes, por_estudiante = np.unique(np.array(student_ids, dtype=str), return_inverse=True)
+    por_estudiante = por_estudiante.astype(np.int64).reshape(-1)
+
+    calificaciones = np.array(
+        [np.nan if c is None else c for c in calificaciones], dtype=np.float64
+    )
+    entregadas = np.array([e != 'pendiente' for e in estados], dtype=np.float64)
+    tardias = np.array(tardias, dtype=np.float64)
+
+    nombre_por_estudiante = dict(zip(student_ids, nombres))
+
+    general = _agregados(np, np.zeros(len(filas), dtype=np.int64), 1, calificaciones, entregadas, tardias)[0]
+    tareas_stats = _agregados(np, por_tarea, len(tareas), calificaciones, entregadas, tardias)
+    estudiantes_stats = _agregados(np, por_estudiante, len(estudiantes), calificaciones, entregadas, tardias)
+
+    return {
+        'general': general,
+        'por_tarea': [
+            {'id': tarea['id'], 'titulo': tarea['titulo'], **stats}
+            for tarea, stats in zip(tareas, tareas_stats)
+        ],
+        'por_estudiante': [
+            {'id_usuario': str(id_usuario), 'nombre_completo': nombre_por_estudiante[str(id_usuario)], **stats}
+            for id_usuario, stats in zip(estudiantes, estudiantes_stats)
+        ],
+    }
+
+
+grade_stats = GradeStatsCache(ttl=getattr(settings, 'GRADE_STATS_CACHE_TTL', 300))
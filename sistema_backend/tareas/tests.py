@@ -1,3 +1,694 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import shutil
+import statistics
+import tempfile
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import AsyncRequestFactory, TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.renderers import JSONRenderer
+
+from config import async_views, metrics, renderers
+from config.parsers import FastJSONParser
+from config.renderers import FastJSONRenderer
+from config.query_budgets import PRESUPUESTOS, es_consulta, presupuesto
+from users.cache import user_principals
+from users.email_service import send_email
+from users.hash_pool import HashPool
+from users.models import User, Materia, RateLimitCounter, RecoveryCode
+from users.streaming import stream_json
+from .models import Task, Submission
+from .serializers import SubmissionListSerializer, StudentBasicSerializer, SubmissionStudentSerializer
+from .stats import grade_stats
+from . import snapshots
+from .snapshots import AGRUPACIONES, GradebookSnapshot, escribir_snapshot, resumen_por_grupo
+from .events import EventBroker, event_broker
+from .datasets import crear_dataset
+from .management.commands.benchmark_endpoints import (
+    CODIGO_RECUPERACION, EXTERNOS, INSCRIPCIONES_BULK, casos_endpoints, rutas_nombradas,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def _contenido(response):
+    if getattr(response, 'streaming', False):
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProjectionParityTests(TestCase):
+    """La ruta de lectura por proyecciones debe producir los mismos bytes que los serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(
+            'D001', 'docente@buap.mx', 'Clave123!', nombre_completo='Docente Uno', rol='docente', carrera='ICC'
+        )
+        for i in range(5):
+            User.objects.create_user(
+                f'2026{i:04d}', f'est{i}@buap.mx', 'Clave123!',
+                nombre_completo=f'Estudiante Ñandú {i}', rol='estudiante', carrera='ICC' if i % 2 else 'LCC'
+            )
+        cls.tarea = Task.objects.create(
+            titulo='Práctica 1',
+            descripcion='Descripción con acentos — y símbolos',
+            fecha_entrega=timezone.now() + timedelta(days=3),
+            docente=cls.docente,
+            url_recurso='https://buap.mx/recurso',
+            archivo_adjunto=SimpleUploadedFile('enunciado.pdf', b'%PDF'),
+        )
+        cls.tarea.estado = 'activa'
+        cls.tarea.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Una entrega con archivos y calificada, el resto pendientes
+        self.client.post(
+            f'/api/my-tasks/{self.tarea.id}/submit/',
+            {'archivos': [SimpleUploadedFile('reporte.pdf', b'%PDF'), SimpleUploadedFile('código.py', b'print()')]},
+            HTTP_X_USER_ID='20260001',
+        )
+        entrega = Submission.objects.get(task=self.tarea, student_id='20260001')
+        entrega.calificacion = 9
+        entrega.comentario_docente = 'Bien hecho'
+        entrega.fecha_calificacion = timezone.now()
+        entrega.estado = 'calificado'
+        entrega.save()
+
+    def test_task_submissions(self):
+        response = self.client.get(f'/api/tasks/{self.tarea.id}/submissions/')
+        submissions = self.tarea.submissions.all().select_related('student').prefetch_related('archivos')
+        esperado = JSONRenderer().render({
+            'success': True,
+            'tarea': self.tarea.titulo,
+            'submissions': SubmissionListSerializer(submissions, many=True).data,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_contenido(response), esperado)
+
+    def test_students_list(self):
+        response = self.client.get('/api/students/')
+        estudiantes = User.objects.filter(rol='estudiante', is_active=True)
+        esperado = JSONRenderer().render({
+            'success': True,
+            'estudiantes': StudentBasicSerializer(estudiantes, many=True).data,
+            'total': estudiantes.count(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_contenido(response), esperado)
+
+    def test_my_task_detail(self):
+        for student_id in ('20260001', '20260002'):
+            response = self.client.get(f'/api/my-tasks/{self.tarea.id}/', HTTP_X_USER_ID=student_id)
+            request = RequestFactory().get(f'/api/my-tasks/{self.tarea.id}/')
+            entrega = Submission.objects.get(task=self.tarea, student_id=student_id)
+            esperado = JSONRenderer().render({
+                'success': True,
+                'submission': SubmissionStudentSerializer(entrega, context={'request': request}).data,
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(_contenido(response), esperado)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GradesExportTests(TestCase):
+    """Exportación del reporte de calificaciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(
+            'D001', 'docente@buap.mx', 'Clave123!', nombre_completo='Docente Uno', rol='docente', carrera='ICC'
+        )
+        for i in range(3):
+            User.objects.create_user(
+                f'2026{i:04d}', f'est{i}@buap.mx', 'Clave123!',
+                nombre_completo=f'Estudiante {i}', rol='estudiante', carrera='ICC'
+            )
+        cls.tarea = Task.objects.create(
+            titulo='Práctica 1', descripcion='-', fecha_entrega=timezone.now() + timedelta(days=3), docente=cls.docente
+        )
+        cls.tarea.estado = 'activa'
+        cls.tarea.save()
+        Submission.objects.filter(task=cls.tarea, student_id='20260000').update(calificacion=8, estado='calificado')
+        Submission.objects.filter(task=cls.tarea, student_id='20260001').update(calificacion=10, estado='calificado')
+
+    def test_csv(self):
+        response = self.client.get('/api/reports/grades/export/?format=csv', HTTP_X_USER_ID='D001')
+        self.assertEqual(response.status_code, 200)
+        contenido = _contenido(response)
+        self.assertTrue(contenido.startswith(b'\xef\xbb\xbf'))
+        lineas = contenido.decode('utf-8-sig').splitlines()
+        self.assertEqual(lineas[0], 'Matrícula,Nombre,Correo,Carrera,Práctica 1,Práctica 1 (tardía),Promedio')
+        self.assertEqual(lineas[1], '20260000,Estudiante 0,est0@buap.mx,ICC,8,,8.0')
+        self.assertEqual(lineas[-1], ',Promedio por tarea,,,9.0,0,')
+
+    def test_formato_invalido(self):
+        response = self.client.get('/api/reports/grades/export/?format=pdf', HTTP_X_USER_ID='D001')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, EMAIL_ENABLED=False)
+class GradeStatsTests(TestCase):
+    """Las estadísticas vectorizadas deben coincidir con el cálculo directo en Python"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(
+            'D001', 'docente@buap.mx', 'Clave123!', nombre_completo='Docente Uno', rol='docente', carrera='ICC'
+        )
+        for i in range(7):
+            User.objects.create_user(
+                f'2026{i:04d}', f'est{i}@buap.mx', 'Clave123!',
+                nombre_completo=f'Estudiante {i}', rol='estudiante', carrera='ICC'
+            )
+        cls.tareas = []
+        for t, calificaciones in enumerate([(10, 7, 7, 3, 9, None, None), (8, None, 5, 6, 10, 10, 1)]):
+            tarea = Task.objects.create(
+                titulo=f'Tarea {t}', descripcion='-', fecha_entrega=timezone.now() + timedelta(days=3), docente=cls.docente
+            )
+            tarea.estado = 'activa'
+            tarea.save()
+            for i, calificacion in enumerate(calificaciones):
+                if calificacion is not None:
+                    Submission.objects.filter(task=tarea, student_id=f'2026{i:04d}').update(
+                        calificacion=calificacion, estado='calificado'
+                    )
+            cls.tareas.append((tarea, [c for c in calificaciones if c is not None]))
+
+    def setUp(self):
+        grade_stats.clear()
+
+    def test_por_tarea(self):
+        import numpy as np
+
+        response = self.client.get('/api/reports/grades/stats/', HTTP_X_USER_ID='D001')
+        self.assertEqual(response.status_code, 200)
+
+        for (tarea, calificaciones), stats in zip(self.tareas, response.json()['por_tarea']):
+            self.assertEqual(stats['id'], tarea.id)
+            self.assertEqual(stats['calificadas'], len(calificaciones))
+            self.assertEqual(stats['promedio'], round(statistics.mean(calificaciones), 2))
+            self.assertEqual(stats['mediana'], round(statistics.median(calificaciones), 2))
+            self.assertEqual(stats['desviacion_estandar'], round(statistics.pstdev(calificaciones), 2))
+            self.assertEqual(stats['percentiles']['p90'], round(float(np.percentile(calificaciones, 90)), 2))
+            self.assertEqual(sum(stats['histograma'].values()), len(calificaciones))
+
+    def test_invalidar_solo_lee_el_docente(self):
+        tarea, _ = self.tareas[0]
+        entrega = Submission.objects.get(task=tarea, student_id='20260005')
+        with CaptureQueriesContext(connection) as capturadas:
+            entrega.save(update_fields=['comentario_docente'])
+        selects = [q['sql'] for q in capturadas.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('titulo', selects[0])
+
+    def test_se_invalida_al_calificar(self):
+        self.client.get('/api/reports/grades/stats/', HTTP_X_USER_ID='D001')
+        tarea, calificaciones = self.tareas[0]
+        entrega = Submission.objects.get(task=tarea, student_id='20260005')
+        entrega.estado = 'entregado'
+        entrega.save()
+
+        self.client.post(f'/api/submissions/{entrega.id}/grade/', {'calificacion': 4}, content_type='application/json')
+
+        stats = self.client.get('/api/reports/grades/stats/', HTTP_X_USER_ID='D001').json()['por_tarea'][0]
+        self.assertEqual(stats['calificadas'], len(calificaciones) + 1)
+        self.assertEqual(stats['promedio'], round(statistics.mean(calificaciones + [4]), 2))
+
+
+class TaskMateriaRosterTests(TestCase):
+    """Al activar una tarea con materia solo se asigna a los inscritos en ella"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(
+            'D001', 'docente@buap.mx', 'Clave123!', nombre_completo='Docente Uno', rol='docente', carrera='ICC'
+        )
+        cls.materia = Materia.objects.create(codigo='ICC-T1', nombre='Materia de prueba', nrc='99901')
+        otra = Materia.objects.create(codigo='ICC-T2', nombre='Otra materia', nrc='99902')
+        cls.docente.materias_docente.add(cls.materia)
+        for i in range(6):
+            estudiante = User.objects.create_user(
+                f'2026{i:04d}', f'est{i}@buap.mx', 'Clave123!',
+                nombre_completo=f'Estudiante {i}', rol='estudiante', carrera='ICC'
+            )
+            estudiante.materias_estudiante.add(cls.materia if i < 3 else otra)
+
+    def _crear_tarea(self, **datos):
+        return self.client.post('/api/tasks/', {
+            'titulo': 'Práctica', 'descripcion': '-', 'puntos_maximos': 10,
+            'fecha_entrega': (timezone.now() + timedelta(days=3)).isoformat(), **datos
+        }, content_type='application/json', HTTP_X_USER_ID='D001')
+
+    def _activar(self, tarea_id):
+        # Igual que task_activate, sin el hilo de notificaciones por email
+        tarea = Task.objects.get(id=tarea_id)
+        tarea.estado = 'activa'
+        tarea.save()
+
+    def test_activar_con_materia(self):
+        tarea_id = self._crear_tarea(materia=self.materia.id).json()['tarea']['id']
+        self._activar(tarea_id)
+
+        asignados = set(Submission.objects.filter(task_id=tarea_id).values_list('student_id', flat=True))
+        self.assertEqual(asignados, {'20260000', '20260001', '20260002'})
+
+        filas = json.loads(_contenido(self.client.get('/api/reports/grades/', HTTP_X_USER_ID='D001')))['reporte']
+        self.assertEqual([f['estudiante']['id_usuario'] for f in filas], ['20260000', '20260001', '20260002'])
+
+    def test_sin_materia_asigna_a_todos(self):
+        tarea_id = self._crear_tarea().json()['tarea']['id']
+        self._activar(tarea_id)
+        self.assertEqual(Submission.objects.filter(task_id=tarea_id).count(), 6)
+
+    def test_materia_que_no_imparte(self):
+        otra = Materia.objects.get(codigo='ICC-T2')
+        self.assertEqual(self._crear_tarea(materia=otra.id).status_code, 400)
+
+    def _detalle(self, tarea_id, etag=None, **extra):
+        if etag:
+            extra['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(f'/api/tasks/{tarea_id}/', HTTP_X_USER_ID='D001', **extra)
+
+    def test_etag_del_detalle(self):
+        tarea_id = self._crear_tarea(materia=self.materia.id).json()['tarea']['id']
+        etag = self._detalle(tarea_id)['ETag']
+        self.assertEqual(self._detalle(tarea_id, etag).status_code, 304)
+        # archivo_adjunto es relativo: el host no separa la caché
+        self.assertEqual(self._detalle(tarea_id, etag, HTTP_HOST='otro.example.com').status_code, 304)
+
+        self.client.put(f'/api/tasks/{tarea_id}/', {'titulo': 'Práctica editada'},
+                        content_type='application/json', HTTP_X_USER_ID='D001')
+        response = self._detalle(tarea_id, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tarea']['titulo'], 'Práctica editada')
+
+    def test_etag_del_detalle_cambia_al_renombrar_la_materia(self):
+        tarea_id = self._crear_tarea(materia=self.materia.id).json()['tarea']['id']
+        etag = self._detalle(tarea_id)['ETag']
+
+        self.materia.nombre = 'Materia renombrada'
+        self.materia.save()
+        response = self._detalle(tarea_id, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tarea']['materia_nombre'], 'Materia renombrada')
+
+    def test_activar_encola_un_email_por_estudiante(self):
+        tarea_id = self._crear_tarea(materia=self.materia.id).json()['tarea']['id']
+        with mock.patch('tareas.views.email_queue') as cola:
+            response = self.client.post(f'/api/tasks/{tarea_id}/activate/', HTTP_X_USER_ID='D001')
+        self.assertEqual(response.status_code, 200)
+        correos = {llamada.kwargs['correo'] for llamada in cola.encolar_al_commit.call_args_list}
+        self.assertEqual(correos, {'est0@buap.mx', 'est1@buap.mx', 'est2@buap.mx'})
+
+
+class GradebookSnapshotTests(TestCase):
+    """La analítica sobre el snapshot debe coincidir con lo que hay en la base de datos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for d in range(2):
+            docente = User.objects.create_user(
+                f'D00{d}', f'docente{d}@buap.mx', 'Clave123!', nombre_completo=f'Docente {d}', rol='docente', carrera='ICC'
+            )
+            if d == 0:
+                for i in range(4):
+                    User.objects.create_user(
+                        f'2026{i:04d}', f'est{i}@buap.mx', 'Clave123!',
+                        nombre_completo=f'Estudiante {i}', rol='estudiante', carrera='ICC'
+                    )
+            tarea = Task.objects.create(
+                titulo=f'Tarea {d}', descripcion='-', fecha_entrega=timezone.now() + timedelta(days=3), docente=docente
+            )
+            tarea.estado = 'activa'
+            tarea.save()
+            Submission.objects.filter(task=tarea, student_id='20260000').update(calificacion=6 + d, estado='calificado')
+            Submission.objects.filter(task=tarea, student_id='20260001').update(calificacion=10, estado='calificado')
+
+    def test_resumen_por_docente(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+
+        with override_settings(GRADEBOOK_SNAPSHOT_DIR=directorio):
+            manifest = escribir_snapshot()
+            self.assertEqual(manifest['filas'], Submission.objects.count())
+
+            with self.assertNumQueries(0):
+                response = self.client.get('/api/analytics/gradebook/?agrupar=docente')
+
+        resultados = {r['docente_id']: r for r in response.json()['resultados']}
+        self.assertEqual(resultados['D000']['promedio'], 8.0)
+        self.assertEqual(resultados['D001']['promedio'], 8.5)
+        self.assertEqual(resultados['D001']['entregas'], 4)
+        self.assertEqual(resultados['D001']['calificadas'], 2)
+
+    def test_resumen_por_rebanadas(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        snapshot = GradebookSnapshot(Path(directorio) / escribir_snapshot(directorio)['nombre'])
+
+        for agrupar in AGRUPACIONES:
+            with self.subTest(agrupar=agrupar):
+                completo = resumen_por_grupo(snapshot, agrupar)
+                with mock.patch.object(snapshots, 'FILAS_POR_REBANADA', 3):
+                    self.assertEqual(resumen_por_grupo(snapshot, agrupar), completo)
+                self.assertEqual(sum(r['entregas'] for r in completo), snapshot.manifest['filas'])
+
+
+@override_settings(EMAIL_ENABLED=False)
+class EventBrokerTests(TestCase):
+    """Eventos SSE publicados desde las señales de los modelos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(
+            'D001', 'docente@buap.mx', 'Clave123!', nombre_completo='Docente Uno', rol='docente', carrera='ICC'
+        )
+        User.objects.create_user(
+            '20260000', 'est0@buap.mx', 'Clave123!', nombre_completo='Estudiante 0', rol='estudiante', carrera='ICC'
+        )
+        cls.tarea = Task.objects.create(
+            titulo='Práctica 1', descripcion='-', fecha_entrega=timezone.now() + timedelta(days=3), docente=cls.docente
+        )
+        cls.tarea.estado = 'activa'
+        cls.tarea.save()
+
+    def _suscribir(self, broker, usuario_id):
+        # Las suscripciones pertenecen a un event loop (el de la conexión ASGI)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def _crear():
+            return broker.suscribir(usuario_id)
+
+        suscripcion = loop.run_until_complete(_crear())
+        self.addCleanup(broker.cancelar, suscripcion)
+        return suscripcion
+
+    def test_calificar_notifica_al_estudiante(self):
+        suscripcion = self._suscribir(event_broker, '20260000')
+        entrega = Submission.objects.get(task=self.tarea, student_id='20260000')
+        Submission.objects.filter(pk=entrega.pk).update(estado='entregado')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/submissions/{entrega.id}/grade/', {'calificacion': 8}, content_type='application/json')
+
+        eventos, desbordado = suscripcion.tomar()
+        self.assertFalse(desbordado)
+        self.assertEqual([(e['tipo'], e['submission_id'], e['calificacion']) for e in eventos],
+                         [('entrega_calificada', entrega.id, 8)])
+
+    def test_guardar_sin_cambiar_la_calificacion(self):
+        suscripcion = self._suscribir(event_broker, '20260000')
+        entrega = Submission.objects.get(task=self.tarea, student_id='20260000')
+        Submission.objects.filter(pk=entrega.pk).update(estado='calificado', calificacion=9)
+
+        entrega = Submission.objects.get(pk=entrega.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            entrega.comentario_docente = 'Buen trabajo'
+            entrega.save()
+            entrega.calificacion = 10
+            entrega.save()
+
+        eventos, _ = suscripcion.tomar()
+        self.assertEqual([e['calificacion'] for e in eventos], [10])
+
+    def test_buffer_acotado(self):
+        broker = EventBroker(max_eventos=2)
+        suscripcion = self._suscribir(broker, '20260000')
+        for i in range(3):
+            broker.publicar(['20260000', 'otro'], 'tarea_activada', task_id=i)
+
+        eventos, desbordado = suscripcion.tomar()
+        self.assertTrue(desbordado)
+        self.assertEqual([e['task_id'] for e in eventos], [1, 2])
+
+    def test_wsgi_sin_flujo(self):
+        response = self.client.get('/api/events/', {'user_id': '20260000', 'rol': 'estudiante'})
+        self.assertEqual(response.status_code, 204)
+
+    def test_valida_usuario_y_rol(self):
+        self.assertEqual(self.client.get('/api/events/', {'user_id': '20260000'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/events/', {'user_id': 'X999', 'rol': 'estudiante'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/events/', {'user_id': '20260000', 'rol': 'docente'}).status_code, 403)
+        self.assertEqual(self.client.get('/api/events/', {'user_id': 'D001', 'rol': 'docente'}).status_code, 204)
+
+        estudiante = User.objects.get(id_usuario='20260000')
+        # La caché de principales es del proceso: no se revierte con la transacción del test
+        self.addCleanup(user_principals.invalidate, '20260000')
+        estudiante.is_active = False
+        estudiante.save(update_fields=['is_active'])
+        response = self.client.get('/api/events/', {'user_id': '20260000', 'rol': 'estudiante'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+
+
+def _consultas_de_la_vista(capturadas):
+    """Consultas capturadas sin control de transacción ni las del limitador (no cuentan para el presupuesto)"""
+    limitador = RateLimitCounter._meta.db_table
+    return sum(1 for q in capturadas.captured_queries if es_consulta(q['sql']) and limitador not in q['sql'])
+
+
+# Con el stack de middleware por defecto (limitador incluido): así corre en producción
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, EMAIL_ENABLED=False)
+class BenchmarkEndpointsTests(TestCase):
+    """Los casos de benchmark_endpoints cubren todas las rutas, responden lo esperado y respetan su presupuesto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Varias tareas por docente y varias calificadas por estudiante: un N+1 se pasa del presupuesto
+        cls.dataset = crear_dataset(40, 12)
+        RecoveryCode.objects.create(
+            user_id=cls.dataset['estudiante_id'], code=CODIGO_RECUPERACION, expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_todas_las_rutas_tienen_caso_y_presupuesto(self):
+        casos = casos_endpoints(self.dataset)
+        self.assertEqual(rutas_nombradas() - {url_name for _, url_name, _, _ in casos}, set())
+        self.assertEqual(rutas_nombradas() - set(PRESUPUESTOS), set())
+
+    def test_dataset(self):
+        self.assertEqual(Submission.objects.count(), self.dataset['entregas'])
+        self.assertEqual(Task.objects.filter(estado='borrador').count(), 1)
+        self.assertEqual(
+            Submission.objects.get(id=self.dataset['entrega_pendiente_id']).student_id, self.dataset['estudiante_id']
+        )
+
+    def test_casos_responden_dentro_del_presupuesto(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        borrador = Task.objects.get(id=self.dataset['tarea_borrador_id'])
+        # N de los presupuestos que dependen de la petición
+        n_por_ruta = {
+            'task-activate': User.objects.filter(materias_estudiante=borrador.materia_id).count(),
+            'submit-task': 1,
+            'get-users': User.objects.count(),
+            'bulk-update-materias': min(INSCRIPCIONES_BULK, self.dataset['estudiantes']),
+        }
+
+        with override_settings(GRADEBOOK_SNAPSHOT_DIR=directorio):
+            escribir_snapshot()
+            for nombre, url_name, esperado, peticion in casos_endpoints(self.dataset):
+                if url_name in EXTERNOS:
+                    continue
+                with self.subTest(caso=nombre), transaction.atomic():
+                    with CaptureQueriesContext(connection) as capturadas:
+                        response = peticion(self.client)
+                        _contenido(response)
+                    self.assertEqual(response.status_code, esperado)
+                    consultas = _consultas_de_la_vista(capturadas)
+                    self.assertLessEqual(consultas, presupuesto(url_name, n_por_ruta.get(url_name)))
+                    transaction.set_rollback(True)
+
+    def test_headers_de_metricas(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.get('/api/my-submissions/', headers={'X-User-Id': self.dataset['estudiante_id']})
+        consultas = sum(1 for q in capturadas.captured_queries if es_consulta(q['sql']))
+        self.assertEqual(response['X-Query-Count'], str(consultas))
+        self.assertRegex(response['Server-Timing'], rf'^db;dur=[\d.]+;desc="{consultas} consultas", app;dur=[\d.]+$')
+
+    def test_headers_sin_consultas_del_limitador(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.post('/api/login', {
+                'id_usuario': self.dataset['estudiante_id'], 'password': 'incorrecta',
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(any(RateLimitCounter._meta.db_table in q['sql'] for q in capturadas.captured_queries))
+        self.assertEqual(response['X-Query-Count'], str(_consultas_de_la_vista(capturadas)))
+        self.assertLessEqual(int(response['X-Query-Count']), presupuesto('login'))
+
+    def test_advertencia_si_se_pasa_del_presupuesto(self):
+        with override_settings(QUERY_BUDGET_WARNINGS=True), \
+                mock.patch.dict(PRESUPUESTOS, {'my-submissions': 0}), \
+                self.assertLogs('config.middleware', level='WARNING') as logs:
+            self.client.get('/api/my-submissions/', headers={'X-User-Id': self.dataset['estudiante_id']})
+        self.assertRegex(logs.output[0], r'GET my-submissions: \d+ consultas \(presupuesto 0,')
+
+
+@skipIf(renderers.orjson is None, 'orjson no está instalado')
+class FastJSONTests(TestCase):
+    """FastJSONRenderer/FastJSONParser se comportan igual que los de DRF"""
+
+    def test_mismos_bytes_que_json_renderer(self):
+        mexico = ZoneInfo('America/Mexico_City')
+        datos = {
+            'fechas': [
+                datetime(2026, 10, 19, 12, 30, tzinfo=dt_timezone.utc),
+                datetime(2026, 10, 19, 12, 30, 0, 123, tzinfo=ZoneInfo('UTC')),
+                datetime(2026, 10, 19, 6, 30, tzinfo=mexico),
+                datetime(2026, 10, 19, 6, 30, 15, 500000),
+                date(2026, 10, 19), time(8, 15), time(8, 15, 0, 42),
+            ],
+            'decimal': Decimal('9.75'),
+            'lazy': gettext_lazy('Tarea calificada'),
+            'separadores': 'línea\u2028párrafo\u2029fin',
+            'texto': 'Ñandú — "comillas" \\ </script>',
+            'claves': {1: 'uno', 2.5: 'dos'},
+            'vacio': None,
+        }
+        esperado = JSONRenderer().render(datos)
+        self.assertEqual(FastJSONRenderer().render(datos), esperado)
+        self.assertEqual(renderers.dumps(datos), esperado)
+
+    def test_sangria(self):
+        datos = {'a': [1, 2], 'fecha': datetime(2026, 1, 1, tzinfo=dt_timezone.utc)}
+        self.assertEqual(
+            FastJSONRenderer().render(datos, 'application/json; indent=2'),
+            JSONRenderer().render(datos, 'application/json; indent=2'),
+        )
+
+    def _parsear(self, contenido, encoding='utf-8'):
+        return FastJSONParser().parse(io.BytesIO(contenido), 'application/json', {'encoding': encoding})
+
+    def test_parser(self):
+        self.assertEqual(self._parsear('{"nombre": "Ñandú"}'.encode('utf-8')), {'nombre': 'Ñandú'})
+        self.assertEqual(self._parsear('{"nombre": "\xd1and\xfa"}'.encode('latin-1'), 'latin-1'),
+                         {'nombre': 'Ñandú'})
+        for contenido in (b'{', b'', b'{"a": NaN}', b'\xff\xfe'):
+            with self.subTest(contenido=contenido), self.assertRaises(ParseError) as error:
+                self._parsear(contenido)
+            self.assertTrue(str(error.exception.detail).startswith('JSON parse error - '))
+
+    def test_json_invalido_responde_400(self):
+        response = self.client.patch('/api/users/materias', data=b'{"id_usuario": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['detail'].startswith('JSON parse error - '))
+
+
+class AsgiStreamingTests(TestCase):
+    """Bajo ASGI el streaming síncrono se envía por bloques y los errores de DRF conservan su forma"""
+
+    def _recoger(self, response):
+        async def recoger():
+            return [parte async for parte in response]
+        return asyncio.run(recoger())
+
+    def test_stream_json_por_bloques(self):
+        producidas = []
+
+        def filas():
+            for i in range(2000):
+                producidas.append(i)
+                yield {'id': i, 'nombre': f'fila {i}'}
+
+        esperado = b''.join(stream_json(({'id': i, 'nombre': f'fila {i}'} for i in range(2000)), 'filas'))
+        response = async_views.adaptar_streaming(
+            AsyncRequestFactory().get('/api/users'), stream_json(filas(), 'filas')
+        )
+        self.assertTrue(response.is_async)
+
+        with mock.patch.object(async_views, 'BLOQUE_STREAMING', 1024):
+            partes = self._recoger(response)
+        self.assertGreater(len(partes), 1)
+        self.assertEqual(b''.join(partes), esperado)
+        self.assertEqual(len(producidas), 2000)
+
+    def test_wsgi_sin_cambios(self):
+        response = async_views.adaptar_streaming(RequestFactory().get('/api/users'), stream_json(iter([]), 'filas'))
+        self.assertFalse(response.is_async)
+
+    def test_excepciones_de_drf(self):
+        @async_views.async_api_view(['GET'])
+        async def vista(request):
+            raise NotFound('Tarea no encontrada')
+
+        response = asyncio.run(vista(AsyncRequestFactory().get('/api/x')))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {'detail': 'Tarea no encontrada'})
+
+
+@skipIf(metrics.prometheus_client is None, 'prometheus_client no está instalado')
+class PrometheusMetricsTests(TestCase):
+    """/metrics y los puntos donde se registran las métricas"""
+
+    def _muestra(self, nombre, **etiquetas):
+        return metrics.prometheus_client.REGISTRY.get_sample_value(nombre, etiquetas) or 0
+
+    def test_latencia_por_ruta_y_estado(self):
+        etiquetas = {'view': 'hash-pool-stats', 'method': 'GET', 'status': '200'}
+        antes = self._muestra('sistema_http_request_duration_seconds_count', **etiquetas)
+        sin_ruta = self._muestra('sistema_http_request_duration_seconds_count', view='sin_ruta', method='GET', status='404')
+
+        self.client.get('/api/hash-pool-stats')
+        self.client.get('/api/no-existe/123')
+
+        self.assertEqual(self._muestra('sistema_http_request_duration_seconds_count', **etiquetas), antes + 1)
+        self.assertEqual(
+            self._muestra('sistema_http_request_duration_seconds_count', view='sin_ruta', method='GET', status='404'),
+            sin_ruta + 1,
+        )
+        with override_settings(DEBUG=True):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'sistema_db_query_duration_seconds_bucket{', response.content)
+        self.assertIn(b'view="hash-pool-stats"', response.content)
+
+    def test_emails_por_tipo_y_resultado(self):
+        antes = self._muestra('sistema_emails_total', tipo='task_reminder', resultado='omitido')
+        with override_settings(EMAIL_ENABLED=False):
+            self.assertFalse(send_email('a@b.mx', 'Asunto', '<p>x</p>', email_type='task_reminder'))
+        self.assertEqual(self._muestra('sistema_emails_total', tipo='task_reminder', resultado='omitido'), antes + 1)
+
+    def test_verificacion_de_password(self):
+        antes = self._muestra('sistema_password_verify_seconds_count')
+        pool = HashPool(workers=1)
+        self.assertEqual(pool.run(lambda: 'ok'), 'ok')
+        self.assertEqual(self._muestra('sistema_password_verify_seconds_count'), antes + 1)
+
+    def test_duracion_de_recordatorios(self):
+        antes = self._muestra('sistema_reminders_run_duration_seconds_count', resultado='ok')
+        call_command('send_reminders', stdout=mock.MagicMock())
+        self.assertEqual(self._muestra('sistema_reminders_run_duration_seconds_count', resultado='ok'), antes + 1)
+
+    def test_token(self):
+        with override_settings(METRICS_TOKEN='secreto'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            response = self.client.get('/metrics', headers={'Authorization': 'Bearer secreto'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    def test_sin_token_solo_en_desarrollo(self):
+        with override_settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with override_settings(METRICS_TOKEN='', DEBUG=True, IS_PRODUCTION='railway'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with override_settings(METRICS_TOKEN='', DEBUG=True, IS_PRODUCTION=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
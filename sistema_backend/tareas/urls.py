@@ -13,6 +13,9 @@ urlpatterns = [
     # Calificaciones
     path('submissions/<int:submission_id>/grade/', views.grade_submission, name='grade-submission'),
     path('reports/grades/', views.grades_report, name='grades-report'),
+    path('reports/grades/stats/', views.grades_stats, name='grades-stats'),
+    path('reports/grades/export/', views.grades_export, name='grades-export'),
+    path('analytics/gradebook/', views.gradebook_analytics, name='gradebook-analytics'),
     
     # Estudiantes
     path('students/', views.students_list, name='students-list'),
@@ -22,4 +25,7 @@ urlpatterns = [
     path('my-tasks/<int:task_id>/', views.my_task_detail, name='my-task-detail'),
     path('my-tasks/<int:task_id>/submit/', views.submit_task, name='submit-task'),
     path('my-submissions/', views.my_submissions, name='my-submissions'),
+    
+    # ==================== EVENTOS (SSE) ====================
+    path('events/', views.events_stream, name='events-stream'),
 ]
@@ -1,9 +1,17 @@
 import threading
+import time
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Avg
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from config.async_views import async_api_view
+from config.renderers import dumps, json_response
+from django.db.models import Avg, Exists, OuterRef
 from .models import Task, Submission, SubmissionFile
 from .serializers import (
     TaskListSerializer, TaskCreateSerializer, TaskDetailSerializer,
@@ -11,9 +19,23 @@ from .serializers import (
     GradeSubmissionSerializer, SubmitFileSerializer, StudentBasicSerializer
 )
 from users.models import User
+from users.cache import get_principal
+from users.conditional import conditional_get
+from users.streaming import stream_json
+from .reports import tareas_reporte, iter_report_rows
+from .exports import csv_response, xlsx_response
+from .stats import grade_stats
+from .events import RESYNC, event_broker
+from .snapshots import AGRUPACIONES, snapshot_actual, resumen_por_grupo
+from .projections import atask_submissions_rows, students_rows, my_task_detail_row
+from .conditional import (
+    task_detail_validators, my_task_detail_validators, students_list_validators,
+)
+from users.email_queue import email_queue
 from users.email_service import (
-    send_task_assigned_email,
+    emails_habilitados,
     send_submission_received_email,
+    send_task_assigned_email,
     send_task_graded_email,
 )
 
@@ -35,9 +57,8 @@ def task_list_create(request):
             'message': 'Se requiere ID del docente'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        docente = User.objects.get(id_usuario=docente_id, rol='docente')
-    except User.DoesNotExist:
+    docente = get_principal(docente_id)
+    if docente is None or docente.rol != 'docente':
         return Response({
             'success': False,
             'message': 'Docente no encontrado'
@@ -46,22 +67,22 @@ def task_list_create(request):
     if request.method == 'GET':
         # Filtrar por estado si se especifica
         estado = request.query_params.get('estado')
-        tareas = Task.objects.filter(docente=docente)
+        tareas = Task.objects.filter(docente_id=docente.id_usuario)
         
         if estado:
             tareas = tareas.filter(estado=estado)
         
-        serializer = TaskListSerializer(tareas, many=True)
+        serializer = TaskListSerializer(TaskListSerializer.annotate_queryset(tareas), many=True)
         return Response({
             'success': True,
             'tareas': serializer.data
         })
     
     elif request.method == 'POST':
-        serializer = TaskCreateSerializer(data=request.data)
+        serializer = TaskCreateSerializer(data=request.data, context={'docente_id': docente.id_usuario})
         
         if serializer.is_valid():
-            tarea = serializer.save(docente=docente)
+            tarea = serializer.save(docente_id=docente.id_usuario)
             return Response({
                 'success': True,
                 'message': 'Tarea creada como borrador',
@@ -76,6 +97,7 @@ def task_list_create(request):
 
 
 @api_view(['GET', 'PUT', 'DELETE'])
+@conditional_get(task_detail_validators)
 def task_detail(request, task_id):
     """
     GET: Detalle de tarea con submissions
@@ -93,14 +115,14 @@ def task_detail(request, task_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     # Verificar que el docente sea el dueño
-    if docente_id and tarea.docente.id_usuario != docente_id:
+    if docente_id and tarea.docente_id != docente_id:
         return Response({
             'success': False,
             'message': 'No tienes permiso para acceder a esta tarea'
         }, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        serializer = TaskDetailSerializer(tarea)
+        serializer = TaskDetailSerializer(TaskDetailSerializer.prefetch(tarea))
         return Response({
             'success': True,
             'tarea': serializer.data
@@ -114,7 +136,9 @@ def task_detail(request, task_id):
                 'message': 'No se puede editar una tarea cerrada'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = TaskCreateSerializer(tarea, data=request.data, partial=True)
+        serializer = TaskCreateSerializer(
+            tarea, data=request.data, partial=True, context={'docente_id': tarea.docente_id}
+        )
         
         if serializer.is_valid():
             # Si la tarea está activa, solo permitir editar ciertos campos
@@ -157,7 +181,7 @@ def task_detail(request, task_id):
 @api_view(['POST'])
 def task_activate(request, task_id):
     """
-    POST: Activar tarea (crea submissions para todos los estudiantes)
+    POST: Activar tarea (crea submissions para los estudiantes de su materia, o para todos si no tiene)
     """
     docente_id = request.headers.get('X-User-Id') or request.query_params.get('docente_id')
     
@@ -169,7 +193,7 @@ def task_activate(request, task_id):
             'message': 'Tarea no encontrada'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    if docente_id and tarea.docente.id_usuario != docente_id:
+    if docente_id and tarea.docente_id != docente_id:
         return Response({
             'success': False,
             'message': 'No tienes permiso'
@@ -188,23 +212,23 @@ def task_activate(request, task_id):
     # Contar estudiantes asignados
     total_estudiantes = tarea.submissions.count()
 
-    # Notificar por email a todos los estudiantes asignados (en background)
-    def _notify_students():
+    # Notificar por email a todos los estudiantes asignados: un envío por
+    # estudiante en la cola de emails (hilos que cierran su conexión a la BD)
+    if emails_habilitados():
         fecha = tarea.fecha_entrega.strftime('%d/%m/%Y %H:%M') if tarea.fecha_entrega else 'Sin fecha'
-        for sub in tarea.submissions.select_related('student').all():
-            try:
-                send_task_assigned_email(
-                    nombre_completo=sub.student.nombre_completo,
-                    correo=sub.student.correo,
-                    titulo_tarea=tarea.titulo,
-                    descripcion=tarea.descripcion or '',
-                    fecha_entrega=fecha,
-                    docente_nombre=tarea.docente.nombre_completo,
-                )
-            except Exception as e:
-                print(f'[EMAIL] Error notificando a {sub.student.correo}: {e}')
-
-    threading.Thread(target=_notify_students, daemon=True).start()
+        docente = get_principal(tarea.docente_id)
+        docente_nombre = docente.nombre_completo if docente else 'Tu docente'
+        destinatarios = tarea.submissions.values_list('student__nombre_completo', 'student__correo')
+        for nombre_completo, correo in destinatarios:
+            email_queue.encolar_al_commit(
+                send_task_assigned_email,
+                nombre_completo=nombre_completo,
+                correo=correo,
+                titulo_tarea=tarea.titulo,
+                descripcion=tarea.descripcion or '',
+                fecha_entrega=fecha,
+                docente_nombre=docente_nombre,
+            )
 
     return Response({
         'success': True,
@@ -228,7 +252,7 @@ def task_close(request, task_id):
             'message': 'Tarea no encontrada'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    if docente_id and tarea.docente.id_usuario != docente_id:
+    if docente_id and tarea.docente_id != docente_id:
         return Response({
             'success': False,
             'message': 'No tienes permiso'
@@ -250,26 +274,23 @@ def task_close(request, task_id):
     })
 
 
-@api_view(['GET'])
-def task_submissions(request, task_id):
+@async_api_view(['GET'])
+async def task_submissions(request, task_id):
     """
-    GET: Lista de entregas de una tarea
+    GET: Lista de entregas de una tarea (vista async: ORM async bajo ASGI)
     """
     try:
-        tarea = Task.objects.get(id=task_id)
+        tarea = await Task.objects.only('id', 'titulo').aget(id=task_id)
     except Task.DoesNotExist:
-        return Response({
+        return json_response({
             'success': False,
             'message': 'Tarea no encontrada'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    submissions = tarea.submissions.all().select_related('student').prefetch_related('archivos')
-    serializer = SubmissionListSerializer(submissions, many=True)
-    
-    return Response({
+    return json_response({
         'success': True,
         'tarea': tarea.titulo,
-        'submissions': serializer.data
+        'submissions': await atask_submissions_rows(tarea.id)
     })
 
 
@@ -279,7 +300,7 @@ def grade_submission(request, submission_id):
     POST: Calificar una entrega
     """
     try:
-        submission = Submission.objects.get(id=submission_id)
+        submission = Submission.objects.select_related('task', 'student').get(id=submission_id)
     except Submission.DoesNotExist:
         return Response({
             'success': False,
@@ -315,7 +336,8 @@ def grade_submission(request, submission_id):
             except Exception as e:
                 print(f'[EMAIL] Error notificando calificación a {submission.student.correo}: {e}')
 
-        threading.Thread(target=_notify_graded, daemon=True).start()
+        if emails_habilitados():
+            threading.Thread(target=_notify_graded, daemon=True).start()
 
         return Response({
             'success': True,
@@ -343,88 +365,153 @@ def grades_report(request):
             'message': 'Se requiere ID del docente'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Obtener tareas del docente que estén activas o cerradas
-    tareas = Task.objects.filter(
-        docente__id_usuario=docente_id,
-        estado__in=['activa', 'cerrada']
-    ).order_by('fecha_creacion')
-    
-    # Obtener todos los estudiantes
-    estudiantes = User.objects.filter(rol='estudiante', is_active=True)
-    
-    # Construir reporte
-    reporte = []
-    for estudiante in estudiantes:
-        fila = {
-            'estudiante': StudentBasicSerializer(estudiante).data,
-            'tareas': [],
-            'promedio': None
-        }
-        
-        calificaciones = []
-        for tarea in tareas:
-            try:
-                submission = Submission.objects.get(task=tarea, student=estudiante)
-                tarea_data = {
-                    'id': tarea.id,
-                    'titulo': tarea.titulo,
-                    'estado_entrega': submission.estado,
-                    'calificacion': submission.calificacion,
-                    'es_tardia': submission.archivos.filter(es_entrega_tardia=True).exists() if submission.tiene_entregas else False
-                }
-                if submission.calificacion:
-                    calificaciones.append(submission.calificacion)
-            except Submission.DoesNotExist:
-                tarea_data = {
-                    'id': tarea.id,
-                    'titulo': tarea.titulo,
-                    'estado_entrega': 'no_asignado',
-                    'calificacion': None,
-                    'es_tardia': False
-                }
-            
-            fila['tareas'].append(tarea_data)
-        
-        if calificaciones:
-            fila['promedio'] = round(sum(calificaciones) / len(calificaciones), 2)
-        
-        reporte.append(fila)
+    # Tareas del docente que estén activas o cerradas (columnas del reporte)
+    tareas = tareas_reporte(docente_id)
+    
+    # Las filas se generan por bloques de estudiantes y se envían en streaming
+    return stream_json(
+        iter_report_rows(tareas),
+        'reporte',
+        antes={
+            'success': True,
+            'tareas_headers': [{'id': t['id'], 'titulo': t['titulo']} for t in tareas],
+        },
+    )
+
+
+@api_view(['GET'])
+def grades_stats(request):
+    """
+    GET: Estadísticas de calificaciones por tarea y por estudiante
+    (promedio, mediana, desviación estándar, percentiles, histograma 1-10, tasa de tardías)
+    """
+    docente_id = request.headers.get('X-User-Id') or request.query_params.get('docente_id')
+    
+    if not docente_id:
+        return Response({
+            'success': False,
+            'message': 'Se requiere ID del docente'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        estadisticas = grade_stats.get(docente_id)
+    except ImportError:
+        return Response({
+            'success': False,
+            'message': 'Las estadísticas requieren numpy instalado en el servidor'
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
     
     return Response({
         'success': True,
-        'tareas_headers': [{'id': t.id, 'titulo': t.titulo} for t in tareas],
-        'reporte': reporte
+        **estadisticas
     })
 
 
-# ==================== ENDPOINTS ESTUDIANTE ====================
-
 @api_view(['GET'])
-def my_tasks(request):
+def gradebook_analytics(request):
     """
-    GET: Lista de tareas asignadas al estudiante
+    GET: Analítica semestral sobre el snapshot columnar (no consulta la base de datos)
+    ?agrupar=docente|tarea|materia|estudiante
     """
-    student_id = request.headers.get('X-User-Id') or request.query_params.get('student_id')
+    agrupar = request.query_params.get('agrupar', 'docente')
     
-    if not student_id:
+    if agrupar not in AGRUPACIONES:
         return Response({
             'success': False,
-            'message': 'Se requiere ID del estudiante'
+            'message': f"Agrupación no válida. Opciones: {', '.join(AGRUPACIONES)}"
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        estudiante = User.objects.get(id_usuario=student_id, rol='estudiante')
-    except User.DoesNotExist:
+        snapshot = snapshot_actual()
+    except ImportError:
+        return Response({
+            'success': False,
+            'message': 'La analítica requiere numpy instalado en el servidor'
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+    
+    if snapshot is None:
         return Response({
+            'success': False,
+            'message': 'Todavía no hay snapshot. Ejecuta: python manage.py snapshot_gradebook'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'success': True,
+        'snapshot': {
+            'nombre': snapshot.manifest['nombre'],
+            'generado': snapshot.manifest['generado'],
+            'filas': snapshot.manifest['filas'],
+        },
+        'agrupar': agrupar,
+        'resultados': resumen_por_grupo(snapshot, agrupar),
+    })
+
+
+@require_GET
+def grades_export(request):
+    """
+    GET: Exportar el reporte de calificaciones (?format=csv|xlsx)
+    Vista de Django (no DRF): DRF reserva el parámetro `format` para sus renderers.
+    """
+    docente_id = request.headers.get('X-User-Id') or request.GET.get('docente_id')
+    formato = request.GET.get('format', 'csv').lower()
+    
+    if not docente_id:
+        return JsonResponse({
+            'success': False,
+            'message': 'Se requiere ID del docente'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if formato not in ('csv', 'xlsx'):
+        return JsonResponse({
+            'success': False,
+            'message': 'Formato no soportado. Usa csv o xlsx'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    tareas = tareas_reporte(docente_id)
+    nombre_archivo = f"calificaciones_{docente_id}_{timezone.localdate().strftime('%Y%m%d')}"
+    
+    if formato == 'csv':
+        return csv_response(tareas, nombre_archivo)
+    
+    try:
+        return xlsx_response(tareas, nombre_archivo)
+    except ImportError:
+        return JsonResponse({
+            'success': False,
+            'message': 'La exportación a Excel requiere openpyxl instalado en el servidor'
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+
+# ==================== ENDPOINTS ESTUDIANTE ====================
+
+@async_api_view(['GET'])
+async def my_tasks(request):
+    """
+    GET: Lista de tareas asignadas al estudiante (vista async: ORM async bajo ASGI)
+    """
+    student_id = request.headers.get('X-User-Id') or request.GET.get('student_id')
+    
+    if not student_id:
+        return json_response({
+            'success': False,
+            'message': 'Se requiere ID del estudiante'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    estudiante = await sync_to_async(get_principal)(student_id)
+    if estudiante is None or estudiante.rol != 'estudiante':
+        return json_response({
             'success': False,
             'message': 'Estudiante no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
     
     # Obtener submissions del estudiante (tareas activas y cerradas)
-    submissions = Submission.objects.filter(
-        student=estudiante,
-        task__estado__in=['activa', 'cerrada']
-    ).select_related('task').prefetch_related('archivos').order_by('-task__fecha_entrega')
+    submissions = [
+        sub async for sub in Submission.objects.filter(
+            student_id=estudiante.id_usuario,
+            task__estado__in=['activa', 'cerrada']
+        ).select_related('task').prefetch_related('archivos').order_by('-task__fecha_entrega')
+    ]
     
     # Agrupar por estado
     pendientes = []
@@ -453,7 +540,7 @@ def my_tasks(request):
         else:
             calificadas.append(data)
     
-    return Response({
+    return json_response({
         'success': True,
         'pendientes': pendientes,
         'entregadas': entregadas,
@@ -463,6 +550,7 @@ def my_tasks(request):
 
 
 @api_view(['GET'])
+@conditional_get(my_task_detail_validators)
 def my_task_detail(request, task_id):
     """
     GET: Detalle de una tarea para el estudiante
@@ -475,22 +563,16 @@ def my_task_detail(request, task_id):
             'message': 'Se requiere ID del estudiante'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        submission = Submission.objects.get(
-            task_id=task_id,
-            student__id_usuario=student_id
-        )
-    except Submission.DoesNotExist:
+    submission = my_task_detail_row(task_id, student_id, request)
+    if submission is None:
         return Response({
             'success': False,
             'message': 'Tarea no encontrada o no asignada'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = SubmissionStudentSerializer(submission, context={'request': request})
-    
     return Response({
         'success': True,
-        'submission': serializer.data
+        'submission': submission
     })
 
 
@@ -624,18 +706,20 @@ def my_submissions(request):
             'message': 'Se requiere ID del estudiante'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        estudiante = User.objects.get(id_usuario=student_id, rol='estudiante')
-    except User.DoesNotExist:
+    estudiante = get_principal(student_id)
+    if estudiante is None or estudiante.rol != 'estudiante':
         return Response({
             'success': False,
             'message': 'Estudiante no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
     
     submissions = Submission.objects.filter(
-        student=estudiante,
+        student_id=estudiante.id_usuario,
         estado='calificado'
-    ).select_related('task').order_by('-fecha_calificacion')
+    ).select_related('task').annotate(
+        # En la misma consulta, en lugar de un exists() por entrega
+        es_tardia=Exists(SubmissionFile.objects.filter(submission=OuterRef('pk'), es_entrega_tardia=True))
+    ).order_by('-fecha_calificacion')
     
     # Calcular promedio
     calificaciones = [s.calificacion for s in submissions if s.calificacion]
@@ -649,7 +733,7 @@ def my_submissions(request):
             'puntos_maximos': sub.task.puntos_maximos,
             'comentario': sub.comentario_docente,
             'fecha_calificacion': sub.fecha_calificacion,
-            'es_tardia': sub.archivos.filter(es_entrega_tardia=True).exists()
+            'es_tardia': sub.es_tardia
         })
     
     return Response({
@@ -663,15 +747,92 @@ def my_submissions(request):
 # ==================== ENDPOINTS PÚBLICOS ====================
 
 @api_view(['GET'])
+@conditional_get(students_list_validators)
 def students_list(request):
     """
     GET: Lista de estudiantes registrados
     """
-    estudiantes = User.objects.filter(rol='estudiante', is_active=True)
-    serializer = StudentBasicSerializer(estudiantes, many=True)
+    return stream_json(
+        students_rows(),
+        'estudiantes',
+        antes={'success': True},
+        despues=lambda total: {'total': total},
+    )
+
+
+# ==================== EVENTOS (SSE) ====================
+
+def _evento_sse(evento):
+    return b'id: ' + str(evento['id']).encode() + b'\ndata: ' + dumps(evento) + b'\n\n'
+
+
+@async_api_view(['GET'])
+async def events_stream(request):
+    """
+    GET: Flujo de eventos (Server-Sent Events) del usuario.
+    EventSource no envía cabeceras propias: el usuario va en ?user_id= y el
+    rol del dashboard en ?rol= (docente o estudiante); el usuario debe existir,
+    estar activo y tener ese rol.
+    Bajo WSGI responde 204 (el navegador no reconecta): un flujo abierto
+    ocuparía un worker completo.
+    Los eventos viven en memoria de cada worker (ver tareas/events.py).
+    """
+    user_id = request.GET.get('user_id') or request.headers.get('X-User-Id')
+    rol = request.GET.get('rol')
     
-    return Response({
-        'success': True,
-        'estudiantes': serializer.data,
-        'total': estudiantes.count()
-    })
+    if not user_id or rol not in ('docente', 'estudiante'):
+        return json_response({
+            'success': False,
+            'message': 'Se requiere ID del usuario y rol (docente o estudiante)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    usuario = await sync_to_async(get_principal)(user_id)
+    if usuario is None or not usuario.is_active:
+        return json_response({
+            'success': False,
+            'message': 'Usuario no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if usuario.rol != rol:
+        return json_response({
+            'success': False,
+            'message': 'El usuario no tiene el rol solicitado'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    
+    suscripcion = event_broker.suscribir(usuario.id_usuario)
+    if suscripcion is None:
+        response = json_response({
+            'success': False,
+            'message': 'Demasiadas conexiones abiertas, intenta más tarde'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '30'
+        return response
+    
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT', 15)
+    fin = time.monotonic() + getattr(settings, 'SSE_MAX_DURACION', 300)
+    
+    async def _flujo():
+        try:
+            # retry: milisegundos antes de que el navegador reconecte
+            yield b'retry: 5000\n\n'
+            # Django 4.2 no detecta la desconexión del cliente: el flujo se cierra
+            # solo después de SSE_MAX_DURACION y el navegador vuelve a conectar
+            while time.monotonic() < fin:
+                await suscripcion.esperar(min(heartbeat, max(fin - time.monotonic(), 0)))
+                eventos, desbordado = suscripcion.tomar()
+                if desbordado:
+                    yield _evento_sse({'id': 0, 'tipo': RESYNC})
+                for evento in eventos:
+                    yield _evento_sse(evento)
+                if not eventos and not desbordado:
+                    yield b': ping\n\n'
+        finally:
+            event_broker.cancelar(suscripcion)
+    
+    response = StreamingHttpResponse(_flujo(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # sin buffer en proxies (nginx/Railway)
+    return response
@@ -5,3 +5,7 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     verbose_name = 'Usuarios'
+    
+    def ready(self):
+        # Importar señales (invalidación de cachés en proceso)
+        import users.signals
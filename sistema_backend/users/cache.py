@@ -0,0 +1,114 @@
+"""
+Caché en proceso de principales de usuario (datos de identidad "calientes").
+
+Las vistas de tareas consultan una y otra vez el mismo docente/estudiante
+(id, rol, nombre, correo, carrera, is_active). Esta caché LRU con TTL guarda
+una versión ligera de esas filas para no ir a TiDB en cada request.
+
+La invalidación ocurre en las señales post_save/post_delete/m2m_changed de
+User (ver users/signals.py). El TTL acota la desactualización entre procesos
+(cada worker de gunicorn tiene su propia caché).
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+
+UserPrincipal = namedtuple(
+    'UserPrincipal',
+    ['id_usuario', 'rol', 'nombre_completo', 'correo', 'carrera', 'is_active']
+)
+
+PRINCIPAL_FIELDS = UserPrincipal._fields
+
+
+class UserPrincipalCache:
+    """Caché LRU + TTL acotada y segura entre hilos"""
+
+    def __init__(self, max_entries=2048, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # Generación por usuario (y global para clear): un load que empezó antes
+        # de una invalidación no debe guardar la fila vieja
+        self._versiones = {}
+        self._epoca = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, id_usuario):
+        """Retorna el UserPrincipal o None si no existe el usuario"""
+        id_usuario = str(id_usuario)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(id_usuario)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(id_usuario)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            version = (self._epoca, self._versiones.get(id_usuario, 0))
+
+        principal = self._load(id_usuario)
+        if principal is not None:
+            with self._lock:
+                # Si se invalidó mientras se leía de la BD, no guardar la fila vieja
+                if (self._epoca, self._versiones.get(id_usuario, 0)) == version:
+                    self._guardar(principal)
+        return principal
+
+    def set(self, principal):
+        with self._lock:
+            self._guardar(principal)
+
+    def _guardar(self, principal):
+        self._data[principal.id_usuario] = (principal, time.monotonic() + self.ttl)
+        self._data.move_to_end(principal.id_usuario)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, id_usuario):
+        id_usuario = str(id_usuario)
+        with self._lock:
+            self._data.pop(id_usuario, None)
+            self._versiones[id_usuario] = self._versiones.get(id_usuario, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._epoca += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    @staticmethod
+    def _load(id_usuario):
+        from .models import User
+
+        row = User.objects.filter(id_usuario=id_usuario).values_list(*PRINCIPAL_FIELDS).first()
+        # No se cachean usuarios inexistentes: un registro nuevo debe verse de inmediato
+        return UserPrincipal(*row) if row else None
+
+
+user_principals = UserPrincipalCache(
+    max_entries=getattr(settings, 'USER_PRINCIPAL_CACHE_MAX_ENTRIES', 2048),
+    ttl=getattr(settings, 'USER_PRINCIPAL_CACHE_TTL', 300),
+)
+
+
+def get_principal(id_usuario):
+    """Atajo para obtener el principal de un usuario desde la caché"""
+    if not id_usuario:
+        return None
+    return user_principals.get(id_usuario)
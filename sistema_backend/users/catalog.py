@@ -0,0 +1,93 @@
+"""
+Catálogo en memoria de materias, indexado por carrera (a partir de la tabla
+normalizada materias_carreras).
+
+El catálogo es pequeño y casi nunca cambia, pero se consulta en cada registro
+y en cada actualización de materias. Se carga una sola vez por proceso y se
+invalida en post_save/post_delete de Materia (ver users/signals.py); el TTL
+cubre los cambios hechos desde otro worker.
+
+`firma` es un hash del contenido: es igual en todos los procesos que tengan
+los mismos datos, así que sirve como validador HTTP (ETag).
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+
+
+class MateriaCatalog:
+    """Catálogo versionado de materias (id → datos, carrera → ids)"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._expires_at = 0
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and self._expires_at > time.monotonic():
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._expires_at <= time.monotonic():
+                self._snapshot = self._load()
+                self._expires_at = time.monotonic() + self.ttl
+                self.version += 1
+            return self._snapshot
+
+    @staticmethod
+    def _load():
+        from .models import Materia, MateriaCarrera
+
+        materias = {
+            row['id']: row
+            for row in Materia.objects.order_by('id').values('id', 'codigo', 'nombre', 'nrc', 'carreras_permitidas')
+        }
+        por_carrera = {}
+        for carrera, materia_id in MateriaCarrera.objects.order_by('materia_id').values_list('carrera', 'materia_id'):
+            por_carrera.setdefault(carrera, []).append(materia_id)
+
+        firma = hashlib.sha1(
+            json.dumps(list(materias.values()), sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:16]
+
+        return {
+            'materias': materias,
+            'por_carrera': {carrera: frozenset(ids) for carrera, ids in por_carrera.items()},
+            'orden_por_carrera': {carrera: tuple(ids) for carrera, ids in por_carrera.items()},
+            'firma': firma,
+        }
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    @property
+    def firma(self):
+        return self._get_snapshot()['firma']
+
+    def existe(self, materia_id):
+        return materia_id in self._get_snapshot()['materias']
+
+    def materia(self, materia_id):
+        """Datos de una materia (dict) o None"""
+        return self._get_snapshot()['materias'].get(materia_id)
+
+    def ids_por_carrera(self, carrera):
+        """Conjunto de ids de materias que puede cursar una carrera"""
+        return self._get_snapshot()['por_carrera'].get(carrera, frozenset())
+
+    def materias(self, carrera=None):
+        """Lista de materias (dicts con los campos de MateriaSerializer), opcionalmente por carrera"""
+        snapshot = self._get_snapshot()
+        if carrera is None:
+            return list(snapshot['materias'].values())
+        return [snapshot['materias'][i] for i in snapshot['orden_por_carrera'].get(carrera, ())]
+
+
+materia_catalog = MateriaCatalog(ttl=getattr(settings, 'MATERIA_CATALOG_TTL', 300))
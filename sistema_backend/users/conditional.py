@@ -0,0 +1,52 @@
+"""
+GET condicional (ETag / Last-Modified) para vistas de solo lectura.
+
+Los validadores se calculan con consultas baratas (timestamps, contadores o la
+firma del catálogo) antes de ejecutar la vista; si el cliente ya tiene la
+versión vigente se responde 304 sin correr serializadores.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def build_etag(*parts):
+    """Construir un ETag estable a partir de las partes que definen la respuesta"""
+    raw = '|'.join('' if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def conditional_get(validators_func):
+    """
+    Decorador para vistas con GET condicional.
+
+    validators_func(request, *args, **kwargs) retorna (etag, last_modified)
+    o None si no se puede validar (recurso inexistente, sin permiso, etc.);
+    en ese caso la vista se ejecuta normalmente. Se evalúa una sola vez por
+    request y solo en GET/HEAD.
+    """
+    def decorator(view_func):
+        def _validators(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return None, None
+            if not hasattr(request, '_validadores_http'):
+                request._validadores_http = validators_func(request, *args, **kwargs) or (None, None)
+            return request._validadores_http
+
+        conditioned = condition(
+            etag_func=lambda request, *a, **kw: _validators(request, *a, **kw)[0],
+            last_modified_func=lambda request, *a, **kw: _validators(request, *a, **kw)[1],
+        )(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditioned(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Obligar al navegador a revalidar en cada refresco del dashboard
+                patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+    return decorator
@@ -0,0 +1,110 @@
+"""
+Cola de envío de emails en segundo plano.
+
+Los endpoints no deben esperar a la API de Brevo (hasta 30 s de timeout) para
+responder: el envío se encola después del commit de la transacción y unos hilos
+del proceso lo ejecutan. Hay dos carriles:
+
+- prioritario: códigos de recuperación, con su propio hilo para que salgan en
+  segundos aunque haya muchos emails normales pendientes.
+- normal: bienvenida y demás notificaciones.
+
+La cola vive en memoria del worker: si el proceso se reinicia se pierden los
+emails pendientes (el mismo comportamiento que tenían los hilos sueltos).
+
+stats() (GET /api/email-queue-stats) reporta por carril los pendientes y los
+procesados (enviados + fallidos) del proceso que atiende la petición.
+"""
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+PRIORITARIO = 'prioritario'
+NORMAL = 'normal'
+
+
+class EmailQueue:
+    """Colas acotadas con hilos trabajadores por carril"""
+
+    def __init__(self, workers=2, priority_workers=1, max_size=1000):
+        self.trabajadores = {PRIORITARIO: priority_workers, NORMAL: workers}
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._colas = {}
+        self._metricas = {carril: {'enviados': 0, 'fallidos': 0, 'descartados': 0} for carril in self.trabajadores}
+
+    def _iniciar(self):
+        # Los hilos no sobreviven a un fork: se arrancan en el primer uso de cada proceso
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._colas = {carril: queue.Queue(maxsize=self.max_size) for carril in self.trabajadores}
+            for carril, n in self.trabajadores.items():
+                for i in range(n):
+                    threading.Thread(
+                        target=self._trabajar, args=(carril,), name=f'email-{carril}-{i}', daemon=True
+                    ).start()
+            self._pid = os.getpid()
+
+    def _trabajar(self, carril):
+        cola = self._colas[carril]
+        while True:
+            fn, args, kwargs = cola.get()
+            try:
+                resultado = fn(*args, **kwargs)
+                self._contar(carril, 'enviados' if resultado is not False else 'fallidos')
+            except Exception as e:
+                self._contar(carril, 'fallidos')
+                logger.error(f'[EMAIL-QUEUE] Error en {getattr(fn, "__name__", fn)}: {e}')
+            finally:
+                # El envío registra la bitácora en la BD: no dejar conexiones colgadas en el hilo
+                close_old_connections()
+                cola.task_done()
+
+    def _contar(self, carril, clave):
+        with self._lock:
+            self._metricas[carril][clave] += 1
+
+    def encolar(self, fn, *args, prioridad=NORMAL, **kwargs):
+        """Encolar fn(*args, **kwargs) de inmediato. Retorna False si la cola está llena."""
+        self._iniciar()
+        try:
+            self._colas[prioridad].put_nowait((fn, args, kwargs))
+            return True
+        except queue.Full:
+            self._contar(prioridad, 'descartados')
+            logger.error(f'[EMAIL-QUEUE] Cola {prioridad} llena, se descarta {getattr(fn, "__name__", fn)}')
+            return False
+
+    def encolar_al_commit(self, fn, *args, prioridad=NORMAL, **kwargs):
+        """Encolar cuando la transacción actual haga commit (de inmediato si no hay transacción)"""
+        transaction.on_commit(lambda: self.encolar(fn, *args, prioridad=prioridad, **kwargs))
+
+    def stats(self):
+        with self._lock:
+            return {
+                carril: {
+                    'trabajadores': self.trabajadores[carril],
+                    # qsize incluye lo encolado que ningún hilo ha tomado todavía
+                    'pendientes': self._colas[carril].qsize() if carril in self._colas else 0,
+                    'procesados': metricas['enviados'] + metricas['fallidos'],
+                    **metricas,
+                }
+                for carril, metricas in self._metricas.items()
+            }
+
+
+email_queue = EmailQueue(
+    workers=getattr(settings, 'EMAIL_QUEUE_WORKERS', 2),
+    priority_workers=getattr(settings, 'EMAIL_QUEUE_PRIORITY_WORKERS', 1),
+    max_size=getattr(settings, 'EMAIL_QUEUE_MAX_SIZE', 1000),
+)
@@ -7,11 +7,20 @@ Railway bloquea todo tráfico SMTP (puertos 25/465/587).
 Brevo envía por HTTPS (puerto 443) → funciona en Railway.
 
 Tier gratuito: 300 emails/día (9000/mes).
+
+Cada envío tiene versión síncrona (requests, para hilos y comandos) y asíncrona
+(httpx, para las vistas async bajo ASGI). Si httpx no está instalado, las
+versiones async ejecutan la síncrona en un hilo.
 """
 import os
 import requests
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from config.metrics import registrar_email
+
 logger = logging.getLogger(__name__)
 
 # ── Configuración Brevo ──────────────────────────────────────────
@@ -19,6 +28,56 @@ BREVO_API_KEY = os.environ.get('BREVO_API_KEY', '')
 BREVO_SENDER_EMAIL = 'secretaria.instituto.aca@gmail.com'
 BREVO_SENDER_NAME = 'Sistema de Tareas BUAP'
 BREVO_API_URL = 'https://api.brevo.com/v3/smtp/email'
+BREVO_ACCOUNT_URL = 'https://api.brevo.com/v3/account'
+
+
+def emails_habilitados() -> bool:
+    """False si los envíos están apagados con EMAIL_ENABLED=False"""
+    return getattr(settings, 'EMAIL_ENABLED', True)
+
+
+def _brevo_headers() -> dict:
+    return {
+        'accept': 'application/json',
+        'api-key': BREVO_API_KEY,
+        'content-type': 'application/json',
+    }
+
+
+def _brevo_payload(to_email: str, subject: str, html_content: str) -> dict:
+    return {
+        'sender': {
+            'name': BREVO_SENDER_NAME,
+            'email': BREVO_SENDER_EMAIL,
+        },
+        'to': [{'email': to_email}],
+        'subject': subject,
+        'htmlContent': html_content,
+    }
+
+
+def _resultado_envio(to_email: str, status_code: int, body: dict, text: str):
+    """(success, estado, brevo_message_id, error_message) a partir de la respuesta de Brevo"""
+    if status_code == 201:
+        brevo_message_id = body.get('messageId', '')
+        logger.info(f"[BREVO] ✅ Email enviado a {to_email} (messageId: {brevo_message_id})")
+        print(f"✅ Email enviado exitosamente a {to_email}")
+        return True, 'enviado', brevo_message_id, None
+    error_message = f"Error {status_code}: {text}"
+    logger.error(f"[BREVO] ❌ {error_message}")
+    print(f"❌ Brevo error {status_code}: {text}")
+    return False, 'fallido', None, error_message
+
+
+def _datos_bitacora(to_email, subject, email_type, estado, error_message, brevo_message_id) -> dict:
+    return {
+        'destinatario': to_email,
+        'asunto': subject[:255],  # Limitar longitud
+        'tipo': email_type if email_type else 'recovery_code',  # Default si no se especifica
+        'estado': estado,
+        'mensaje_error': error_message[:500] if error_message else None,  # Limitar longitud
+        'brevo_message_id': brevo_message_id,
+    }
 
 
 # ── Función principal de envío ────────────────────────────────────
@@ -36,6 +95,11 @@ def send_email(to_email: str, subject: str, html_content: str, email_type: str =
         bool: True si se envió correctamente
     """
     from .models import EmailLog
+
+    if not emails_habilitados():
+        logger.info(f"[BREVO] Envíos desactivados (EMAIL_ENABLED): se omite {to_email}")
+        registrar_email(email_type, 'omitido')
+        return False
     
     brevo_message_id = None
     error_message = None
@@ -46,35 +110,15 @@ def send_email(to_email: str, subject: str, html_content: str, email_type: str =
 
         response = requests.post(
             BREVO_API_URL,
-            headers={
-                'accept': 'application/json',
-                'api-key': BREVO_API_KEY,
-                'content-type': 'application/json',
-            },
-            json={
-                'sender': {
-                    'name': BREVO_SENDER_NAME,
-                    'email': BREVO_SENDER_EMAIL,
-                },
-                'to': [{'email': to_email}],
-                'subject': subject,
-                'htmlContent': html_content,
-            },
+            headers=_brevo_headers(),
+            json=_brevo_payload(to_email, subject, html_content),
             timeout=30,
         )
 
-        if response.status_code == 201:
-            data = response.json()
-            brevo_message_id = data.get('messageId', '')
-            estado = 'enviado'
-            logger.info(f"[BREVO] ✅ Email enviado a {to_email} (messageId: {brevo_message_id})")
-            print(f"✅ Email enviado exitosamente a {to_email}")
-            success = True
-        else:
-            error_message = f"Error {response.status_code}: {response.text}"
-            logger.error(f"[BREVO] ❌ {error_message}")
-            print(f"❌ Brevo error {response.status_code}: {response.text}")
-            success = False
+        success, estado, brevo_message_id, error_message = _resultado_envio(
+            to_email, response.status_code,
+            response.json() if response.status_code == 201 else {}, response.text
+        )
 
     except requests.exceptions.Timeout:
         error_message = "Timeout conectando a api.brevo.com"
@@ -90,26 +134,81 @@ def send_email(to_email: str, subject: str, html_content: str, email_type: str =
     # Registrar en bitácora
     try:
         EmailLog.objects.create(
-            destinatario=to_email,
-            asunto=subject[:255],  # Limitar longitud
-            tipo=email_type if email_type else 'recovery_code',  # Default si no se especifica
-            estado=estado,
-            mensaje_error=error_message[:500] if error_message else None,  # Limitar longitud
-            brevo_message_id=brevo_message_id
+            **_datos_bitacora(to_email, subject, email_type, estado, error_message, brevo_message_id)
         )
     except Exception as log_error:
         logger.error(f"[BITACORA] Error guardando log de email: {log_error}")
         # No fallar el envío por un error de logging
     
+    registrar_email(email_type, estado)
     return success
 
 
-# ── Diagnóstico ──────────────────────────────────────────────────
-def test_email_connection() -> dict:
+async def asend_email(to_email: str, subject: str, html_content: str, email_type: str = None,
+                      client=None) -> bool:
     """
-    Prueba la conexión a Brevo verificando la API key.
-    No envía ningún email.
+    Versión asíncrona de send_email (httpx). `client` permite reutilizar un
+    httpx.AsyncClient (y sus conexiones) entre varios envíos.
     """
+    if not emails_habilitados():
+        logger.info(f"[BREVO] Envíos desactivados (EMAIL_ENABLED): se omite {to_email}")
+        registrar_email(email_type, 'omitido')
+        return False
+
+    try:
+        import httpx
+    except ImportError:
+        return await sync_to_async(send_email, thread_sensitive=False)(to_email, subject, html_content, email_type)
+
+    from .models import EmailLog
+    
+    brevo_message_id = None
+    error_message = None
+    estado = 'fallido'
+    
+    try:
+        logger.info(f"[BREVO] Enviando a: {to_email} | Subject: {subject}")
+        
+        if client is None:
+            async with httpx.AsyncClient(timeout=30) as propio:
+                response = await propio.post(
+                    BREVO_API_URL, headers=_brevo_headers(), json=_brevo_payload(to_email, subject, html_content)
+                )
+        else:
+            response = await client.post(
+                BREVO_API_URL, headers=_brevo_headers(), json=_brevo_payload(to_email, subject, html_content)
+            )
+        
+        success, estado, brevo_message_id, error_message = _resultado_envio(
+            to_email, response.status_code,
+            response.json() if response.status_code == 201 else {}, response.text
+        )
+
+    except httpx.TimeoutException:
+        error_message = "Timeout conectando a api.brevo.com"
+        logger.error(f"[BREVO] ❌ {error_message}")
+        print(f"❌ {error_message}")
+        success = False
+    except Exception as e:
+        error_message = f"{type(e).__name__}: {e}"
+        logger.error(f"[BREVO] ❌ Error inesperado: {error_message}")
+        print(f"❌ Error inesperado enviando email: {e}")
+        success = False
+    
+    # Registrar en bitácora
+    try:
+        await EmailLog.objects.acreate(
+            **_datos_bitacora(to_email, subject, email_type, estado, error_message, brevo_message_id)
+        )
+    except Exception as log_error:
+        logger.error(f"[BITACORA] Error guardando log de email: {log_error}")
+    
+    registrar_email(email_type, estado)
+    return success
+
+
+# ── Diagnóstico ──────────────────────────────────────────────────
+def _config_conexion() -> dict:
     config = {
         'backend': 'brevo_http_api',
         'sender_email': BREVO_SENDER_EMAIL,
@@ -117,53 +216,96 @@ def test_email_connection() -> dict:
         'api_key_preview': BREVO_API_KEY[:12] + '...' if len(BREVO_API_KEY) > 12 else '(no configurada)',
     }
     logger.info(f"[TEST] Probando conexión Brevo: {config}")
+    return config
 
-    if not config['api_key_set']:
+
+def _sin_api_key(config: dict) -> dict:
+    return {
+        'success': False,
+        'message': 'BREVO_API_KEY no está configurada. Regístrate en brevo.com y pon tu API key.',
+        'config': config,
+    }
+
+
+def _resultado_conexion(status_code: int, account: dict, text: str, config: dict) -> dict:
+    """Interpretar la respuesta de GET /v3/account"""
+    if status_code == 200:
+        plan = account.get('plan', [{}])
+        credits_info = plan[0].get('credits', 'N/A') if plan else 'N/A'
+        config['account_email'] = account.get('email', '?')
+        config['credits'] = credits_info
+        logger.info(f"[TEST] ✅ Brevo API key válida. Cuenta: {config['account_email']}")
+        return {
+            'success': True,
+            'message': f'Brevo conectado. Cuenta: {config["account_email"]}',
+            'config': config,
+        }
+    elif status_code == 401:
+        logger.error("[TEST] ❌ API key inválida")
         return {
             'success': False,
-            'message': 'BREVO_API_KEY no está configurada. Regístrate en brevo.com y pon tu API key.',
+            'message': 'API key de Brevo inválida. Verifica la key en brevo.com → SMTP & API.',
             'config': config,
         }
+    else:
+        msg = f'Brevo respondió {status_code}: {text}'
+        logger.error(f"[TEST] ❌ {msg}")
+        return {'success': False, 'message': msg, 'config': config}
+
+
+def _error_conexion(e: Exception, config: dict) -> dict:
+    msg = f'Error conectando a Brevo: {type(e).__name__}: {e}'
+    logger.error(f"[TEST] ❌ {msg}")
+    return {'success': False, 'message': msg, 'config': config}
+
+
+def test_email_connection() -> dict:
+    """
+    Prueba la conexión a Brevo verificando la API key.
+    No envía ningún email.
+    """
+    config = _config_conexion()
+    if not config['api_key_set']:
+        return _sin_api_key(config)
 
     try:
         # Verificar API key consultando la cuenta
         resp = requests.get(
-            'https://api.brevo.com/v3/account',
+            BREVO_ACCOUNT_URL,
             headers={
                 'accept': 'application/json',
                 'api-key': BREVO_API_KEY,
             },
             timeout=10,
         )
+        return _resultado_conexion(resp.status_code, resp.json() if resp.status_code == 200 else {}, resp.text, config)
+    except Exception as e:
+        return _error_conexion(e, config)
 
-        if resp.status_code == 200:
-            account = resp.json()
-            plan = account.get('plan', [{}])
-            credits_info = plan[0].get('credits', 'N/A') if plan else 'N/A'
-            config['account_email'] = account.get('email', '?')
-            config['credits'] = credits_info
-            logger.info(f"[TEST] ✅ Brevo API key válida. Cuenta: {config['account_email']}")
-            return {
-                'success': True,
-                'message': f'Brevo conectado. Cuenta: {config["account_email"]}',
-                'config': config,
-            }
-        elif resp.status_code == 401:
-            logger.error("[TEST] ❌ API key inválida")
-            return {
-                'success': False,
-                'message': 'API key de Brevo inválida. Verifica la key en brevo.com → SMTP & API.',
-                'config': config,
-            }
-        else:
-            msg = f'Brevo respondió {resp.status_code}: {resp.text}'
-            logger.error(f"[TEST] ❌ {msg}")
-            return {'success': False, 'message': msg, 'config': config}
 
+async def atest_email_connection() -> dict:
+    """Versión asíncrona de test_email_connection (httpx)"""
+    try:
+        import httpx
+    except ImportError:
+        return await sync_to_async(test_email_connection, thread_sensitive=False)()
+
+    config = _config_conexion()
+    if not config['api_key_set']:
+        return _sin_api_key(config)
+
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(
+                BREVO_ACCOUNT_URL,
+                headers={
+                    'accept': 'application/json',
+                    'api-key': BREVO_API_KEY,
+                },
+            )
+        return _resultado_conexion(resp.status_code, resp.json() if resp.status_code == 200 else {}, resp.text, config)
     except Exception as e:
-        msg = f'Error conectando a Brevo: {type(e).__name__}: {e}'
-        logger.error(f"[TEST] ❌ {msg}")
-        return {'success': False, 'message': msg, 'config': config}
+        return _error_conexion(e, config)
 
 
 def send_recovery_code_email(nombre_completo: str, correo: str, code: str) -> bool:
@@ -178,6 +320,17 @@ def send_recovery_code_email(nombre_completo: str, correo: str, code: str) -> bo
     Returns:
         bool: True si se envió correctamente
     """
+    subject, html_content = _contenido_codigo_recuperacion(nombre_completo, code)
+    return send_email(correo, subject, html_content, email_type='recovery_code')
+
+
+async def asend_recovery_code_email(nombre_completo: str, correo: str, code: str) -> bool:
+    """Versión asíncrona de send_recovery_code_email"""
+    subject, html_content = _contenido_codigo_recuperacion(nombre_completo, code)
+    return await asend_email(correo, subject, html_content, email_type='recovery_code')
+
+
+def _contenido_codigo_recuperacion(nombre_completo: str, code: str):
     subject = 'Código de Recuperación - Sistema de Gestión de Tareas'
     
     html_content = f"""
@@ -210,7 +363,7 @@ def send_recovery_code_email(nombre_completo: str, correo: str, code: str) -> bo
     </div>
     """
     
-    return send_email(correo, subject, html_content, email_type='recovery_code')
+    return subject, html_content
 
 
 def send_task_assigned_email(nombre_completo: str, correo: str, 
@@ -230,6 +383,14 @@ def send_task_assigned_email(nombre_completo: str, correo: str,
     Returns:
         bool: True si se envió correctamente
     """
+    subject, html_content = _contenido_tarea_asignada(
+        nombre_completo, titulo_tarea, descripcion, fecha_entrega, docente_nombre
+    )
+    return send_email(correo, subject, html_content, email_type='task_assigned')
+
+
+def _contenido_tarea_asignada(nombre_completo: str, titulo_tarea: str, descripcion: str,
+                              fecha_entrega: str, docente_nombre: str):
     subject = f'Nueva Tarea Asignada: {titulo_tarea}'
     
     # Truncar descripción si es muy larga
@@ -259,7 +420,7 @@ def send_task_assigned_email(nombre_completo: str, correo: str,
     </div>
     """
     
-    return send_email(correo, subject, html_content, email_type='task_assigned')
+    return subject, html_content
 
 
 def send_submission_received_email(docente_nombre: str, docente_correo: str,
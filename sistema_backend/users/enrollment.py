@@ -0,0 +1,228 @@
+"""
+Inscripción masiva de materias (lista de id_usuario → ids de materias).
+
+Usado por el endpoint POST /api/users/materias/bulk y por el comando
+inscribir_materias. En lugar de una petición (y varias consultas) por alumno,
+el roster se procesa por bloques: una consulta trae los usuarios del bloque, las
+materias se validan contra el catálogo en memoria (users/catalog.py) y las filas
+de las tablas intermedias se escriben con bulk_create dentro de una transacción
+por bloque. Las filas inválidas no detienen la carga: se reportan con su número.
+
+En modo 'reemplazar' una fila sin materias (celda vacía o lista vacía) borraría
+todas las inscripciones del usuario: se rechaza salvo con permitir_vaciar.
+
+En modo 'agregar' se leen las inscripciones actuales del bloque (una consulta
+por rol): la validación por carrera (p.ej. ITI solo una materia) se aplica al
+resultado final y solo se insertan las relaciones que faltan.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .cache import user_principals
+from .catalog import materia_catalog
+from .models import User
+
+CHUNK_INSCRIPCIONES = 1000
+
+REEMPLAZAR = 'reemplazar'
+AGREGAR = 'agregar'
+MODOS = (REEMPLAZAR, AGREGAR)
+
+
+def error_materias_carrera(materias_ids, carrera):
+    """Mensaje de error si las materias no son válidas para la carrera, o None"""
+    if not set(materias_ids).issubset(materia_catalog.ids_por_carrera(carrera)):
+        return f'Las materias seleccionadas no corresponden a la carrera {carrera}'
+    # ITI solo puede seleccionar 1 materia
+    if carrera == 'ITI' and len(materias_ids) > 1:
+        return 'Para la carrera ITI solo puede seleccionar una materia'
+    return None
+
+
+def parse_materias(valor):
+    """Ids de materias desde una lista o un texto '1;2;3' / '1 2 3' / '1,2,3'"""
+    if isinstance(valor, (list, tuple)):
+        partes = valor
+    else:
+        partes = str(valor or '').replace(';', ' ').replace(',', ' ').split()
+    ids = []
+    for parte in partes:
+        if isinstance(parte, bool):
+            raise ValueError(f'Id de materia inválido: {parte}')
+        ids.append(int(parte))
+    # Sin duplicados, conservando el orden
+    return list(dict.fromkeys(ids))
+
+
+def roster_desde_csv(texto):
+    """(fila, id_usuario, materias) desde un CSV con columnas id_usuario y materias"""
+    lector = csv.DictReader(io.StringIO(texto) if isinstance(texto, str) else texto)
+    for numero, fila in enumerate(lector, start=2):  # la fila 1 es el encabezado
+        yield numero, (fila.get('id_usuario') or '').strip(), fila.get('materias')
+
+
+def roster_desde_lista(inscripciones):
+    """(fila, id_usuario, materias) desde [{'id_usuario': ..., 'materias': [...]}, ...]"""
+    for numero, item in enumerate(inscripciones, start=1):
+        if not isinstance(item, dict):
+            yield numero, '', None
+            continue
+        yield numero, str(item.get('id_usuario') or '').strip(), item.get('materias')
+
+
+def roster_desde_archivo(ruta):
+    """Roster desde un archivo .csv o .json"""
+    with open(ruta, encoding='utf-8-sig', newline='') as f:
+        if ruta.lower().endswith('.csv'):
+            yield from roster_desde_csv(f)
+        else:
+            yield from roster_desde_lista(json.load(f))
+
+
+def _bloques(iterable, tamano):
+    bloque = []
+    for item in iterable:
+        bloque.append(item)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _inscripciones_actuales(through, usuarios):
+    """{id_usuario: {materia_id, ...}} de los usuarios del bloque, una consulta por rol"""
+    actuales = {}
+    for rol, modelo in through.items():
+        ids = [id_usuario for id_usuario, (rol_usuario, _) in usuarios.items() if rol_usuario == rol]
+        if not ids:
+            continue
+        for id_usuario, materia_id in modelo.objects.filter(user_id__in=ids).values_list('user_id', 'materia_id'):
+            actuales.setdefault(id_usuario, set()).add(materia_id)
+    return actuales
+
+
+def inscribir_lote(roster, modo=REEMPLAZAR, chunk=CHUNK_INSCRIPCIONES, dry_run=False, permitir_vaciar=False):
+    """
+    Aplica un roster de inscripciones.
+
+    Args:
+        roster: iterable de (fila, id_usuario, materias)
+        modo: 'reemplazar' (como update_materias) o 'agregar' (conserva las actuales;
+            las materias nuevas más las actuales deben ser válidas para la carrera)
+        permitir_vaciar: en modo 'reemplazar', aceptar filas sin materias (dejan al
+            usuario sin inscripciones); sin esta opción se reportan como error
+
+    Returns:
+        {'resumen': {...}, 'errores': [{'fila', 'id_usuario', 'error'}, ...]}
+        resumen['relaciones_escritas'] cuenta solo las relaciones nuevas
+    """
+    if modo not in MODOS:
+        raise ValueError(f'Modo no válido: {modo}')
+
+    through = {
+        'estudiante': User.materias_estudiante.through,
+        'docente': User.materias_docente.through,
+    }
+    resumen = {'procesadas': 0, 'usuarios_actualizados': 0, 'relaciones_escritas': 0, 'errores': 0}
+    errores = []
+    vistos = set()
+
+    def _error(fila, id_usuario, mensaje):
+        resumen['errores'] += 1
+        errores.append({'fila': fila, 'id_usuario': id_usuario, 'error': mensaje})
+
+    for bloque in _bloques(roster, chunk):
+        resumen['procesadas'] += len(bloque)
+
+        # Una consulta por bloque para todos los usuarios
+        usuarios = {
+            id_usuario: (rol, carrera)
+            for id_usuario, rol, carrera in User.objects.filter(
+                id_usuario__in=[id_usuario for _, id_usuario, _ in bloque if id_usuario]
+            ).values_list('id_usuario', 'rol', 'carrera')
+        }
+        actuales = _inscripciones_actuales(through, usuarios) if modo == AGREGAR else {}
+
+        validas = {'estudiante': {}, 'docente': {}}
+        for fila, id_usuario, materias_raw in bloque:
+            if not id_usuario:
+                _error(fila, id_usuario, 'Falta id_usuario')
+                continue
+            if id_usuario in vistos:
+                _error(fila, id_usuario, 'Usuario repetido en el roster')
+                continue
+            vistos.add(id_usuario)
+
+            if id_usuario not in usuarios:
+                _error(fila, id_usuario, 'Usuario no encontrado')
+                continue
+            rol, carrera = usuarios[id_usuario]
+            if rol not in validas:
+                _error(fila, id_usuario, f'Rol no soportado: {rol}')
+                continue
+            if not carrera:
+                _error(fila, id_usuario, 'El usuario debe tener una carrera asignada')
+                continue
+
+            try:
+                materias = parse_materias(materias_raw)
+            except (TypeError, ValueError):
+                _error(fila, id_usuario, f'Lista de materias inválida: {materias_raw}')
+                continue
+            if not materias and modo == REEMPLAZAR and not permitir_vaciar:
+                _error(fila, id_usuario, 'Sin materias: en modo reemplazar se borrarían todas sus inscripciones')
+                continue
+
+            inexistentes = [m for m in materias if not materia_catalog.existe(m)]
+            if inexistentes:
+                _error(fila, id_usuario, f'Clave primaria "{inexistentes[0]}" inválida - objeto no existe.')
+                continue
+            if modo == AGREGAR:
+                ya_inscritas = actuales.get(id_usuario, set())
+                nuevas = [m for m in materias if m not in ya_inscritas]
+                mensaje = error_materias_carrera([*ya_inscritas, *nuevas], carrera)
+            else:
+                nuevas = materias
+                mensaje = error_materias_carrera(materias, carrera)
+            if mensaje:
+                _error(fila, id_usuario, mensaje)
+                continue
+            if modo == AGREGAR and not nuevas:
+                # Ya tenía todas: nada que escribir
+                continue
+
+            validas[rol][id_usuario] = nuevas
+
+        if dry_run:
+            resumen['usuarios_actualizados'] += sum(len(v) for v in validas.values())
+            resumen['relaciones_escritas'] += sum(len(m) for v in validas.values() for m in v.values())
+            continue
+
+        with transaction.atomic():
+            for rol, por_usuario in validas.items():
+                if not por_usuario:
+                    continue
+                modelo = through[rol]
+                if modo == REEMPLAZAR:
+                    modelo.objects.filter(user_id__in=list(por_usuario)).delete()
+                filas = [
+                    modelo(user_id=id_usuario, materia_id=materia_id)
+                    for id_usuario, materias in por_usuario.items()
+                    for materia_id in materias
+                ]
+                # ignore_conflicts: en modo 'agregar' otra petición pudo insertar la misma
+                # relación después de leer las actuales
+                modelo.objects.bulk_create(filas, batch_size=chunk, ignore_conflicts=(modo == AGREGAR))
+                resumen['usuarios_actualizados'] += len(por_usuario)
+                resumen['relaciones_escritas'] += len(filas)
+
+        # bulk_create no dispara m2m_changed: invalidar los principales a mano
+        for por_usuario in validas.values():
+            for id_usuario in por_usuario:
+                user_principals.invalidate(id_usuario)
+
+    return {'resumen': resumen, 'errores': errores}
@@ -0,0 +1,161 @@
+"""
+Pool acotado de hilos para verificar contraseñas.
+
+bcrypt/PBKDF2 consumen ~100-300 ms de CPU por login. Si se ejecutan en el hilo
+del request, una ráfaga de logins (p.ej. a las 7am) ocupa todos los hilos del
+worker y el resto de los endpoints se queda esperando. Aquí la verificación se
+envía a un pool dedicado con pocos hilos y una cola limitada: cuando la cola
+está llena se rechaza de inmediato (HashPoolSaturado → 503 con Retry-After) en
+lugar de acumular requests.
+
+El pool limita cuántas verificaciones usan CPU a la vez, pero no libera el
+hilo del request: la vista sigue bloqueada en future.result() hasta que el hash
+termina (o vence HASH_POOL_TIMEOUT). Lo que se evita es que N logins simultáneos
+compitan por la CPU con el resto de los endpoints; el número de hilos ocupados
+por logins en espera lo acota queue_limit.
+
+El pool mide el tiempo de hash y el tiempo de espera en cola (ver stats() y
+/metrics). Las verificaciones que lanzan excepción se cuentan en 'fallidos',
+no en 'completados'.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from config.metrics import registrar_verificacion
+
+
+class HashPoolSaturado(Exception):
+    """El pool de hashing no tiene capacidad; el cliente debe reintentar"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Servicio de autenticación saturado')
+        self.retry_after = retry_after
+
+
+class HashPool:
+    """ThreadPoolExecutor con límite de trabajos pendientes y métricas"""
+
+    def __init__(self, workers=2, queue_limit=32, timeout=10):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._metricas = self._metricas_vacias()
+
+    @staticmethod
+    def _metricas_vacias():
+        return {
+            'completados': 0,
+            'fallidos': 0,
+            'rechazados': 0,
+            'timeouts': 0,
+            'hash_total': 0.0,
+            'hash_max': 0.0,
+            'espera_total': 0.0,
+            'espera_max': 0.0,
+        }
+
+    def _iniciar(self):
+        # Los hilos no sobreviven a un fork: el pool y sus contadores se crean en el
+        # primer uso de cada proceso (un worker de gunicorn no hereda los del padre)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hash')
+            self._pendientes = 0
+            self._metricas = self._metricas_vacias()
+            self._pid = os.getpid()
+
+    def run(self, fn, *args):
+        """
+        Ejecuta fn(*args) en el pool y espera el resultado (el hilo que llama
+        queda bloqueado mientras tanto).
+        Lanza HashPoolSaturado si la cola está llena o si no termina a tiempo.
+        """
+        self._iniciar()
+        with self._lock:
+            if self._pendientes >= self.workers + self.queue_limit:
+                self._metricas['rechazados'] += 1
+                raise HashPoolSaturado()
+            self._pendientes += 1
+
+        encolado = time.perf_counter()
+
+        def _tarea():
+            inicio = time.perf_counter()
+            exito = False
+            try:
+                resultado = fn(*args)
+                exito = True
+                return resultado
+            finally:
+                fin = time.perf_counter()
+                self._registrar(inicio - encolado, fin - inicio, exito)
+
+        try:
+            future = self._executor.submit(_tarea)
+        except Exception:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._metricas['timeouts'] += 1
+            raise HashPoolSaturado()
+        finally:
+            # Si la tarea se canceló antes de correr, _registrar no se llamará
+            if future.cancelled():
+                with self._lock:
+                    self._pendientes -= 1
+
+    def _registrar(self, espera, duracion, exito=True):
+        with self._lock:
+            self._pendientes -= 1
+            m = self._metricas
+            m['completados' if exito else 'fallidos'] += 1
+            # Los tiempos incluyen los fallidos: también ocuparon un hilo del pool
+            m['hash_total'] += duracion
+            m['hash_max'] = max(m['hash_max'], duracion)
+            m['espera_total'] += espera
+            m['espera_max'] = max(m['espera_max'], espera)
+        registrar_verificacion(duracion, espera)
+
+    def stats(self):
+        self._iniciar()
+        with self._lock:
+            m = dict(self._metricas)
+            # Promedios sobre todas las verificaciones que corrieron
+            corridas = (m['completados'] + m['fallidos']) or 1
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'pendientes': self._pendientes,
+                'completados': m['completados'],
+                'fallidos': m['fallidos'],
+                'rechazados': m['rechazados'],
+                'timeouts': m['timeouts'],
+                'hash_promedio_ms': round(m['hash_total'] / corridas * 1000, 2),
+                'hash_max_ms': round(m['hash_max'] * 1000, 2),
+                'espera_promedio_ms': round(m['espera_total'] / corridas * 1000, 2),
+                'espera_max_ms': round(m['espera_max'] * 1000, 2),
+            }
+
+
+hash_pool = HashPool(
+    workers=getattr(settings, 'HASH_POOL_WORKERS', 2),
+    queue_limit=getattr(settings, 'HASH_POOL_QUEUE_LIMIT', 32),
+    timeout=getattr(settings, 'HASH_POOL_TIMEOUT', 10),
+)
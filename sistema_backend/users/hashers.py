@@ -2,7 +2,18 @@
 Backend de autenticación personalizado para soportar contraseñas hasheadas con bcrypt
 """
 import bcrypt
-from django.contrib.auth.hashers import BasePasswordHasher
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con iteraciones configurables (PBKDF2_ITERATIONS, ver el
+    comando calibrate_hashers). Mismo algoritmo que el hasher de Django: los
+    hashes existentes siguen siendo válidos y must_update detecta los que
+    tienen otro número de iteraciones.
+    """
+    iterations = getattr(settings, 'PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
 
 
 class BcryptPasswordHasher(BasePasswordHasher):
@@ -11,9 +22,10 @@ class BcryptPasswordHasher(BasePasswordHasher):
     Formato: $2b$10$... o $2a$10$...
     """
     algorithm = "bcrypt_node"
+    rounds = getattr(settings, 'BCRYPT_ROUNDS', 12)
     
     def salt(self):
-        return bcrypt.gensalt().decode('utf-8')
+        return bcrypt.gensalt(self.rounds).decode('utf-8')
     
     def encode(self, password, salt):
         """Codificar contraseña con bcrypt"""
@@ -44,7 +56,11 @@ class BcryptPasswordHasher(BasePasswordHasher):
         }
     
     def must_update(self, encoded):
-        return False
+        """Actualizar si el costo del hash ($2b$<costo>$...) no es el configurado"""
+        try:
+            return int(encoded.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
 
 
 def identify_hasher(encoded):
@@ -0,0 +1 @@
+# Este archivo permite que Python trate la carpeta como un paquete
@@ -0,0 +1,93 @@
+"""
+Comando para calibrar el costo de los hashers de contraseñas en el hardware
+donde corre la API.
+
+Mide cuánto tarda un hash con cada costo de bcrypt y con distintas iteraciones
+de PBKDF2, y recomienda el mayor costo que no pase del tiempo objetivo por
+login. Los valores se configuran con las variables de entorno BCRYPT_ROUNDS y
+PBKDF2_ITERATIONS; las contraseñas con otro costo se re-hashean solas en el
+siguiente login exitoso.
+
+Uso:
+    python manage.py calibrate_hashers
+    python manage.py calibrate_hashers --objetivo-ms 150 --repeticiones 5
+"""
+import time
+
+import bcrypt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.crypto import pbkdf2
+
+PASSWORD_PRUEBA = b'Calibracion-123!'
+
+# Costos de bcrypt a medir (cada +1 duplica el tiempo)
+BCRYPT_COSTOS = range(8, 16)
+
+# Iteraciones base de PBKDF2 para extrapolar (el tiempo es lineal en las iteraciones)
+PBKDF2_BASE = 100000
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de hash en este equipo y recomienda BCRYPT_ROUNDS y PBKDF2_ITERATIONS'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objetivo-ms',
+            type=float,
+            default=250,
+            help='Tiempo máximo de CPU por verificación de contraseña (ms)',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Mediciones por costo (se toma la mediana)',
+        )
+    
+    def _medir(self, fn, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            fn()
+            tiempos.append(time.perf_counter() - inicio)
+        return sorted(tiempos)[len(tiempos) // 2] * 1000
+    
+    def handle(self, *args, **options):
+        objetivo = options['objetivo_ms']
+        repeticiones = options['repeticiones']
+        
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('🔐 CALIBRACIÓN DE HASHERS'))
+        self.stdout.write(self.style.NOTICE(f'   Objetivo: {objetivo:.0f} ms por verificación'))
+        self.stdout.write(self.style.NOTICE('='*60))
+        
+        # bcrypt: probar costos hasta pasarse del objetivo
+        self.stdout.write('\nbcrypt:')
+        bcrypt_recomendado = BCRYPT_COSTOS[0]
+        for costo in BCRYPT_COSTOS:
+            salt = bcrypt.gensalt(costo)
+            ms = self._medir(lambda: bcrypt.hashpw(PASSWORD_PRUEBA, salt), repeticiones)
+            dentro = ms <= objetivo
+            marca = '✅' if dentro else '❌'
+            self.stdout.write(f'   {marca} costo {costo:2d}: {ms:8.1f} ms')
+            if not dentro:
+                break
+            bcrypt_recomendado = costo
+        
+        # PBKDF2: medir una base y escalar linealmente
+        salt = 'calibracion'
+        ms_base = self._medir(lambda: pbkdf2(PASSWORD_PRUEBA, salt, PBKDF2_BASE), repeticiones)
+        pbkdf2_recomendado = int(PBKDF2_BASE * objetivo / ms_base) // 10000 * 10000 or PBKDF2_BASE
+        self.stdout.write(f'\nPBKDF2-SHA256: {ms_base:.1f} ms por {PBKDF2_BASE} iteraciones')
+        self.stdout.write(
+            f'   {pbkdf2_recomendado} iteraciones ≈ {ms_base * pbkdf2_recomendado / PBKDF2_BASE:.1f} ms'
+        )
+        
+        self.stdout.write(self.style.NOTICE('\n' + '='*60))
+        self.stdout.write(f"   Actual:      BCRYPT_ROUNDS={getattr(settings, 'BCRYPT_ROUNDS', 12)} "
+                          f"PBKDF2_ITERATIONS={getattr(settings, 'PBKDF2_ITERATIONS', 600000)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'   Recomendado: BCRYPT_ROUNDS={bcrypt_recomendado} PBKDF2_ITERATIONS={pbkdf2_recomendado}'
+        ))
+        self.stdout.write(self.style.NOTICE('='*60))
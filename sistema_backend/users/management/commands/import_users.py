@@ -0,0 +1,240 @@
+"""
+Comando para importar usuarios en lote desde JSON o CSV.
+
+Reemplaza el ciclo de migrate_data.py (json.load del archivo completo, dos
+exists() y un save() por usuario). Aquí el archivo se lee en streaming, los
+duplicados se detectan con conjuntos cargados por bloque (una consulta por
+bloque para ids y otra para correos) y cada bloque se inserta con bulk_create
+dentro de su propia transacción. Los hashes bcrypt de Node.js se conservan tal
+cual (el login los re-hashea al costo configurado).
+
+Formato JSON: un arreglo de objetos como database/users.json
+    [{"id_usuario": "...", "correo": "...", "password": "$2b$10$...", ...}, ...]
+Formato CSV: encabezados con los mismos nombres de campo.
+Un archivo vacío, sin usuarios o que no sea un arreglo es un error (CommandError).
+
+Uso:
+    python manage.py import_users ../database/users.json
+    python manage.py import_users alumnos.csv --lote 2000
+    python manage.py import_users alumnos.csv --dry-run
+"""
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from users.models import User
+
+# Tamaño de lectura del archivo JSON
+BLOQUE_LECTURA = 64 * 1024
+
+CAMPOS = ('id_usuario', 'password', 'nombre_completo', 'correo', 'telefono', 'sexo', 'carrera', 'rol')
+ROLES = {choice for choice, _ in User.Rol.choices}
+SEXOS = {choice for choice, _ in User.Sexo.choices}
+
+
+def iter_json_array(archivo):
+    """Genera los objetos de un arreglo JSON sin cargar el archivo completo en memoria"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    inicio = True
+    fin_archivo = False
+
+    while True:
+        # Saltar espacios, el '[' inicial y las comas entre elementos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if inicio and pos < len(buffer):
+                if buffer[pos] != '[':
+                    raise ValueError('El archivo JSON debe contener un arreglo de usuarios')
+                pos += 1
+                inicio = False
+                continue
+            break
+
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        try:
+            objeto, fin = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Objeto incompleto: leer más
+            if fin_archivo:
+                if buffer[pos:].strip():
+                    raise
+                if inicio:
+                    raise ValueError('El archivo está vacío')
+                raise ValueError('El arreglo JSON no está cerrado')
+            bloque = archivo.read(BLOQUE_LECTURA)
+            fin_archivo = not bloque
+            buffer = buffer[pos:] + bloque
+            pos = 0
+            continue
+
+        yield objeto
+        pos = fin
+
+
+def iter_csv(archivo):
+    lector = csv.DictReader(archivo)
+    if not lector.fieldnames:
+        raise ValueError('El archivo está vacío')
+    faltantes = [campo for campo in ('id_usuario', 'correo') if campo not in lector.fieldnames]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    yield from lector
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios en lote desde un archivo JSON o CSV (streaming + bulk_create)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ruta', help='Archivo .json o .csv con los usuarios')
+        parser.add_argument(
+            '--formato',
+            choices=['json', 'csv'],
+            help='Formato del archivo (por defecto según la extensión)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Usuarios por bloque (consulta de duplicados + bulk_create + transacción)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validar y contar sin insertar',
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['ruta']
+        formato = options['formato'] or ('csv' if ruta.lower().endswith('.csv') else 'json')
+        self.lote = options['lote']
+        self.dry_run = options['dry_run']
+
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE(f'📥 IMPORTACIÓN DE USUARIOS ({formato.upper()})'))
+        self.stdout.write(self.style.NOTICE(f'   Archivo: {ruta}'))
+        self.stdout.write(self.style.NOTICE('='*60))
+
+        self.contadores = {'leidos': 0, 'insertados': 0, 'saltados': 0, 'errores': 0}
+        # Duplicados dentro del mismo archivo
+        self.ids_vistos = set()
+        self.correos_vistos = set()
+        self.inicio = time.perf_counter()
+
+        try:
+            with open(ruta, 'r', encoding='utf-8-sig', newline='') as archivo:
+                filas = iter_csv(archivo) if formato == 'csv' else iter_json_array(archivo)
+                bloque = []
+                for fila in filas:
+                    bloque.append(fila)
+                    if len(bloque) >= self.lote:
+                        self._procesar_bloque(bloque)
+                        bloque = []
+                if bloque:
+                    self._procesar_bloque(bloque)
+        except FileNotFoundError:
+            raise CommandError(f'No se encontró el archivo {ruta}')
+        except ValueError as e:
+            raise CommandError(f'Archivo inválido: {e}')
+        if not self.contadores['leidos']:
+            raise CommandError('El archivo no contiene usuarios')
+
+        duracion = time.perf_counter() - self.inicio
+        c = self.contadores
+        self.stdout.write(self.style.NOTICE('\n' + '='*60))
+        self.stdout.write(self.style.NOTICE('RESUMEN DE IMPORTACIÓN' + (' (dry-run)' if self.dry_run else '')))
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.SUCCESS(f"✅ Insertados: {c['insertados']}"))
+        self.stdout.write(f"⏭️  Saltados (ya existían o duplicados): {c['saltados']}")
+        self.stdout.write(self.style.ERROR(f"❌ Errores: {c['errores']}") if c['errores'] else "❌ Errores: 0")
+        self.stdout.write(f"📊 Leídos: {c['leidos']} en {duracion:.1f}s ({c['leidos'] / max(duracion, 1e-6):.0f} usuarios/s)")
+
+    def _usuario(self, fila):
+        """Construir el User (sin guardar) o None si la fila no es válida"""
+        datos = {campo: (fila.get(campo) or '').strip() for campo in CAMPOS}
+        if not datos['id_usuario'] or not datos['correo']:
+            return None
+
+        rol = datos['rol'] or User.Rol.ESTUDIANTE
+        sexo = datos['sexo'] or User.Sexo.OTRO
+        if rol not in ROLES or sexo not in SEXOS:
+            return None
+
+        return User(
+            id_usuario=datos['id_usuario'],
+            password=datos['password'],  # Ya viene hasheado con bcrypt
+            nombre_completo=datos['nombre_completo'],
+            correo=datos['correo'],
+            # bulk_create no llama a save(): llenar el correo normalizado aquí
+            correo_normalizado=User.normalizar_correo(datos['correo']),
+            telefono=datos['telefono'],
+            sexo=sexo,
+            carrera=datos['carrera'],
+            rol=rol,
+            is_active=True,
+        )
+
+    def _procesar_bloque(self, filas):
+        c = self.contadores
+        c['leidos'] += len(filas)
+
+        usuarios = []
+        for fila in filas:
+            usuario = self._usuario(fila) if isinstance(fila, dict) else None
+            if usuario is None:
+                c['errores'] += 1
+                continue
+            usuarios.append(usuario)
+
+        # Duplicados contra la base de datos: una consulta por ids y otra por correos
+        ids_existentes = set(
+            User.objects.filter(id_usuario__in=[u.id_usuario for u in usuarios]).values_list('id_usuario', flat=True)
+        )
+        correos_existentes = set(
+            User.objects.filter(
+                correo_normalizado__in=[u.correo_normalizado for u in usuarios]
+            ).values_list('correo_normalizado', flat=True)
+        )
+
+        nuevos = []
+        for usuario in usuarios:
+            if (usuario.id_usuario in ids_existentes or usuario.id_usuario in self.ids_vistos
+                    or usuario.correo_normalizado in correos_existentes
+                    or usuario.correo_normalizado in self.correos_vistos):
+                c['saltados'] += 1
+                continue
+            self.ids_vistos.add(usuario.id_usuario)
+            self.correos_vistos.add(usuario.correo_normalizado)
+            nuevos.append(usuario)
+
+        if nuevos and not self.dry_run:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(nuevos, batch_size=self.lote)
+                c['insertados'] += len(nuevos)
+            except IntegrityError as e:
+                # Alguien insertó algunos de estos usuarios mientras tanto: reintentar
+                # uno por uno y contar solo los que sí se insertaron
+                self.stderr.write(f'⚠️  Conflicto en el bloque ({e}); reintentando usuario por usuario')
+                for usuario in nuevos:
+                    try:
+                        with transaction.atomic():
+                            User.objects.bulk_create([usuario])
+                        c['insertados'] += 1
+                    except IntegrityError:
+                        c['saltados'] += 1
+        elif nuevos:
+            c['insertados'] += len(nuevos)
+
+        duracion = time.perf_counter() - self.inicio
+        self.stdout.write(
+            f"   {c['leidos']} leídos | {c['insertados']} insertados | {c['saltados']} saltados | "
+            f"{c['errores']} errores | {c['leidos'] / max(duracion, 1e-6):.0f} usuarios/s"
+        )
@@ -0,0 +1,85 @@
+"""
+Comando para inscribir materias en lote a partir de un roster.
+
+Formatos:
+    CSV:  id_usuario,materias        (materias separadas por ';')
+          202612345,1;4
+    JSON: [{"id_usuario": "202612345", "materias": [1, 4]}, ...]
+
+Uso:
+    python manage.py inscribir_materias roster.csv
+    python manage.py inscribir_materias roster.json --modo agregar
+    python manage.py inscribir_materias roster.csv --dry-run
+
+En modo reemplazar una fila sin materias es un error (borraría todas las
+inscripciones del usuario); --vaciar la acepta.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.enrollment import MODOS, REEMPLAZAR, inscribir_lote, roster_desde_archivo
+
+
+class Command(BaseCommand):
+    help = 'Inscribe materias en lote desde un roster CSV/JSON (validación en memoria + bulk_create)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('ruta', help='Archivo .csv o .json con el roster')
+        parser.add_argument(
+            '--modo',
+            choices=MODOS,
+            default=REEMPLAZAR,
+            help='reemplazar las materias actuales de cada usuario o agregarlas',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Usuarios por bloque (una consulta + una transacción por bloque)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validar el roster sin escribir',
+        )
+        parser.add_argument(
+            '--vaciar',
+            action='store_true',
+            help='En modo reemplazar, dejar sin materias a los usuarios con la celda vacía',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('='*60))
+        self.stdout.write(self.style.NOTICE('📚 INSCRIPCIÓN MASIVA DE MATERIAS'))
+        self.stdout.write(self.style.NOTICE(f"   Archivo: {options['ruta']} | Modo: {options['modo']}"))
+        self.stdout.write(self.style.NOTICE('='*60))
+        
+        inicio = time.perf_counter()
+        try:
+            reporte = inscribir_lote(
+                roster_desde_archivo(options['ruta']),
+                modo=options['modo'],
+                chunk=options['lote'],
+                dry_run=options['dry_run'],
+                permitir_vaciar=options['vaciar'],
+            )
+        except FileNotFoundError:
+            raise CommandError(f"No se encontró el archivo {options['ruta']}")
+        except ValueError as e:
+            raise CommandError(f'Archivo inválido: {e}')
+        duracion = time.perf_counter() - inicio
+        
+        for error in reporte['errores']:
+            self.stdout.write(self.style.WARNING(
+                f"   Fila {error['fila']} ({error['id_usuario'] or '-'}): {error['error']}"
+            ))
+        
+        resumen = reporte['resumen']
+        self.stdout.write(self.style.NOTICE('\n' + '='*60))
+        self.stdout.write(f"📊 Filas procesadas: {resumen['procesadas']} en {duracion:.2f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Usuarios actualizados: {resumen['usuarios_actualizados']} "
+            f"({resumen['relaciones_escritas']} relaciones)" + (' (dry-run)' if options['dry_run'] else '')
+        ))
+        self.stdout.write(f"❌ Filas con error: {resumen['errores']}")
@@ -0,0 +1,59 @@
+"""
+Comando para eliminar los códigos de recuperación expirados.
+
+Los códigos duran 15 minutos; una vez expirados (usados o no) ya no sirven.
+Se borran por lotes pequeños para no bloquear la tabla ni generar
+transacciones grandes en TiDB. Debe ejecutarse periódicamente, p.ej. con cron:
+    */30 * * * * cd /app && python manage.py purge_recovery_codes
+
+Uso manual:
+    python manage.py purge_recovery_codes
+    python manage.py purge_recovery_codes --lote 500 --dry-run
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import RecoveryCode
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes los códigos de recuperación expirados'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Filas eliminadas por lote',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar los códigos expirados, sin eliminarlos',
+        )
+    
+    def handle(self, *args, **options):
+        lote = options['lote']
+        ahora = timezone.now()
+        expirados = RecoveryCode.objects.filter(expires_at__lt=ahora)
+        
+        if options['dry_run']:
+            self.stdout.write(f'🔍 Códigos expirados: {expirados.count()} (no se eliminó nada)')
+            return
+        
+        inicio = time.perf_counter()
+        total = 0
+        while True:
+            # Lote por el índice de expires_at; se borra por llave primaria
+            ids = list(expirados.order_by('expires_at').values_list('id', flat=True)[:lote])
+            if not ids:
+                break
+            eliminados, _ = RecoveryCode.objects.filter(id__in=ids).delete()
+            total += eliminados
+        
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Eliminados {total} códigos expirados en {duracion:.2f}s'
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.22 on 2026-10-19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copiar_carreras_permitidas(apps, schema_editor):
+    """
+    Poblar materias_carreras a partir del JSON carreras_permitidas
+    """
+    Materia = apps.get_model('users', 'Materia')
+    MateriaCarrera = apps.get_model('users', 'MateriaCarrera')
+    
+    relaciones = [
+        MateriaCarrera(materia_id=materia_id, carrera=carrera)
+        for materia_id, carreras in Materia.objects.values_list('id', 'carreras_permitidas')
+        for carrera in set(carreras or [])
+    ]
+    MateriaCarrera.objects.bulk_create(relaciones, batch_size=500)
+
+
+def borrar_carreras(apps, schema_editor):
+    MateriaCarrera = apps.get_model('users', 'MateriaCarrera')
+    MateriaCarrera.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_emaillog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MateriaCarrera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('carrera', models.CharField(choices=[('ICC', 'Ingeniería en Cs. de la Computación'), ('LCC', 'Licenciatura en Cs. de la Computación'), ('ITI', 'Ingeniería en Tecnologías de la Información')], max_length=10, verbose_name='Carrera')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='carreras', to='users.materia')),
+            ],
+            options={
+                'verbose_name': 'Carrera de materia',
+                'verbose_name_plural': 'Carreras de materias',
+                'db_table': 'materias_carreras',
+                'unique_together': {('carrera', 'materia')},
+            },
+        ),
+        migrations.RunPython(copiar_carreras_permitidas, borrar_carreras),
+    ]
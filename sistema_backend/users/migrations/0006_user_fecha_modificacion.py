@@ -0,0 +1,20 @@
+# Generated by Django 4.2.22 on 2026-10-19
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_materiacarrera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
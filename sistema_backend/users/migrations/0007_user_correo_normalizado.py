@@ -0,0 +1,43 @@
+# Generated by Django 4.2.22 on 2026-10-19
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def poblar_correo_normalizado(apps, schema_editor):
+    """Llenar correo_normalizado en un solo UPDATE y detectar duplicados antes del índice único"""
+    User = apps.get_model('users', 'User')
+    User.objects.update(correo_normalizado=Lower(Trim('correo')))
+
+    duplicados = list(
+        User.objects.values('correo_normalizado')
+        .annotate(n=models.Count('id_usuario'))
+        .filter(n__gt=1)
+        .values_list('correo_normalizado', flat=True)[:10]
+    )
+    if duplicados:
+        raise RuntimeError(
+            'Hay correos que solo difieren en mayúsculas/minúsculas; '
+            f'corrígelos antes de migrar: {", ".join(duplicados)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='correo_normalizado',
+            field=models.CharField(editable=False, max_length=254, null=True, verbose_name='Correo normalizado'),
+        ),
+        migrations.RunPython(poblar_correo_normalizado, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='correo_normalizado',
+            field=models.CharField(editable=False, max_length=254, unique=True, verbose_name='Correo normalizado'),
+        ),
+    ]
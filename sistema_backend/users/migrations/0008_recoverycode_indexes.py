@@ -0,0 +1,21 @@
+# Generated by Django 4.2.22 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_correo_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recoverycode',
+            index=models.Index(fields=['user', 'code', 'used', 'expires_at'], name='recovery_codes_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recoverycode',
+            index=models.Index(fields=['expires_at'], name='recovery_codes_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.22 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_recoverycode_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=40)),
+                ('ventana', models.BigIntegerField()),
+                ('conteo', models.PositiveIntegerField(default=0)),
+                ('expira', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Contador de rate limit',
+                'verbose_name_plural': 'Contadores de rate limit',
+                'db_table': 'rate_limit_counters',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ratelimitcounter',
+            index=models.Index(fields=['expira'], name='rate_limit_counters_exp_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ratelimitcounter',
+            constraint=models.UniqueConstraint(fields=('clave', 'ventana'), name='rate_limit_counters_uniq'),
+        ),
+    ]
@@ -38,19 +38,26 @@ class Materia(models.Model):
     @staticmethod
     def get_materias_por_carrera(carrera_codigo):
         """
-        Retorna las materias disponibles para una carrera específica
-        Compatible con SQLite y MySQL/PostgreSQL
+        Retorna las materias disponibles para una carrera específica.
+        Usa la tabla normalizada materias_carreras, así que la consulta es una
+        búsqueda por índice en cualquier motor (SQLite, MySQL, TiDB)
         """
-        from django.db import connection
+        return Materia.objects.filter(carreras__carrera=carrera_codigo)
+    
+    def sincronizar_carreras(self):
+        """
+        Sincronizar la tabla normalizada materias_carreras con carreras_permitidas
+        """
+        actuales = set(self.carreras.values_list('carrera', flat=True))
+        deseadas = set(self.carreras_permitidas or [])
         
-        # Verificar si estamos usando SQLite
-        if 'sqlite' in connection.vendor:
-            # Para SQLite: filtrar manualmente usando Python
-            todas_materias = list(Materia.objects.all())
-            return [m for m in todas_materias if carrera_codigo in m.carreras_permitidas]
-        else:
-            # Para MySQL/PostgreSQL: usar contains
-            return Materia.objects.filter(carreras_permitidas__contains=[carrera_codigo])
+        if actuales - deseadas:
+            self.carreras.filter(carrera__in=actuales - deseadas).delete()
+        if deseadas - actuales:
+            MateriaCarrera.objects.bulk_create([
+                MateriaCarrera(materia=self, carrera=carrera)
+                for carrera in sorted(deseadas - actuales)
+            ])
 
 
 class UserManager(BaseUserManager):
@@ -112,6 +119,14 @@ class User(AbstractBaseUser, PermissionsMixin):
         unique=True,
         verbose_name='Correo electrónico'
     )
+    # Correo en minúsculas para búsquedas sin distinción de mayúsculas por índice
+    # (correo__iexact se traduce a UPPER()/LIKE en MySQL/TiDB y no usa el índice)
+    correo_normalizado = models.CharField(
+        max_length=254,
+        unique=True,
+        editable=False,
+        verbose_name='Correo normalizado'
+    )
     nombre_completo = models.CharField(
         max_length=150,
         verbose_name='Nombre completo'
@@ -158,6 +173,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     objects = UserManager()
     
@@ -172,6 +188,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.id_usuario} - {self.nombre_completo}"
     
+    @staticmethod
+    def normalizar_correo(correo):
+        """Forma canónica del correo para búsquedas (correo_normalizado)"""
+        return (correo or '').strip().lower()
+    
+    def save(self, *args, **kwargs):
+        self.correo_normalizado = self.normalizar_correo(self.correo)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'correo' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'correo_normalizado'}
+        super().save(*args, **kwargs)
+    
     def get_full_name(self):
         return self.nombre_completo
     
@@ -179,6 +207,33 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.nombre_completo.split()[0] if self.nombre_completo else self.id_usuario
 
 
+class MateriaCarrera(models.Model):
+    """
+    Relación normalizada materia ↔ carrera (reemplaza las búsquedas sobre el JSON
+    carreras_permitidas). El índice único (carrera, materia) resuelve
+    "materias de la carrera X" con un index seek.
+    """
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='carreras'
+    )
+    carrera = models.CharField(
+        max_length=10,
+        choices=User.Carrera.choices,
+        verbose_name='Carrera'
+    )
+    
+    class Meta:
+        db_table = 'materias_carreras'
+        unique_together = ['carrera', 'materia']
+        verbose_name = 'Carrera de materia'
+        verbose_name_plural = 'Carreras de materias'
+    
+    def __str__(self):
+        return f"{self.carrera} → {self.materia.nombre}"
+
+
 class RecoveryCode(models.Model):
     """
     Modelo para almacenar códigos de recuperación de contraseña
@@ -195,6 +250,12 @@ class RecoveryCode(models.Model):
     
     class Meta:
         db_table = 'recovery_codes'
+        indexes = [
+            # Verificación: WHERE user_id=? AND code=? AND used=false AND expires_at>now
+            models.Index(fields=['user', 'code', 'used', 'expires_at'], name='recovery_codes_lookup_idx'),
+            # Purga por lotes de códigos expirados
+            models.Index(fields=['expires_at'], name='recovery_codes_expires_idx'),
+        ]
         verbose_name = 'Código de recuperación'
         verbose_name_plural = 'Códigos de recuperación'
     
@@ -261,3 +322,29 @@ class EmailLog(models.Model):
     
     def __str__(self):
         return f"{self.get_tipo_display()} → {self.destinatario} ({self.estado})"
+
+
+class RateLimitCounter(models.Model):
+    """
+    Contador de peticiones por cubeta y ventana de tiempo
+    (users/ratelimit.DatabaseBackend, compartido entre workers)
+    """
+    clave = models.CharField(max_length=40)  # sha1 de path|ip|valor
+    ventana = models.BigIntegerField()
+    conteo = models.PositiveIntegerField(default=0)
+    expira = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'rate_limit_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['clave', 'ventana'], name='rate_limit_counters_uniq'),
+        ]
+        indexes = [
+            # Purga de ventanas vencidas
+            models.Index(fields=['expira'], name='rate_limit_counters_exp_idx'),
+        ]
+        verbose_name = 'Contador de rate limit'
+        verbose_name_plural = 'Contadores de rate limit'
+    
+    def __str__(self):
+        return f"{self.clave}@{self.ventana}: {self.conteo}"
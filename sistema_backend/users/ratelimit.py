@@ -0,0 +1,294 @@
+"""
+Limitador de peticiones (token bucket) para los endpoints de autenticación.
+
+login hace trabajo de bcrypt y forgot-password envía correos, y ninguno requiere
+sesión: una ráfaga automatizada satura los workers y la cuota de Brevo. Cada
+regla de RATE_LIMIT_RULES tiene dos cubetas independientes: una por IP y otra
+por identificador (matrícula o correo leído del cuerpo). Si alguna se vacía la
+petición se rechaza con 429 y Retry-After.
+
+El estado de las cubetas vive en un backend intercambiable (RATE_LIMIT_BACKEND):
+- DatabaseBackend (por defecto): contadores en la tabla rate_limit_counters,
+  compartidos por todos los workers y réplicas. El incremento es un
+  UPDATE conteo = conteo + 1, atómico en la base de datos.
+- CacheBackend: contadores en la caché de Django (RATE_LIMIT_CACHE_ALIAS) con
+  add/incr. Solo es compartido y atómico con Redis o Memcached en CACHES; la
+  LocMemCache por defecto es de cada proceso.
+- MemoryBackend: token bucket en memoria del proceso; con N workers el límite
+  efectivo es N veces mayor. Solo para desarrollo con un worker.
+
+Los backends compartidos usan ventanas fijas de capacidad / tasa segundos
+(capacidad peticiones por ventana): mismo ritmo sostenido que la cubeta, pero
+en el cambio de ventana se pueden colar hasta 2 × capacidad.
+
+La IP sale de REMOTE_ADDR. X-Forwarded-For lo puede escribir el cliente: solo
+se toma el salto que agregó el último de los RATE_LIMIT_TRUSTED_PROXIES proxies
+de confianza (contando desde la derecha).
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+from config.middleware import sin_medir
+
+# path → capacidad de la cubeta, tokens recuperados por minuto y campo del cuerpo con el identificador
+DEFAULT_RULES = {
+    '/api/login': {'capacidad': 10, 'por_minuto': 10, 'campo': 'id_usuario'},
+    '/api/forgot-password': {'capacidad': 3, 'por_minuto': 1, 'campo': 'correo'},
+    '/api/verify-recovery-code': {'capacidad': 10, 'por_minuto': 5, 'campo': 'correo'},
+    '/api/reset-password': {'capacidad': 5, 'por_minuto': 2, 'campo': 'correo'},
+}
+
+
+def _rellenar(estado, capacidad, tasa, ahora):
+    """Tokens disponibles después de recuperar los del tiempo transcurrido"""
+    if estado is None:
+        return float(capacidad)
+    tokens, ultimo = estado
+    return min(float(capacidad), tokens + (ahora - ultimo) * tasa)
+
+
+def _consumir(estado, capacidad, tasa, ahora):
+    """(permitido, segundos para reintentar, nuevo estado)"""
+    tokens = _rellenar(estado, capacidad, tasa, ahora)
+    if tokens >= 1:
+        return True, 0, (tokens - 1, ahora)
+    return False, (1 - tokens) / tasa, (tokens, ahora)
+
+
+class MemoryBackend:
+    """Cubetas en memoria del proceso (LRU acotada)"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, capacidad, tasa):
+        ahora = time.monotonic()
+        with self._lock:
+            permitido, retry_after, estado = _consumir(self._data.get(clave), capacidad, tasa, ahora)
+            self._data[clave] = estado
+            self._data.move_to_end(clave)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return permitido, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _ventana(capacidad, tasa, ahora):
+    """(índice de la ventana fija, segundos hasta que termine)"""
+    duracion = capacidad / tasa
+    indice = int(ahora // duracion)
+    return indice, (indice + 1) * duracion - ahora
+
+
+def _llave(clave):
+    return hashlib.sha1(clave.encode('utf-8')).hexdigest()
+
+
+class DatabaseBackend:
+    """
+    Contadores por ventana fija en la base de datos (modelo RateLimitCounter).
+    La primera petición de la ventana inserta la fila; si otro worker la insertó
+    antes (IntegrityError) se incrementa la existente.
+    """
+
+    def consumir(self, clave, capacidad, tasa):
+        from .models import RateLimitCounter
+
+        # time.time(): el reloj debe ser comparable entre procesos
+        ahora = time.time()
+        indice, restante = _ventana(capacidad, tasa, ahora)
+        filas = RateLimitCounter.objects.filter(clave=_llave(clave), ventana=indice)
+
+        if not filas.update(conteo=F('conteo') + 1):
+            expira = datetime.fromtimestamp(ahora + restante, tz=dt_timezone.utc)
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(clave=_llave(clave), ventana=indice, conteo=1, expira=expira)
+            except IntegrityError:
+                filas.update(conteo=F('conteo') + 1)
+            else:
+                # Una sola vez por cubeta y ventana: purgar las ventanas vencidas
+                RateLimitCounter.objects.filter(
+                    expira__lt=datetime.fromtimestamp(ahora, tz=dt_timezone.utc)
+                ).delete()
+                return True, 0
+
+        conteo = filas.values_list('conteo', flat=True).first() or 0
+        if conteo <= capacidad:
+            return True, 0
+        return False, restante
+
+    def reset(self):
+        from .models import RateLimitCounter
+
+        RateLimitCounter.objects.all().delete()
+
+
+class CacheBackend:
+    """
+    Contadores por ventana fija en la caché de Django: add() crea el contador e
+    incr() lo incrementa. Compartido y atómico con Redis/Memcached; la
+    LocMemCache (sin CACHES configurado) es de cada proceso.
+    """
+
+    def __init__(self, alias=None):
+        from django.core.cache import caches
+
+        self.cache = caches[alias or getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    def consumir(self, clave, capacidad, tasa):
+        indice, restante = _ventana(capacidad, tasa, time.time())
+        llave = f'ratelimit:{_llave(clave)}:{indice}'
+        timeout = math.ceil(restante) + 1
+        self.cache.add(llave, 0, timeout=timeout)
+        try:
+            conteo = self.cache.incr(llave)
+        except ValueError:
+            # Expiró entre add() e incr()
+            self.cache.add(llave, 1, timeout=timeout)
+            conteo = 1
+        if conteo <= capacidad:
+            return True, 0
+        return False, restante
+
+    def reset(self):
+        self.cache.clear()
+
+
+class RateLimitStats:
+    """Contadores de peticiones permitidas y rechazadas por regla"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def registrar(self, path, resultado):
+        with self._lock:
+            contadores = self._data.setdefault(path, {'permitidas': 0, 'rechazadas_ip': 0, 'rechazadas_identificador': 0})
+            contadores[resultado] += 1
+
+    def stats(self):
+        with self._lock:
+            return {path: dict(contadores) for path, contadores in self._data.items()}
+
+
+rate_limit_stats = RateLimitStats()
+
+
+def _ip_cliente(request):
+    """
+    IP del cliente. Los valores de X-Forwarded-For a la izquierda los controla el
+    cliente: con RATE_LIMIT_TRUSTED_PROXIES = n se toma el n-ésimo desde la
+    derecha (el que agregó nuestro primer proxy); con 0, REMOTE_ADDR.
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        saltos = [salto.strip() for salto in forwarded.split(',') if salto.strip()]
+        if len(saltos) >= proxies:
+            return saltos[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identificador(request, campo):
+    """Matrícula/correo del cuerpo JSON o del formulario (normalizado), o None"""
+    try:
+        if request.content_type == 'application/json':
+            valor = json.loads(request.body or b'{}').get(campo)
+        else:
+            valor = request.POST.get(campo)
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(valor, str) or not valor.strip():
+        return None
+    return valor.strip().lower()
+
+
+class RateLimitMiddleware:
+    """
+    Aplica RATE_LIMIT_RULES a los POST de los endpoints de autenticación.
+    Funciona en modo síncrono (WSGI) y async (ASGI) sin adaptador de por medio.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, 'RATE_LIMIT_ENABLED', True)
+        self.rules = {
+            path.rstrip('/'): regla
+            for path, regla in getattr(settings, 'RATE_LIMIT_RULES', DEFAULT_RULES).items()
+        }
+        backend = getattr(settings, 'RATE_LIMIT_BACKEND', 'users.ratelimit.DatabaseBackend')
+        self.backend = import_string(backend)()
+
+    def _regla(self, request):
+        """(path, regla) si la petición está limitada, o (None, None)"""
+        if not self.enabled or request.method != 'POST':
+            return None, None
+        path = request.path_info.rstrip('/')
+        return path, self.rules.get(path)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        path, regla = self._regla(request)
+        if regla is not None:
+            rechazo = self._verificar(request, path, regla)
+            if rechazo is not None:
+                return rechazo
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        path, regla = self._regla(request)
+        if regla is not None:
+            # El backend puede usar la base de datos: fuera del event loop
+            rechazo = await sync_to_async(self._verificar)(request, path, regla)
+            if rechazo is not None:
+                return rechazo
+        return await self.get_response(request)
+
+    def _verificar(self, request, path, regla):
+        capacidad = regla['capacidad']
+        tasa = regla['por_minuto'] / 60
+
+        cubetas = [('rechazadas_ip', f'{path}|ip|{_ip_cliente(request)}')]
+        identificador = _identificador(request, regla['campo'])
+        if identificador:
+            cubetas.append(('rechazadas_identificador', f'{path}|id|{identificador}'))
+
+        for resultado, clave in cubetas:
+            # Las consultas del backend no cuentan para el presupuesto de la vista
+            with sin_medir():
+                permitido, retry_after = self.backend.consumir(clave, capacidad, tasa)
+            if not permitido:
+                rate_limit_stats.registrar(path, resultado)
+                response = JsonResponse({
+                    'success': False,
+                    'message': 'Demasiados intentos. Espera un momento antes de volver a intentarlo'
+                }, status=429)
+                response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+
+        rate_limit_stats.registrar(path, 'permitidas')
+        return None
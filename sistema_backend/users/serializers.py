@@ -3,9 +3,41 @@ Serializadores para la API de usuarios
 """
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.db.models import Prefetch, Q
 import re
 from .models import User, Materia
+from .catalog import materia_catalog
+from .hash_pool import hash_pool
+from .hashers import BcryptPasswordHasher
+from .enrollment import error_materias_carrera
+
+
+class MateriaIdsField(serializers.ListField):
+    """
+    Lista de ids de materias validada contra el catálogo en memoria
+    (sin una query por id como PrimaryKeyRelatedField)
+    """
+    child = serializers.IntegerField()
+    
+    def to_internal_value(self, data):
+        ids = super().to_internal_value(data)
+        for materia_id in ids:
+            if not materia_catalog.existe(materia_id):
+                raise serializers.ValidationError(
+                    f'Clave primaria "{materia_id}" inválida - objeto no existe.'
+                )
+        return list(dict.fromkeys(ids))
+
+
+def validar_materias_carrera(materias_ids, carrera):
+    """Validar que las materias correspondan a la carrera (chequeo en memoria)"""
+    mensaje = error_materias_carrera(materias_ids, carrera)
+    if mensaje:
+        raise serializers.ValidationError({'materias': mensaje})
+
+
+MATERIA_FIELDS = ('id', 'codigo', 'nombre', 'nrc', 'carreras_permitidas')
 
 
 class MateriaSerializer(serializers.ModelSerializer):
@@ -13,8 +45,8 @@ class MateriaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Materia
-        fields = ['id', 'codigo', 'nombre', 'nrc', 'carreras_permitidas']
-        read_only_fields = ['id', 'codigo', 'nombre', 'nrc', 'carreras_permitidas']
+        fields = list(MATERIA_FIELDS)
+        read_only_fields = list(MATERIA_FIELDS)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -37,17 +69,54 @@ class UserSerializer(serializers.ModelSerializer):
         return MateriaSerializer(materias, many=True).data
 
 
+class UserListSerializer(serializers.BaseSerializer):
+    """
+    Serializador ligero para listados grandes de usuarios.
+    Produce la misma salida que UserSerializer, pero sin la maquinaria de campos
+    de DRF por fila y leyendo las materias precargadas con prefetch_queryset().
+    """
+    
+    @staticmethod
+    def prefetch_queryset(queryset):
+        """Proyección de columnas + materias de estudiante y docente (2 queries en total)"""
+        materias = Materia.objects.only(*MATERIA_FIELDS)
+        return queryset.only(
+            'id_usuario', 'nombre_completo', 'correo', 'telefono', 'sexo', 'carrera', 'rol'
+        ).prefetch_related(
+            Prefetch('materias_estudiante', queryset=materias, to_attr='materias_estudiante_list'),
+            Prefetch('materias_docente', queryset=materias, to_attr='materias_docente_list'),
+        )
+    
+    def to_representation(self, obj):
+        if obj.rol == 'estudiante':
+            materias = obj.materias_estudiante_list
+        elif obj.rol == 'docente':
+            materias = obj.materias_docente_list
+        else:
+            materias = []
+        
+        return {
+            'id_usuario': obj.id_usuario,
+            'nombre_completo': obj.nombre_completo,
+            'correo': obj.correo,
+            'telefono': obj.telefono,
+            'sexo': obj.sexo,
+            'carrera': obj.carrera,
+            'rol': obj.rol,
+            'materias': [
+                {field: getattr(m, field) for field in MATERIA_FIELDS}
+                for m in materias
+            ],
+        }
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """Serializador para registro de usuarios"""
     
     password = serializers.CharField(write_only=True, min_length=8, max_length=20)
     nombre_completo = serializers.CharField(max_length=50, min_length=3)
     correo = serializers.EmailField(max_length=50)
-    materias = serializers.PrimaryKeyRelatedField(
-        many=True, 
-        queryset=Materia.objects.all(),
-        required=False
-    )
+    materias = MateriaIdsField(required=False)
     
     class Meta:
         model = User
@@ -74,6 +143,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         if not re.match(email_regex, value):
             raise serializers.ValidationError('Formato de correo electrónico inválido')
+        if User.objects.filter(correo_normalizado=User.normalizar_correo(value)).exists():
+            raise serializers.ValidationError('El correo electrónico ya está registrado', code='unique')
         return value.lower()
     
     def validate_rol(self, value):
@@ -94,27 +165,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         
         # Validar que las materias correspondan a la carrera
         if materias:
-            materias_permitidas = Materia.get_materias_por_carrera(carrera)
-            # Convertir a lista si es queryset
-            if hasattr(materias_permitidas, 'values_list'):
-                materias_ids_permitidas = set(materias_permitidas.values_list('id', flat=True))
-            else:
-                # Es una lista de objetos
-                materias_ids_permitidas = set(m.id for m in materias_permitidas)
-            
-            materias_ids_seleccionadas = set(m.id for m in materias)
-            
-            # Verificar que todas las materias seleccionadas sean válidas para la carrera
-            if not materias_ids_seleccionadas.issubset(materias_ids_permitidas):
-                raise serializers.ValidationError({
-                    'materias': f'Las materias seleccionadas no corresponden a la carrera {carrera}'
-                })
-            
-            # Validar que ITI solo pueda seleccionar 1 materia
-            if carrera == 'ITI' and len(materias) > 1:
-                raise serializers.ValidationError({
-                    'materias': 'Para la carrera ITI solo puede seleccionar una materia'
-                })
+            validar_materias_carrera(materias, carrera)
         
         return data
     
@@ -150,36 +201,21 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
     
     def validate(self, data):
-        import bcrypt
-        
         id_usuario = data.get('id_usuario')
         password = data.get('password')
         
-        # Buscar por matrícula o correo
-        try:
-            user = User.objects.get(id_usuario=id_usuario)
-        except User.DoesNotExist:
-            try:
-                user = User.objects.get(correo__iexact=id_usuario)
-            except User.DoesNotExist:
-                raise serializers.ValidationError('Matrícula/Correo o contraseña incorrectos')
-        
-        # Verificar contraseña - soportar tanto bcrypt de Node.js como Django
-        password_valid = False
-        stored_password = user.password
+        # Buscar por matrícula o correo en una sola consulta (si ambos coinciden, gana la matrícula)
+        candidatos = list(
+            User.objects.filter(
+                Q(id_usuario=id_usuario) | Q(correo_normalizado=User.normalizar_correo(id_usuario))
+            )[:2]
+        )
+        if not candidatos:
+            raise serializers.ValidationError('Matrícula/Correo o contraseña incorrectos')
+        user = min(candidatos, key=lambda u: u.id_usuario != id_usuario)
         
-        # Si es hash bcrypt de Node.js ($2b$, $2a$, $2y$)
-        if stored_password.startswith('$2'):
-            try:
-                password_valid = bcrypt.checkpw(
-                    password.encode('utf-8'),
-                    stored_password.encode('utf-8')
-                )
-            except (ValueError, TypeError):
-                password_valid = False
-        else:
-            # Hash de Django (PBKDF2, etc.)
-            password_valid = user.check_password(password)
+        # Verificar contraseña en el pool de hashing (puede lanzar HashPoolSaturado)
+        password_valid, nuevo_hash = hash_pool.run(verificar_password, password, user.password)
         
         if not password_valid:
             raise serializers.ValidationError('Matrícula/Correo o contraseña incorrectos')
@@ -187,10 +223,53 @@ class LoginSerializer(serializers.Serializer):
         if not user.is_active:
             raise serializers.ValidationError('Esta cuenta está desactivada')
         
+        if nuevo_hash:
+            # Re-hash al hasher/costo configurado; solo si nadie cambió la contraseña mientras tanto
+            User.objects.filter(pk=user.pk, password=user.password).update(password=nuevo_hash)
+            user.password = nuevo_hash
+        
         data['user'] = user
         return data
 
 
+def _necesita_rehash(stored_password):
+    """True si el hash no es del hasher por defecto o tiene otro costo"""
+    if stored_password.startswith('$2'):
+        hasher = BcryptPasswordHasher()
+    else:
+        try:
+            hasher = identify_hasher(stored_password)
+        except ValueError:
+            return False
+    return hasher.algorithm != get_hasher('default').algorithm or hasher.must_update(stored_password)
+
+
+def verificar_password(password, stored_password):
+    """
+    Verificar contraseña - soportar tanto bcrypt de Node.js como Django.
+    Retorna (valida, nuevo_hash); nuevo_hash es None si el hash ya está al día.
+    No toca la base de datos: se ejecuta en los hilos del pool de hashing.
+    """
+    import bcrypt
+    
+    # Si es hash bcrypt de Node.js ($2b$, $2a$, $2y$)
+    if stored_password.startswith('$2'):
+        try:
+            valida = bcrypt.checkpw(
+                password.encode('utf-8'),
+                stored_password.encode('utf-8')
+            )
+        except (ValueError, TypeError):
+            valida = False
+    else:
+        # Hash de Django (PBKDF2, etc.)
+        valida = check_password(password, stored_password)
+    
+    if valida and _necesita_rehash(stored_password):
+        return True, make_password(password)
+    return valida, None
+
+
 class ForgotPasswordSerializer(serializers.Serializer):
     """Serializador para solicitar recuperación de contraseña"""
     
@@ -198,7 +277,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
     
     def validate_correo(self, value):
         try:
-            User.objects.get(correo__iexact=value)
+            User.objects.get(correo_normalizado=User.normalizar_correo(value))
         except User.DoesNotExist:
             raise serializers.ValidationError('No existe una cuenta con este correo electrónico')
         return value.lower()
@@ -236,10 +315,7 @@ class UpdateMateriasSerializer(serializers.Serializer):
     """Serializador para actualizar las materias de un usuario"""
     
     id_usuario = serializers.CharField()
-    materias = serializers.PrimaryKeyRelatedField(
-        many=True, 
-        queryset=Materia.objects.all()
-    )
+    materias = MateriaIdsField()
     
     def validate(self, data):
         """Validar que las materias correspondan a la carrera del usuario"""
@@ -258,26 +334,7 @@ class UpdateMateriasSerializer(serializers.Serializer):
         
         # Validar que las materias correspondan a la carrera
         if materias:
-            materias_permitidas = Materia.get_materias_por_carrera(user.carrera)
-            # Convertir a lista si es queryset
-            if hasattr(materias_permitidas, 'values_list'):
-                materias_ids_permitidas = set(materias_permitidas.values_list('id', flat=True))
-            else:
-                # Es una lista de objetos
-                materias_ids_permitidas = set(m.id for m in materias_permitidas)
-            
-            materias_ids_seleccionadas = set(m.id for m in materias)
-            
-            if not materias_ids_seleccionadas.issubset(materias_ids_permitidas):
-                raise serializers.ValidationError({
-                    'materias': f'Las materias seleccionadas no corresponden a la carrera {user.carrera}'
-                })
-            
-            # Validar que ITI solo pueda seleccionar 1 materia
-            if user.carrera == 'ITI' and len(materias) > 1:
-                raise serializers.ValidationError({
-                    'materias': 'Para la carrera ITI solo puede seleccionar una materia'
-                })
+            validar_materias_carrera(materias, user.carrera)
         
         data['user'] = user
         return data
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import User, Materia
+from .cache import user_principals
+from .catalog import materia_catalog
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """
+    Invalidar el principal cacheado cuando cambia o se elimina un usuario
+    """
+    user_principals.invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.materias_estudiante.through)
+@receiver(m2m_changed, sender=User.materias_docente.through)
+def invalidate_user_principal_materias(sender, instance, reverse, pk_set, **kwargs):
+    """
+    Invalidar principales cuando cambian las materias de un usuario.
+    Si el cambio viene del lado de Materia, pk_set contiene los usuarios.
+    """
+    if not reverse:
+        user_principals.invalidate(instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            user_principals.invalidate(pk)
+    else:
+        # clear() desde Materia: no sabemos qué usuarios se afectaron
+        user_principals.clear()
+
+
+@receiver(post_save, sender=Materia)
+def sync_materia_carreras(sender, instance, raw=False, **kwargs):
+    """
+    Mantener materias_carreras al día con carreras_permitidas
+    y recargar el catálogo en el siguiente acceso
+    """
+    if not raw:
+        instance.sincronizar_carreras()
+    materia_catalog.invalidate()
+
+
+@receiver(post_delete, sender=Materia)
+def invalidate_materia_catalog(sender, **kwargs):
+    """
+    Recargar el catálogo de materias en el siguiente acceso
+    """
+    materia_catalog.invalidate()
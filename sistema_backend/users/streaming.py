@@ -0,0 +1,61 @@
+"""
+Respuestas JSON en streaming para listados grandes.
+
+En lugar de construir la lista completa en memoria y renderizarla de una vez,
+las filas se serializan una por una desde un generador (normalmente alimentado
+por QuerySet.iterator()) y se envían en bloques. El JSON resultante es idéntico
+byte a byte al que produce el renderer JSON de la API (config/renderers.py).
+"""
+from django.http import StreamingHttpResponse
+
+from config.renderers import dumps
+
+# Filas por bloque enviado al cliente
+FILAS_POR_BLOQUE = 500
+
+
+def _generar(filas, clave, antes, despues):
+    if clave is None:
+        prefijo, sufijo = b'[', b']'
+    else:
+        campos = dumps(antes or {})[:-1]
+        prefijo = campos + (b',' if antes else b'') + dumps(clave) + b':['
+        sufijo = None
+
+    yield prefijo
+
+    total = 0
+    bloque = []
+    for fila in filas:
+        bloque.append(dumps(fila))
+        total += 1
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield (b',' if total > len(bloque) else b'') + b','.join(bloque)
+            bloque = []
+    if bloque:
+        yield (b',' if total > len(bloque) else b'') + b','.join(bloque)
+
+    if sufijo is None:
+        extra = despues(total) if despues else {}
+        sufijo = b']' + (b',' + dumps(extra)[1:] if extra else b'}')
+    yield sufijo
+
+
+def stream_json(filas, clave=None, antes=None, despues=None, status=200):
+    """
+    Respuesta JSON en streaming.
+
+    Args:
+        filas: iterable de dicts (una fila de la lista por elemento)
+        clave: nombre de la lista dentro del envelope; None para emitir solo la lista
+        antes: dict con los campos que van antes de la lista (p.ej. {'success': True})
+        despues: callable(total_filas) → dict con los campos que van después de la lista
+
+    Ejemplo: stream_json(filas, 'estudiantes', {'success': True}, lambda n: {'total': n})
+    produce {"success":true,"estudiantes":[...],"total":N}
+    """
+    return StreamingHttpResponse(
+        _generar(filas, clave, antes, despues),
+        status=status,
+        content_type='application/json',
+    )
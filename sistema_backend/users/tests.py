@@ -0,0 +1,656 @@
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+import bcrypt
+from django.apps import apps as django_apps
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .cache import UserPrincipal, UserPrincipalCache, user_principals
+from .catalog import materia_catalog
+from .email_queue import NORMAL, PRIORITARIO, EmailQueue, email_queue
+from .email_service import send_welcome_email
+from .enrollment import AGREGAR, inscribir_lote
+from .hash_pool import HashPool
+from .hashers import BcryptPasswordHasher, TunedPBKDF2PasswordHasher
+from .models import Materia, MateriaCarrera, RecoveryCode, User
+from .ratelimit import CacheBackend, DatabaseBackend, _ip_cliente
+from .serializers import UserSerializer
+from .streaming import FILAS_POR_BLOQUE, stream_json
+from .views import _enviar_codigo_recuperacion
+
+
+class UserPrincipalCacheTests(TestCase):
+    """Invalidación de principales por señales y durante la lectura de la BD"""
+
+    def test_invalidacion_durante_la_carga(self):
+        cache = UserPrincipalCache()
+        vieja = UserPrincipal('D001', 'docente', 'Nombre viejo', 'd@buap.mx', 'ICC', True)
+        nueva = vieja._replace(nombre_completo='Nombre nuevo')
+
+        def cargar_e_invalidar(id_usuario):
+            # La señal post_save llega entre la consulta y el guardado en caché
+            cache.invalidate(id_usuario)
+            return vieja
+
+        with mock.patch.object(UserPrincipalCache, '_load', side_effect=cargar_e_invalidar):
+            self.assertEqual(cache.get('D001'), vieja)
+        with mock.patch.object(UserPrincipalCache, '_load', return_value=nueva):
+            self.assertEqual(cache.get('D001'), nueva)
+            self.assertEqual(cache.get('D001'), nueva)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_guardar_el_usuario_invalida(self):
+        user_principals.clear()
+        docente = User.objects.create_user(
+            'D001', 'd@buap.mx', 'Clave123!', nombre_completo='Nombre viejo', rol='docente'
+        )
+        self.assertEqual(user_principals.get('D001').nombre_completo, 'Nombre viejo')
+        docente.nombre_completo = 'Nombre nuevo'
+        docente.save()
+        self.assertEqual(user_principals.get('D001').nombre_completo, 'Nombre nuevo')
+
+
+@override_settings(EMAIL_ENABLED=False)
+class MateriaCatalogTests(TestCase):
+    """El catálogo en memoria valida el registro y se recarga cuando cambia una Materia"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.icc = Materia.objects.create(codigo='ICC-1', nombre='Programación', nrc='100', carreras_permitidas=['ICC'])
+        cls.lcc = Materia.objects.create(codigo='LCC-1', nombre='Lógica', nrc='200', carreras_permitidas=['LCC'])
+
+    def _registrar(self, materias):
+        return self.client.post('/api/register', data=json.dumps({
+            'id_usuario': '20260001', 'password': 'Clave123!', 'nombre_completo': 'Estudiante Uno',
+            'correo': 'e1@buap.mx', 'carrera': 'ICC', 'rol': 'estudiante', 'materias': materias,
+        }), content_type='application/json')
+
+    def test_registro_sin_consultar_materias(self):
+        materia_catalog.invalidate()
+        materia_catalog.existe(self.icc.id)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self._registrar([self.lcc.id]).status_code, 400)
+            self.assertEqual(self._registrar([999]).status_code, 400)
+        self.assertFalse([q for q in consultas.captured_queries if 'FROM "materias"' in q['sql']])
+
+        response = self._registrar([self.icc.id])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(User.objects.get(pk='20260001').materias_estudiante.values_list('id', flat=True)),
+                         [self.icc.id])
+
+    def test_se_recarga_al_cambiar_una_materia(self):
+        self.assertIn(self.icc.id, materia_catalog.ids_por_carrera('ICC'))
+        firma = materia_catalog.firma
+
+        self.icc.carreras_permitidas = ['LCC']
+        self.icc.save()
+        self.assertNotIn(self.icc.id, materia_catalog.ids_por_carrera('ICC'))
+        self.assertIn(self.icc.id, materia_catalog.ids_por_carrera('LCC'))
+        self.assertNotEqual(materia_catalog.firma, firma)
+
+        self.lcc.delete()
+        self.assertFalse(materia_catalog.existe(self.lcc.id))
+
+
+class MateriaCarreraTests(TestCase):
+    """La tabla materias_carreras refleja carreras_permitidas y resuelve las materias por carrera"""
+
+    def test_sincroniza_al_guardar(self):
+        materia = Materia.objects.create(codigo='X-1', nombre='Redes', nrc='300', carreras_permitidas=['ICC', 'ITI'])
+        self.assertEqual(set(materia.carreras.values_list('carrera', flat=True)), {'ICC', 'ITI'})
+
+        materia.carreras_permitidas = ['LCC', 'ITI']
+        materia.save()
+        self.assertEqual(set(materia.carreras.values_list('carrera', flat=True)), {'LCC', 'ITI'})
+
+    def test_migracion_copia_el_json(self):
+        migracion = importlib.import_module('users.migrations.0005_materiacarrera')
+        MateriaCarrera.objects.all().delete()
+        migracion.copiar_carreras_permitidas(django_apps, None)
+
+        esperado = {
+            (materia_id, carrera)
+            for materia_id, carreras in Materia.objects.values_list('id', 'carreras_permitidas')
+            for carrera in carreras
+        }
+        self.assertTrue(esperado)
+        self.assertEqual(set(MateriaCarrera.objects.values_list('materia_id', 'carrera')), esperado)
+
+    def test_materias_por_carrera(self):
+        for carrera in ('ICC', 'LCC', 'ITI'):
+            with self.subTest(carrera=carrera):
+                response = self.client.get('/api/materias', {'carrera': carrera})
+                esperado = {m.id for m in Materia.objects.all() if carrera in m.carreras_permitidas}
+                self.assertEqual({m['id'] for m in response.json()['materias']}, esperado)
+
+
+class GetUsersTests(TestCase):
+    """GET /api/users no hace una consulta de materias por usuario"""
+
+    def _listar(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/users')
+            contenido = b''.join(response.streaming_content)
+        return json.loads(contenido), len(consultas)
+
+    def _crear(self, desde, hasta):
+        materias = list(Materia.objects.all()[:2])
+        for i in range(desde, hasta):
+            rol = 'docente' if i % 3 == 0 else 'estudiante'
+            usuario = User.objects.create_user(
+                f'U{i:04d}', f'u{i}@buap.mx', None, nombre_completo=f'Usuario {i}', rol=rol, carrera='ICC'
+            )
+            getattr(usuario, f'materias_{rol}').set(materias)
+
+    def test_consultas_constantes(self):
+        self._crear(0, 3)
+        _, pocas = self._listar()
+        self._crear(3, 30)
+        datos, muchas = self._listar()
+        self.assertEqual(len(datos), 30)
+        self.assertEqual(muchas, pocas)
+
+    def test_misma_salida_que_user_serializer(self):
+        self._crear(0, 6)
+        datos, _ = self._listar()
+        esperado = UserSerializer(User.objects.all(), many=True).data
+        self.assertEqual(datos, json.loads(json.dumps(esperado)))
+
+
+class StreamJsonTests(TestCase):
+    """stream_json produce los mismos bytes que JSONRenderer de DRF, en uno o varios bloques"""
+
+    def _filas(self, n):
+        inicio = datetime(2026, 10, 19, 12, 30, tzinfo=dt_timezone.utc)
+        return [
+            {'id': i, 'nombre': f'Ñandú {i}', 'fecha': inicio + timedelta(microseconds=i), 'monto': Decimal('9.5')}
+            for i in range(n)
+        ]
+
+    def test_lista(self):
+        for n in (0, 1, FILAS_POR_BLOQUE, 2 * FILAS_POR_BLOQUE + 3):
+            with self.subTest(n=n):
+                filas = self._filas(n)
+                response = stream_json(iter(filas))
+                self.assertEqual(b''.join(response.streaming_content), JSONRenderer().render(filas))
+
+    def test_envelope(self):
+        for n in (0, FILAS_POR_BLOQUE + 1):
+            with self.subTest(n=n):
+                filas = self._filas(n)
+                response = stream_json(iter(filas), 'filas', {'success': True}, lambda total: {'total': total})
+                esperado = JSONRenderer().render({'success': True, 'filas': filas, 'total': n})
+                self.assertEqual(b''.join(response.streaming_content), esperado)
+
+        response = stream_json(iter(self._filas(2)), 'filas')
+        self.assertEqual(b''.join(response.streaming_content), JSONRenderer().render({'filas': self._filas(2)}))
+
+
+@override_settings(EMAIL_ENABLED=False, RATE_LIMIT_ENABLED=False)
+class CorreoNormalizadoTests(TestCase):
+    """Login y recuperación de contraseña encuentran el correo sin importar mayúsculas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            '20260001', 'Ana.Perez@BUAP.mx', 'Clave123!', nombre_completo='Ana Pérez', rol='estudiante', carrera='ICC'
+        )
+
+    def _post(self, ruta, **datos):
+        return self.client.post(ruta, data=json.dumps(datos), content_type='application/json')
+
+    def test_login(self):
+        response = self._post('/api/login', id_usuario='ANA.PEREZ@buap.MX', password='Clave123!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['id_usuario'], '20260001')
+
+    def test_recuperacion(self):
+        self.assertEqual(self._post('/api/forgot-password', correo='ana.perez@BUAP.MX').status_code, 200)
+        code = RecoveryCode.objects.get(user_id='20260001').code
+
+        response = self._post('/api/verify-recovery-code', correo='ANA.perez@buap.mx', code=code)
+        self.assertEqual(response.status_code, 200)
+        response = self._post('/api/reset-password', correo='Ana.Perez@Buap.Mx', code=code, new_password='Nueva456!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._post('/api/login', id_usuario='20260001', password='Nueva456!').status_code, 200)
+
+    def test_registro_con_el_mismo_correo(self):
+        response = self._post('/api/register', id_usuario='20260002', password='Clave123!', nombre_completo='Otra Ana',
+                              correo='ANA.PEREZ@buap.mx', carrera='ICC', rol='estudiante')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'El correo electrónico ya está registrado')
+
+
+class CorreoNormalizadoMigracionTests(TransactionTestCase):
+    """0007 se detiene si hay correos que solo difieren en mayúsculas"""
+
+    antes = [('users', '0006_user_fecha_modificacion')]
+    despues = [('users', '0007_user_correo_normalizado')]
+
+    def _migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        # Dejar el esquema en la última migración para las demás pruebas
+        apps = self._migrar(self.antes)
+        apps.get_model('users', 'User').objects.all().delete()
+        self._migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_correos_duplicados(self):
+        apps = self._migrar(self.antes)
+        HistoricalUser = apps.get_model('users', 'User')
+        HistoricalUser.objects.create(id_usuario='A1', correo='ana@buap.mx', nombre_completo='Ana', password='!')
+        HistoricalUser.objects.create(id_usuario='A2', correo='Ana@BUAP.mx ', nombre_completo='Ana', password='!')
+
+        with self.assertRaisesMessage(RuntimeError, 'ana@buap.mx'):
+            self._migrar(self.despues)
+
+        HistoricalUser.objects.filter(id_usuario='A2').delete()
+        apps = self._migrar(self.despues)
+        self.assertEqual(
+            apps.get_model('users', 'User').objects.get(id_usuario='A1').correo_normalizado, 'ana@buap.mx'
+        )
+
+
+class HashPoolTests(TestCase):
+    """Contadores del pool de hashing, reinicio tras un fork y 503 cuando está saturado"""
+
+    def test_verificacion_fallida_no_cuenta_como_completada(self):
+        pool = HashPool(workers=1)
+
+        def falla():
+            raise ValueError('hash inválido')
+
+        with self.assertRaises(ValueError):
+            pool.run(falla)
+        stats = pool.stats()
+        self.assertEqual(stats['completados'], 0)
+        self.assertEqual(stats['fallidos'], 1)
+        self.assertEqual(stats['pendientes'], 0)
+
+    def test_fork_reinicia_el_pool(self):
+        pool = HashPool(workers=1)
+        self.assertEqual(pool.run(lambda: 'ok'), 'ok')
+        ejecutor_padre = pool._executor
+
+        with mock.patch('users.hash_pool.os.getpid', return_value=os.getpid() + 1):
+            self.assertEqual(pool.stats()['completados'], 0)
+            self.assertEqual(pool.run(lambda: 'hijo'), 'hijo')
+            self.assertIsNot(pool._executor, ejecutor_padre)
+            self.assertEqual(pool.stats()['completados'], 1)
+        ejecutor_padre.shutdown()
+
+    def test_login_con_el_pool_saturado(self):
+        User.objects.create_user('20260001', 'e1@buap.mx', None, nombre_completo='Estudiante Uno')
+        pool = HashPool(workers=1, queue_limit=0)
+        ocupado, liberar = threading.Event(), threading.Event()
+
+        def bloquear():
+            ocupado.set()
+            liberar.wait(5)
+
+        hilo = threading.Thread(target=pool.run, args=(bloquear,))
+        hilo.start()
+        self.addCleanup(hilo.join)
+        self.addCleanup(liberar.set)
+        self.assertTrue(ocupado.wait(5))
+
+        with mock.patch('users.serializers.hash_pool', pool), override_settings(RATE_LIMIT_ENABLED=False):
+            response = self.client.post('/api/login', data=json.dumps({'id_usuario': '20260001', 'password': 'x'}),
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(pool.stats()['rechazados'], 1)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class RehashTests(TestCase):
+    """El login re-genera los hashes viejos con el hasher y costo configurados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('20260001', 'e1@buap.mx', None, nombre_completo='Estudiante Uno')
+
+    def _con_hash(self, encoded):
+        User.objects.filter(pk='20260001').update(password=encoded)
+
+    def _hash(self):
+        return User.objects.get(pk='20260001').password
+
+    def _login(self, password='Clave123!'):
+        return self.client.post('/api/login', data=json.dumps({'id_usuario': '20260001', 'password': password}),
+                                content_type='application/json')
+
+    def test_bcrypt_de_node_pasa_a_pbkdf2(self):
+        self._con_hash(bcrypt.hashpw(b'Clave123!', bcrypt.gensalt(10)).decode())
+        self.assertEqual(self._login().status_code, 200)
+
+        nuevo = self._hash()
+        self.assertTrue(nuevo.startswith(f'pbkdf2_sha256${TunedPBKDF2PasswordHasher.iterations}$'))
+        self.assertTrue(check_password('Clave123!', nuevo))
+
+    def test_pbkdf2_con_otras_iteraciones(self):
+        hasher = TunedPBKDF2PasswordHasher()
+        self._con_hash(hasher.encode('Clave123!', hasher.salt(), iterations=1000))
+        self.assertEqual(self._login().status_code, 200)
+        self.assertEqual(hasher.decode(self._hash())['iterations'], TunedPBKDF2PasswordHasher.iterations)
+
+        # Ya al día: no se vuelve a escribir
+        actual = self._hash()
+        self.assertEqual(self._login().status_code, 200)
+        self.assertEqual(self._hash(), actual)
+
+    def test_login_fallido_no_reescribe(self):
+        viejo = bcrypt.hashpw(b'Clave123!', bcrypt.gensalt(10)).decode()
+        self._con_hash(viejo)
+        self.assertEqual(self._login('Otra123!').status_code, 401)
+        self.assertEqual(self._hash(), viejo)
+
+    def test_cambio_concurrente_no_se_pisa(self):
+        self._con_hash(bcrypt.hashpw(b'Clave123!', bcrypt.gensalt(10)).decode())
+        cambiada = make_password('Cambiada789!')
+
+        def verificar_y_cambiar(fn, *args):
+            resultado = fn(*args)
+            # reset_password termina mientras el login verificaba el hash viejo
+            self._con_hash(cambiada)
+            return resultado
+
+        with mock.patch('users.serializers.hash_pool.run', side_effect=verificar_y_cambiar):
+            self.assertEqual(self._login().status_code, 200)
+        self.assertEqual(self._hash(), cambiada)
+
+    def test_must_update_de_bcrypt(self):
+        hasher = BcryptPasswordHasher()
+        self.assertFalse(hasher.must_update(f'$2b${hasher.rounds:02d}$' + 'x' * 53))
+        self.assertTrue(hasher.must_update('$2b$04$' + 'x' * 53))
+        self.assertTrue(hasher.must_update('$2b$'))
+
+
+class RateLimitTests(TestCase):
+    """Cubetas por IP compartidas entre workers y sin confiar en X-Forwarded-For"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_x_forwarded_for_no_cambia_la_ip(self):
+        peticiones = [
+            self.factory.post('/api/login', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}')
+            for i in range(3)
+        ]
+        self.assertEqual({_ip_cliente(p) for p in peticiones}, {'10.0.0.1'})
+
+    def test_proxies_de_confianza_desde_la_derecha(self):
+        peticion = self.factory.post(
+            '/api/login', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 200.1.1.1'
+        )
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(_ip_cliente(peticion), '200.1.1.1')
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=3):
+            # Menos saltos que proxies: el encabezado no es confiable
+            self.assertEqual(_ip_cliente(peticion), '10.0.0.1')
+
+    def test_base_de_datos_compartida_entre_workers(self):
+        workers = [DatabaseBackend(), DatabaseBackend()]
+        resultados = [workers[i % 2].consumir('/api/login|ip|1.1.1.1', 3, 3 / 60)[0] for i in range(5)]
+        self.assertEqual(resultados, [True, True, True, False, False])
+        permitido, retry_after = workers[0].consumir('/api/login|ip|1.1.1.1', 3, 3 / 60)
+        self.assertFalse(permitido)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(workers[1].consumir('/api/login|ip|2.2.2.2', 3, 3 / 60)[0])
+
+    def test_cache(self):
+        backend = CacheBackend()
+        backend.reset()
+        resultados = [backend.consumir('/api/forgot-password|id|a@b.mx', 2, 1 / 60)[0] for _ in range(3)]
+        self.assertEqual(resultados, [True, True, False])
+
+    def test_middleware_con_ips_rotadas(self):
+        with override_settings(RATE_LIMIT_RULES={'/api/login': {'capacidad': 2, 'por_minuto': 1, 'campo': 'id_usuario'}}):
+            codigos = [
+                self.client.post(
+                    '/api/login', data=json.dumps({}), content_type='application/json',
+                    HTTP_X_FORWARDED_FOR=f'9.9.9.{i}',
+                ).status_code
+                for i in range(3)
+            ]
+        self.assertEqual(codigos[-1], 429)
+
+
+@override_settings(EMAIL_ENABLED=False, RATE_LIMIT_ENABLED=False)
+class RecoveryCodeTests(TestCase):
+    """Los códigos de recuperación son de un solo uso y nunca se escriben en el log"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('20260001', 'e1@buap.mx', None, nombre_completo='Estudiante Uno')
+
+    def _codigo(self, minutos=15, code='123456'):
+        return RecoveryCode.objects.create(user=self.user, code=code, expires_at=timezone.now() + timedelta(minutes=minutos))
+
+    def _reset(self, code, password='Nueva456!'):
+        return self.client.post('/api/reset-password', data=json.dumps({
+            'correo': 'e1@buap.mx', 'code': code, 'new_password': password,
+        }), content_type='application/json')
+
+    def test_codigo_de_un_solo_uso(self):
+        self._codigo()
+        self.assertEqual(self._reset('123456').status_code, 200)
+        self.assertEqual(self._reset('123456', 'Otra789!').status_code, 400)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Nueva456!'))
+        response = self.client.post('/api/verify-recovery-code', data=json.dumps({'correo': 'e1@buap.mx', 'code': '123456'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_codigo_expirado(self):
+        self._codigo(minutos=-1)
+        self.assertEqual(self._reset('123456').status_code, 400)
+
+    def test_el_codigo_no_se_escribe_en_el_log(self):
+        salida = io.StringIO()
+        with mock.patch('users.email_service.send_recovery_code_email', return_value=False), \
+                self.assertLogs('users.views', level='ERROR') as logs, redirect_stdout(salida):
+            _enviar_codigo_recuperacion('Estudiante Uno', 'e1@buap.mx', '987654')
+        self.assertIn('e1@buap.mx', logs.output[0])
+        self.assertNotIn('987654', ''.join(logs.output) + salida.getvalue())
+
+    def test_purga_solo_los_expirados(self):
+        vigente = self._codigo()
+        for i in range(5):
+            self._codigo(minutos=-1, code=f'00000{i}')
+        call_command('purge_recovery_codes', '--lote', '2', stdout=io.StringIO())
+        self.assertEqual(list(RecoveryCode.objects.values_list('id', flat=True)), [vigente.id])
+
+
+class EmailQueueTests(TestCase):
+    """Carriles de la cola de emails, descartes y envíos encolados después del commit"""
+
+    def test_procesados_por_carril(self):
+        cola = EmailQueue(workers=1, priority_workers=1)
+        cola.encolar(lambda: True, prioridad=PRIORITARIO)
+        cola.encolar(lambda: False)
+        for carril in (PRIORITARIO, NORMAL):
+            cola._colas[carril].join()
+        stats = cola.stats()
+        self.assertEqual(stats[PRIORITARIO]['procesados'], 1)
+        self.assertEqual(stats[PRIORITARIO]['enviados'], 1)
+        self.assertEqual(stats[NORMAL]['procesados'], 1)
+        self.assertEqual(stats[NORMAL]['fallidos'], 1)
+        self.assertEqual(stats[NORMAL]['pendientes'], 0)
+
+    def test_endpoint(self):
+        response = self.client.get('/api/email-queue-stats')
+        self.assertEqual(response.status_code, 200)
+        carriles = response.json()['email_queue']
+        self.assertEqual(set(carriles), {PRIORITARIO, NORMAL})
+        self.assertIn('pendientes', carriles[NORMAL])
+        self.assertIn('procesados', carriles[NORMAL])
+
+    def _post(self, ruta, datos):
+        return self.client.post(ruta, data=json.dumps(datos), content_type='application/json')
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_registro_encola_la_bienvenida_al_commit(self):
+        with mock.patch.object(email_queue, 'encolar') as encolar:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                response = self._post('/api/register', {
+                    'id_usuario': '20260001', 'password': 'Clave123!', 'nombre_completo': 'Estudiante Uno',
+                    'correo': 'e1@buap.mx', 'carrera': 'ICC', 'rol': 'estudiante',
+                })
+            self.assertEqual(response.status_code, 201)
+            # Nada se envía ni se encola antes del commit
+            encolar.assert_not_called()
+            for callback in callbacks:
+                callback()
+        encolar.assert_called_once()
+        self.assertIs(encolar.call_args.args[0], send_welcome_email)
+        self.assertEqual(encolar.call_args.kwargs['correo'], 'e1@buap.mx')
+        self.assertEqual(encolar.call_args.kwargs['prioridad'], NORMAL)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_recuperacion_usa_el_carril_prioritario(self):
+        User.objects.create_user('20260001', 'e1@buap.mx', None, nombre_completo='Estudiante Uno')
+        with mock.patch.object(email_queue, 'encolar') as encolar, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._post('/api/forgot-password', {'correo': 'e1@buap.mx'}).status_code, 200)
+        encolar.assert_called_once()
+        self.assertIs(encolar.call_args.args[0], _enviar_codigo_recuperacion)
+        self.assertEqual(encolar.call_args.args[3], RecoveryCode.objects.get(user_id='20260001').code)
+        self.assertEqual(encolar.call_args.kwargs['prioridad'], PRIORITARIO)
+
+    def test_cola_llena_descarta(self):
+        cola = EmailQueue(workers=1, priority_workers=1, max_size=1)
+        tomado, liberar = threading.Event(), threading.Event()
+
+        def bloquear():
+            tomado.set()
+            return liberar.wait(5)
+
+        cola.encolar(bloquear)
+        # El trabajador tiene el primero; el segundo ocupa la cola y el tercero se descarta
+        self.assertTrue(tomado.wait(5))
+        self.assertTrue(cola.encolar(lambda: True))
+        self.assertFalse(cola.encolar(lambda: True))
+        liberar.set()
+        cola._colas[NORMAL].join()
+        self.assertEqual(cola.stats()[NORMAL]['descartados'], 1)
+        self.assertEqual(cola.stats()[NORMAL]['procesados'], 2)
+
+
+class ImportUsersTests(TestCase):
+    """import_users: archivos vacíos o inválidos y conteo con conflictos"""
+
+    def _archivo(self, contenido, sufijo='.json'):
+        archivo = tempfile.NamedTemporaryFile('w', suffix=sufijo, encoding='utf-8', delete=False)
+        archivo.write(contenido)
+        archivo.close()
+        self.addCleanup(os.remove, archivo.name)
+        return archivo.name
+
+    def _importar(self, ruta):
+        salida = io.StringIO()
+        call_command('import_users', ruta, stdout=salida, stderr=io.StringIO())
+        return salida.getvalue()
+
+    def test_archivos_sin_usuarios(self):
+        for contenido, sufijo in [('', '.json'), ('[]', '.json'), ('{"id_usuario": "1"}', '.json'),
+                                  ('[{"id_usuario": "1", "correo": "a@b.mx"}', '.json'),
+                                  ('', '.csv'), ('id_usuario,correo\n', '.csv'), ('nombre\nAna\n', '.csv')]:
+            with self.subTest(contenido=contenido, sufijo=sufijo), self.assertRaises(CommandError):
+                self._importar(self._archivo(contenido, sufijo))
+
+    def test_conflicto_cuenta_solo_los_insertados(self):
+        ruta = self._archivo(json.dumps([
+            {'id_usuario': f'2026{i:04d}', 'correo': f'e{i}@buap.mx', 'nombre_completo': f'E {i}'} for i in range(3)
+        ]))
+        original = User.objects.bulk_create
+
+        def concurrente(usuarios, **kwargs):
+            # Otro proceso insertó 20260001 después de la revisión de duplicados
+            if len(usuarios) > 1 or usuarios[0].id_usuario == '20260001':
+                raise IntegrityError('UNIQUE constraint failed: users.id_usuario')
+            return original(usuarios, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', side_effect=concurrente):
+            salida = self._importar(ruta)
+        self.assertIn('Insertados: 2', salida)
+        self.assertIn('Saltados (ya existían o duplicados): 1', salida)
+        self.assertEqual(User.objects.filter(id_usuario__startswith='2026').count(), 2)
+
+
+@override_settings(EMAIL_ENABLED=False)
+class EnrollmentTests(TestCase):
+    """Inscripción masiva: modo reemplazar sin vaciar por accidente y modo agregar sobre lo actual"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.iti = [
+            Materia.objects.create(codigo=f'ITI-{i}', nombre=f'ITI {i}', nrc=f'40{i}', carreras_permitidas=['ITI'])
+            for i in range(2)
+        ]
+        cls.icc = [
+            Materia.objects.create(codigo=f'ICC-{i}', nombre=f'ICC {i}', nrc=f'50{i}', carreras_permitidas=['ICC'])
+            for i in range(2)
+        ]
+        User.objects.create_user('20260001', 'iti@buap.mx', None, nombre_completo='Estudiante ITI', carrera='ITI') \
+            .materias_estudiante.add(cls.iti[0])
+        User.objects.create_user('20260002', 'icc@buap.mx', None, nombre_completo='Estudiante ICC', carrera='ICC') \
+            .materias_estudiante.add(cls.icc[0])
+
+    def _inscribir(self, inscripciones, **datos):
+        return self.client.post('/api/users/materias/bulk', {'inscripciones': inscripciones, **datos},
+                                content_type='application/json').json()
+
+    def _materias(self, id_usuario):
+        return sorted(User.objects.get(pk=id_usuario).materias_estudiante.values_list('id', flat=True))
+
+    def test_roster_sin_materias_no_borra_inscripciones(self):
+        csv_roster = SimpleUploadedFile('roster.csv', b'id_usuario,materias\n20260002,\n', content_type='text/csv')
+        response = self.client.post('/api/users/materias/bulk', {'archivo': csv_roster})
+        self.assertEqual(response.json()['resumen']['errores'], 1)
+        self.assertEqual(self._materias('20260002'), [self.icc[0].id])
+
+        reporte = self._inscribir([{'id_usuario': '20260002', 'materias': []}], vaciar=True)
+        self.assertEqual(reporte['resumen']['usuarios_actualizados'], 1)
+        self.assertEqual(self._materias('20260002'), [])
+
+    def test_agregar_valida_con_las_materias_actuales(self):
+        # ITI solo puede tener una materia: ya tiene iti[0]
+        reporte = self._inscribir([{'id_usuario': '20260001', 'materias': [self.iti[1].id]}], modo='agregar')
+        self.assertEqual(reporte['resumen']['errores'], 1)
+        self.assertEqual(reporte['errores'][0]['error'], 'Para la carrera ITI solo puede seleccionar una materia')
+        self.assertEqual(self._materias('20260001'), [self.iti[0].id])
+
+        # Repetir la que ya tiene no es error ni escribe nada
+        reporte = self._inscribir([{'id_usuario': '20260001', 'materias': [self.iti[0].id]}], modo='agregar')
+        self.assertEqual(reporte['resumen']['errores'], 0)
+        self.assertEqual(reporte['resumen']['relaciones_escritas'], 0)
+
+    def test_agregar_cuenta_solo_las_relaciones_nuevas(self):
+        materias = [self.icc[0].id, self.icc[1].id]
+        reporte = self._inscribir([{'id_usuario': '20260002', 'materias': materias}], modo='agregar')
+        self.assertEqual(reporte['resumen']['relaciones_escritas'], 1)
+        self.assertEqual(self._materias('20260002'), sorted(materias))
+
+        reporte = inscribir_lote([(1, '20260002', materias)], modo=AGREGAR, dry_run=True)
+        self.assertEqual(reporte['resumen']['relaciones_escritas'], 0)
@@ -17,6 +17,7 @@ urlpatterns = [
     # Usuarios
     path('users', views.get_users, name='get-users'),
     path('users/materias', views.update_materias, name='update-materias'),
+    path('users/materias/bulk', views.bulk_update_materias, name='bulk-update-materias'),
     
     # Materias
     path('materias', views.get_materias_disponibles, name='get-materias'),
@@ -26,4 +27,7 @@ urlpatterns = [
     path('test-reminders/', views.test_reminders),
     path('test-smtp', views.test_smtp, name='test-smtp'),
     path('test-smtp/', views.test_smtp),
+    path('hash-pool-stats', views.hash_pool_stats, name='hash-pool-stats'),
+    path('rate-limit-stats', views.rate_limit_stats_view, name='rate-limit-stats'),
+    path('email-queue-stats', views.email_queue_stats, name='email-queue-stats'),
 ]
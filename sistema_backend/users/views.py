@@ -4,14 +4,28 @@ Views para la API de usuarios
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
+import json
+import logging
 import random
 import string
 
+from config.async_views import async_api_view
+from config.renderers import json_response
+
 from .models import User, RecoveryCode, Materia
+from .catalog import materia_catalog
+from .hash_pool import hash_pool, HashPoolSaturado
+from .ratelimit import rate_limit_stats
+from .email_queue import email_queue, PRIORITARIO
+from .enrollment import MODOS, REEMPLAZAR, inscribir_lote, roster_desde_csv, roster_desde_lista
+from .conditional import build_etag, conditional_get
+from .streaming import stream_json
 from .serializers import (
     UserSerializer,
+    UserListSerializer,
     RegisterSerializer,
     LoginSerializer,
     ForgotPasswordSerializer,
@@ -21,6 +35,8 @@ from .serializers import (
     UpdateMateriasSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @api_view(['POST'])
 def register(request):
@@ -30,22 +46,18 @@ def register(request):
     """
     from .email_service import send_welcome_email
     
-    print(f"[DEBUG] Datos recibidos: {request.data}")
     serializer = RegisterSerializer(data=request.data)
     
     if serializer.is_valid():
         user = serializer.save()
         
-        # Enviar email de bienvenida
-        try:
-            send_welcome_email(
-                nombre_completo=user.nombre_completo,
-                correo=user.correo,
-                rol=user.rol
-            )
-            print(f"[DEBUG] Email de bienvenida enviado a {user.correo}")
-        except Exception as e:
-            print(f"[ERROR] No se pudo enviar email de bienvenida: {e}")
+        # Enviar email de bienvenida (en background, después del commit)
+        email_queue.encolar_al_commit(
+            send_welcome_email,
+            nombre_completo=user.nombre_completo,
+            correo=user.correo,
+            rol=user.rol
+        )
         
         return Response({
             'success': True,
@@ -58,7 +70,6 @@ def register(request):
     
     # Formatear errores para mantener compatibilidad con frontend
     errors = serializer.errors
-    print(f"[DEBUG] Errores de validación: {errors}")
     error_message = ''
     
     if 'id_usuario' in errors:
@@ -76,7 +87,7 @@ def register(request):
     else:
         error_message = str(list(errors.values())[0][0])
     
-    print(f"[DEBUG] Mensaje de error: {error_message}")
+    logger.info(f"[REGISTER] Registro rechazado ({', '.join(errors)}): {error_message}")
     return Response({
         'success': False,
         'message': error_message
@@ -91,7 +102,18 @@ def login(request):
     """
     serializer = LoginSerializer(data=request.data)
     
-    if serializer.is_valid():
+    try:
+        es_valido = serializer.is_valid()
+    except HashPoolSaturado as e:
+        # Demasiados logins en cola: rechazar rápido en lugar de bloquear hilos
+        response = Response({
+            'success': False,
+            'message': 'El servicio está ocupado, intenta de nuevo en unos segundos'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    
+    if es_valido:
         user = serializer.validated_data['user']
         return Response({
             'success': True,
@@ -110,15 +132,66 @@ def login(request):
     }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@api_view(['GET'])
+def hash_pool_stats(request):
+    """
+    GET /api/hash-pool-stats
+    Métricas del pool de verificación de contraseñas (tiempo de hash y espera en cola)
+    """
+    return Response({
+        'success': True,
+        'hash_pool': hash_pool.stats()
+    })
+
+
+@api_view(['GET'])
+def rate_limit_stats_view(request):
+    """
+    GET /api/rate-limit-stats
+    Peticiones permitidas y rechazadas (429) por endpoint protegido
+    """
+    return Response({
+        'success': True,
+        'rate_limit': rate_limit_stats.stats()
+    })
+
+
+@api_view(['GET'])
+def email_queue_stats(request):
+    """
+    GET /api/email-queue-stats
+    Emails pendientes y procesados por carril de la cola (prioritario / normal)
+    """
+    return Response({
+        'success': True,
+        'email_queue': email_queue.stats()
+    })
+
+
 @api_view(['GET'])
 def get_users(request):
     """
     GET /api/users
     Obtener todos los usuarios (desarrollo)
     """
-    users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data)
+    users = UserListSerializer.prefetch_queryset(User.objects.all())
+    serializer = UserListSerializer()
+    return stream_json(serializer.to_representation(u) for u in users.iterator(chunk_size=2000))
+
+
+def _enviar_codigo_recuperacion(nombre_completo, correo, code):
+    """Envío del código desde la cola de emails (carril prioritario)"""
+    from .email_service import send_recovery_code_email
+    
+    email_sent = send_recovery_code_email(
+        nombre_completo=nombre_completo,
+        correo=correo,
+        code=code
+    )
+    if not email_sent:
+        # El código nunca se escribe en el log: el usuario puede pedir uno nuevo
+        logger.error(f"[RECOVERY] No se pudo enviar el código de recuperación a {correo}")
+    return email_sent
 
 
 @api_view(['POST'])
@@ -127,13 +200,11 @@ def forgot_password(request):
     POST /api/forgot-password
     Solicitar código de recuperación de contraseña
     """
-    from .email_service import send_recovery_code_email
-    
     serializer = ForgotPasswordSerializer(data=request.data)
     
     if serializer.is_valid():
         correo = serializer.validated_data['correo']
-        user = User.objects.get(correo__iexact=correo)
+        user = User.objects.get(correo_normalizado=User.normalizar_correo(correo))
         
         # Generar código de 6 dígitos
         code = ''.join(random.choices(string.digits, k=6))
@@ -145,25 +216,19 @@ def forgot_password(request):
             expires_at=timezone.now() + timedelta(minutes=15)
         )
         
-        # Enviar correo con el código
-        email_sent = send_recovery_code_email(
-            nombre_completo=user.nombre_completo,
-            correo=user.correo,
-            code=code
+        # Enviar correo con el código (carril prioritario de la cola, después del commit)
+        email_queue.encolar_al_commit(
+            _enviar_codigo_recuperacion,
+            user.nombre_completo,
+            user.correo,
+            code,
+            prioridad=PRIORITARIO
         )
         
-        if email_sent:
-            return Response({
-                'success': True,
-                'message': 'Se ha enviado un código de verificación a tu correo'
-            })
-        else:
-            # Si falla el email, igual devolvemos éxito pero logueamos el código
-            print(f"[DEBUG] Email falló. Código de recuperación para {correo}: {code}")
-            return Response({
-                'success': True,
-                'message': 'Se ha enviado un código de verificación a tu correo'
-            })
+        return Response({
+            'success': True,
+            'message': 'Se ha enviado un código de verificación a tu correo'
+        })
     
     return Response({
         'success': False,
@@ -183,21 +248,19 @@ def verify_code(request):
         correo = serializer.validated_data['correo']
         code = serializer.validated_data['code']
         
-        try:
-            user = User.objects.get(correo__iexact=correo)
-            recovery = RecoveryCode.objects.filter(
-                user=user,
-                code=code,
-                used=False,
-                expires_at__gt=timezone.now()
-            ).latest('created_at')
-            
+        # Una sola consulta sobre el índice (user, code, used, expires_at)
+        valido = RecoveryCode.objects.filter(
+            user__correo_normalizado=User.normalizar_correo(correo),
+            code=code,
+            used=False,
+            expires_at__gt=timezone.now()
+        ).exists()
+        
+        if valido:
             return Response({
                 'success': True,
                 'message': 'Código verificado correctamente'
             })
-        except (User.DoesNotExist, RecoveryCode.DoesNotExist):
-            pass
     
     return Response({
         'success': False,
@@ -211,7 +274,6 @@ def reset_password(request):
     POST /api/reset-password
     Restablecer contraseña con código verificado
     """
-    print(f"[DEBUG] reset_password recibió: {request.data}")
     serializer = ResetPasswordSerializer(data=request.data)
     
     if serializer.is_valid():
@@ -219,48 +281,33 @@ def reset_password(request):
         code = serializer.validated_data['code']
         new_password = serializer.validated_data['new_password']
         
-        print(f"[DEBUG] Buscando código para: correo={correo}, code={code}")
+        user = User.objects.filter(correo_normalizado=User.normalizar_correo(correo)).first()
         
-        try:
-            user = User.objects.get(correo__iexact=correo)
-            print(f"[DEBUG] Usuario encontrado: {user.correo}")
+        if user is not None:
+            with transaction.atomic():
+                # Consumir el código de forma atómica: UPDATE ... WHERE used=false AND expires_at>now.
+                # Si dos peticiones usan el mismo código, solo una actualiza filas.
+                consumido = RecoveryCode.objects.filter(
+                    user_id=user.pk,
+                    code=code,
+                    used=False,
+                    expires_at__gt=timezone.now()
+                ).update(used=True)
+                
+                if consumido:
+                    user.set_password(new_password)
+                    user.save(update_fields=['password'])
             
-            # Buscar códigos disponibles para debug
-            all_codes = RecoveryCode.objects.filter(user=user).order_by('-created_at')
-            print(f"[DEBUG] Códigos existentes para {correo}:")
-            for rc in all_codes[:3]:
-                print(f"  - code={rc.code}, used={rc.used}, expires={rc.expires_at}, now={timezone.now()}")
-            
-            recovery = RecoveryCode.objects.filter(
-                user=user,
-                code=code,
-                used=False,
-                expires_at__gt=timezone.now()
-            ).latest('created_at')
-            
-            print(f"[DEBUG] Código válido encontrado: {recovery.code}")
-            
-            # Cambiar contraseña
-            user.set_password(new_password)
-            user.save()
-            
-            # Marcar código como usado
-            recovery.used = True
-            recovery.save()
-            
-            print(f"[DEBUG] Contraseña actualizada exitosamente para {correo}")
-            return Response({
-                'success': True,
-                'message': 'Contraseña actualizada exitosamente'
-            })
-        except User.DoesNotExist:
-            print(f"[DEBUG] Usuario no encontrado: {correo}")
-        except RecoveryCode.DoesNotExist:
-            print(f"[DEBUG] Código no encontrado o inválido para {correo}")
-        except Exception as e:
-            print(f"[DEBUG] Error inesperado: {type(e).__name__}: {e}")
+            if consumido:
+                logger.info(f"[RECOVERY] Contraseña actualizada para {user.id_usuario}")
+                return Response({
+                    'success': True,
+                    'message': 'Contraseña actualizada exitosamente'
+                })
+        
+        logger.info("[RECOVERY] reset_password: usuario o código inválido/expirado")
     else:
-        print(f"[DEBUG] Errores de validación: {serializer.errors}")
+        logger.info(f"[RECOVERY] reset_password: errores de validación en {', '.join(serializer.errors)}")
     
     return Response({
         'success': False,
@@ -268,19 +315,31 @@ def reset_password(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['POST'])
-def test_reminders(request):
+def _cuerpo_json(request):
+    """Body JSON (o de formulario) para las vistas async que no pasan por DRF"""
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return datos if isinstance(datos, dict) else {}
+    return request.POST
+
+
+@async_api_view(['POST'])
+async def test_reminders(request):
     """
     POST /api/test-reminders
     Probar conexión al servicio de email y enviar email de prueba.
     Body opcional: { "correo": "destino@ejemplo.com" }
+    Vista async: las llamadas a Brevo no ocupan un hilo del worker bajo ASGI.
     """
-    from .email_service import test_email_connection, send_recovery_code_email
+    from .email_service import atest_email_connection, asend_recovery_code_email
 
     # Paso 1: Probar conexión al servicio de email
-    conn_result = test_email_connection()
+    conn_result = await atest_email_connection()
     if not conn_result['success']:
-        return Response({
+        return json_response({
             'success': False,
             'message': f'Error de conexión: {conn_result["message"]}',
             'config': conn_result.get('config', {}),
@@ -288,59 +347,66 @@ def test_reminders(request):
 
     # Paso 2: Enviar email de prueba
     try:
-        to_email = request.data.get('correo')
+        to_email = _cuerpo_json(request).get('correo')
         if not to_email:
-            docente = User.objects.filter(rol='docente').first()
+            docente = await User.objects.filter(rol='docente').only('correo').afirst()
             if docente:
                 to_email = docente.correo
             else:
-                return Response({
+                return json_response({
                     'success': False,
                     'message': 'No hay docentes registrados y no se proporcionó correo destino',
                     'connection': 'OK',
                 }, status=status.HTTP_404_NOT_FOUND)
 
-        success = send_recovery_code_email(
+        success = await asend_recovery_code_email(
             nombre_completo='Prueba de Sistema',
             correo=to_email,
             code='123456'
         )
 
         if success:
-            return Response({
+            return json_response({
                 'success': True,
                 'message': f'Email de prueba enviado a {to_email}',
                 'backend': conn_result['config']['backend'],
             })
         else:
-            return Response({
+            return json_response({
                 'success': False,
                 'message': f'Conexión OK pero falló el envío a {to_email}. Revisa los logs.',
                 'backend': conn_result['config']['backend'],
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     except Exception as e:
-        return Response({
+        return json_response({
             'success': False,
             'message': f'Error: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['GET'])
-def test_smtp(request):
+@async_api_view(['GET'])
+async def test_smtp(request):
     """
     GET /api/test-smtp
     Prueba la conexión al servicio de email sin enviar nada.
     Útil para verificar las variables de entorno en Railway.
     """
-    from .email_service import test_email_connection
+    from .email_service import atest_email_connection
 
-    result = test_email_connection()
+    result = await atest_email_connection()
     http_status = status.HTTP_200_OK if result['success'] else status.HTTP_500_INTERNAL_SERVER_ERROR
-    return Response(result, status=http_status)
+    return json_response(result, status=http_status)
+
+
+def _materias_validators(request):
+    """ETag del catálogo: cambia solo cuando se edita alguna materia"""
+    carrera = request.GET.get('carrera', '')
+    return build_etag('materias', materia_catalog.firma, carrera), None
 
 
 @api_view(['GET'])
+@conditional_get(_materias_validators)
 def get_materias_disponibles(request):
     """
     GET /api/materias?carrera=ICC
@@ -403,3 +469,47 @@ def update_materias(request):
         'success': False,
         'message': error_message
     }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def bulk_update_materias(request):
+    """
+    POST /api/users/materias/bulk
+    Inscripción masiva de materias.
+    Body JSON: { "inscripciones": [{"id_usuario": "...", "materias": [1, 2]}, ...], "modo": "reemplazar" }
+    o multipart con "archivo" (CSV con columnas id_usuario,materias; materias separadas por ';')
+    En modo reemplazar las filas sin materias son error, salvo con "vaciar": true
+    """
+    modo = request.data.get('modo', REEMPLAZAR)
+    if modo not in MODOS:
+        return Response({
+            'success': False,
+            'message': f"Modo no válido. Opciones: {', '.join(MODOS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    archivo = request.FILES.get('archivo')
+    if archivo is not None:
+        try:
+            roster = roster_desde_csv(archivo.read().decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            return Response({
+                'success': False,
+                'message': 'El archivo debe estar en UTF-8'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif isinstance(request.data.get('inscripciones'), list):
+        roster = roster_desde_lista(request.data['inscripciones'])
+    else:
+        return Response({
+            'success': False,
+            'message': 'Envía "inscripciones" (lista) o un "archivo" CSV'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    vaciar = request.data.get('vaciar') in (True, 'true', 'True', '1')
+    reporte = inscribir_lote(roster, modo=modo, permitir_vaciar=vaciar)
+    resumen = reporte['resumen']
+    
+    return Response({
+        'success': True,
+        'message': f"{resumen['usuarios_actualizados']} usuarios actualizados, {resumen['errores']} filas con error",
+        **reporte
+    }, status=status.HTTP_200_OK)